@@ -0,0 +1,161 @@
+# backend/admin_stats.py
+"""
+Shared admin / analytics statistics provider
+Transaction and user aggregates come from the incrementally maintained
+stat_counters table (see stat_counters.py); the snapshot is cached for a
+short TTL together with recent transactions and pool stats.
+Admin dashboard and analytics distribution read the same snapshot, so
+their DB load does not grow with traffic.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+from models import Transaction, PoolStats
+from stat_counters import LOCKED_KEY, read_counters, user_key
+
+load_dotenv()
+
+ADMIN_STATS_TTL_SECONDS = float(os.getenv("ADMIN_STATS_TTL_SECONDS", "15"))
+RECENT_TRANSACTIONS_LIMIT = 10
+
+TX_STATUSES = ("pending", "confirmed", "failed")
+TX_TYPES = ("stake", "unstake")
+
+
+def aggregate_transactions(counters: Optional[Dict] = None) -> Dict:
+    """
+    Counts and volumes by status and type from the stat counters
+
+    Args:
+        counters: Result of read_counters() (read if not given)
+
+    Returns:
+        Dict with total, by_status, by_type, volume_by_type, locked_count
+    """
+    counters = read_counters() if counters is None else counters
+    by_status = {status: 0 for status in TX_STATUSES}
+    by_type = {tx_type: 0 for tx_type in TX_TYPES}
+    volume_by_type = {tx_type: 0.0 for tx_type in TX_TYPES}
+    total = 0
+    for key, (count, volume) in counters.items():
+        if not key.startswith("tx:"):
+            continue
+        _, status, tx_type = key.split(":", 2)
+        total += count
+        by_status[status] = by_status.get(status, 0) + count
+        by_type[tx_type] = by_type.get(tx_type, 0) + count
+        volume_by_type[tx_type] = volume_by_type.get(tx_type, 0.0) + float(volume)
+
+    return {
+        "total": total,
+        "by_status": by_status,
+        "by_type": by_type,
+        "volume_by_type": volume_by_type,
+        "locked_count": counters.get(LOCKED_KEY, (0, 0.0))[0],
+    }
+
+
+def aggregate_users(counters: Optional[Dict] = None) -> Dict:
+    """Total users and active subscriptions from the stat counters"""
+    counters = read_counters() if counters is None else counters
+    total = sum(count for key, (count, _) in counters.items() if key.startswith("users:"))
+    active = counters.get(user_key("active"), (0, 0.0))[0]
+    return {"total": total, "active_subscriptions": active}
+
+
+def _recent_transactions() -> list:
+    recent = []
+    for tx in Transaction.query.order_by(Transaction.created_at.desc()).limit(RECENT_TRANSACTIONS_LIMIT).all():
+        recent.append({
+            "id": tx.id,
+            "user_id": tx.user_id,
+            "type": tx.type,
+            "amount": float(tx.amount) if tx.amount else 0,
+            "status": tx.status,
+            "tx_hash": tx.tx_hash[:20] + "..." if len(tx.tx_hash) > 20 else tx.tx_hash,
+            "created_at": tx.created_at.isoformat() if tx.created_at else None,
+            "is_locked": tx.is_locked
+        })
+    return recent
+
+
+def _latest_pool_stats() -> Dict:
+    pool_stats = PoolStats.query.order_by(PoolStats.updated_at.desc()).first()
+    return {
+        "total_pool_ton": pool_stats.total_pool_ton if pool_stats else 0.0,
+        "total_jettons": pool_stats.total_jettons if pool_stats else 0.0,
+        "apy": pool_stats.apy if pool_stats else 0.0,
+        "updated_at": pool_stats.updated_at.isoformat() if pool_stats else None
+    }
+
+
+class AdminStatsProvider:
+    """TTL-cached stats snapshot; concurrent readers share one computation"""
+
+    def __init__(self, ttl: float = ADMIN_STATS_TTL_SECONDS):
+        self.ttl = ttl
+        self._snapshot: Optional[Dict] = None
+        self._computed_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "computations": 0, "last_compute_ms": 0.0}
+
+    def _compute(self) -> Dict:
+        started = time.monotonic()
+        counters = read_counters()
+        snapshot = {
+            "users": aggregate_users(counters),
+            "transactions": aggregate_transactions(counters),
+            "recent_transactions": _recent_transactions(),
+            "pool": _latest_pool_stats(),
+            "computed_at": datetime.utcnow().isoformat(),
+        }
+        self._stats["computations"] += 1
+        self._stats["last_compute_ms"] = round((time.monotonic() - started) * 1000, 1)
+        return snapshot
+
+    def get(self) -> Dict:
+        """
+        Current snapshot (recomputed when older than the TTL)
+
+        Returns:
+            Dict with users, transactions, recent_transactions, pool, computed_at
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._computed_at < self.ttl:
+            self._stats["hits"] += 1
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._computed_at < self.ttl:
+                self._stats["hits"] += 1
+                return self._snapshot
+            self._snapshot = self._compute()
+            self._computed_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self):
+        """Force recomputation on the next read"""
+        self._computed_at = 0.0
+
+    def stats(self) -> Dict:
+        data = dict(self._stats)
+        data["ttl"] = self.ttl
+        return data
+
+
+# Singleton instance
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_admin_stats_provider() -> AdminStatsProvider:
+    """Get or create the process-wide admin stats provider"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = AdminStatsProvider()
+    return _provider
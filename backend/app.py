@@ -6,13 +6,14 @@ TON Staking Pool Backend + Static Frontend server
 - API з JWT/Stripe (як було)
 
 🔒 PRODUCTION OPTIMIZATIONS APPLIED:
-  ✅ Phase 4.7: ProxyFix, WebhookEvent idempotency, Flask-Limiter, 1 worker (no duplicate APScheduler)
-  ✅ Commit 712038a: Procfile updated with --workers 1
+  ✅ Phase 4.7: ProxyFix, WebhookEvent idempotency, Flask-Limiter
+  ✅ Background jobs run in worker.py (out of process), leader-elected (leader_election.py)
   ✅ Session Cookies: SECURE + SAMESITE='Lax' on HTTPS
   ✅ Rate Limiting: 30/min webhook, 60/min pool, 30/min user endpoints
 """
 import os
 import json
+import atexit
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -21,7 +22,7 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_jwt_extended import (
     JWTManager, create_access_token, create_refresh_token,
-    jwt_required, get_jwt_identity, get_jwt
+    jwt_required, get_jwt_identity, get_jwt, decode_token
 )
 from flask_talisman import Talisman
 from werkzeug.middleware.proxy_fix import ProxyFix
@@ -29,19 +30,34 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from dotenv import load_dotenv
 import stripe
+from sqlalchemy import func
 
 from models import db, User, Transaction, PoolStats, Subscription
 from auth import login_required, admin_required, subscription_required
 from ton_api import TONAPIClient, PoolService
-from transaction_monitor import init_scheduler
-from email_service import get_email_service
+from http_session import get_http_metrics
+from ton_cache import get_ton_cache
+from singleflight import get_single_flight
+from rate_limiter import get_rate_limiter
+from pool_stats_refresher import get_pool_stats_refresher
+from pool_stats_history import query_series
+from staking_rollup import query_trends, TRENDS_MAX_DAYS
+from transaction_monitor import (
+    init_scheduler, stop_scheduler, get_monitor_stats, resolve_pending_transactions, transaction_status
+)
+from leader_election import get_leader_elector
+from db_config import configure_database, ensure_schema
+from event_stream import get_event_broker, STREAM_MAX_CLIENTS
+from admin_stats import get_admin_stats_provider
+from stat_counters import count_transactions, count_users
+from pagination import keyset_page, clamp_limit, DEFAULT_PAGE_SIZE
+from email_queue import enqueue_email
 
 # --- Env ---------------------------------------------------------------------
 load_dotenv()
 STRIPE_SECRET = os.getenv("STRIPE_SECRET_KEY", "")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 SECRET_KEY = os.getenv("SECRET_KEY", os.getenv("FLASK_SECRET_KEY", "super-secret-key"))
-DATABASE_URL = os.getenv("DATABASE_URL", "").strip()
 
 stripe.api_key = STRIPE_SECRET
 
@@ -50,6 +66,8 @@ stripe.api_key = STRIPE_SECRET
 TON_API_CLIENT = TONAPIClient(testnet=False)  # Mainnet
 POOL_ADDRESS = os.getenv("POOL_CONTRACT_ADDRESS", "EQD-AKzjnXxLk8PFyVJvt9sIQW2_MqmSwi5qPfBZbhKT5bXf")  # Default pool address
 POOL_SERVICE = PoolService(POOL_ADDRESS, testnet=False)  # Mainnet
+SCHEDULER_ELECTOR = get_leader_elector("scheduler")
+WEB_RUN_SCHEDULER = os.getenv("WEB_RUN_SCHEDULER", "0").lower() in ("1", "true", "yes")
 
 # --- Withdrawal Lock Configuration -------------------------------------------
 # Lock duration for unstake transactions (in seconds)
@@ -96,21 +114,8 @@ app.config.update(
     PREFERRED_URL_SCHEME='https'
 )
 
-# DB config
-if DATABASE_URL:
-    db_uri = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-    if "postgresql://" in db_uri and "sslmode" not in db_uri:
-        separator = "&" if "?" in db_uri else "?"
-        db_uri += f"{separator}sslmode=require"
-    app.config['SQLALCHEMY_DATABASE_URI'] = db_uri
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
-    }
-else:
-    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///ton_pool.db"
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# DB config (shared with worker.py)
+configure_database(app)
 
 # CORS
 CORS(app, supports_credentials=True)
@@ -179,11 +184,10 @@ limiter = Limiter(
     app=app,
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"  # In-memory for single worker; use Redis for multi-worker
+    storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")  # memory:// counts per worker; use redis:// to share limits
 )
 
 # --- Init DB & JWT -----------------------------------------------------------
-db.init_app(app)
 migrate = Migrate(app, db)
 
 app.config['JWT_SECRET_KEY'] = SECRET_KEY
@@ -337,52 +341,57 @@ def stripe_webhook():
 
 # --- API routes (pool, stats, etc) -------------------------------------------
 @app.get("/api/pool/stats")
-@limiter.limit("60/minute")
+@limiter.limit("600/minute")
 def api_pool_stats():
-    """Get real pool statistics from TON blockchain"""
+    """
+    Get pool statistics from the in-memory snapshot
+    The snapshot is refreshed from TON blockchain by the background scheduler
+    (pool_stats_refresher); without the scheduler in this process it is the
+    newest PoolStats row the worker wrote. No upstream calls or DB writes.
+    Supports conditional requests via ETag / Last-Modified.
+    """
+    snapshot = get_pool_stats_refresher().get_snapshot()
+    
+    response = Response(snapshot.body, mimetype="application/json")
+    response.set_etag(snapshot.etag)
+    response.last_modified = snapshot.last_modified
+    response.headers["Cache-Control"] = "no-cache"  # Always revalidate, 304 when unchanged
+    response.headers["X-Stats-Source"] = snapshot.source
+    return response.make_conditional(request)
+
+def _parse_time_arg(value, default):
+    """Parse ISO-8601 or unix-seconds query parameter (UTC)"""
+    if not value:
+        return default
+    if value.isdigit():
+        return datetime.utcfromtimestamp(int(value))
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+    return parsed
+
+@app.get("/api/pool/history")
+@limiter.limit("120/minute")
+def api_pool_history():
+    """
+    Pool balance / APY time series for charts
+    Query params: from, to (ISO-8601 or unix seconds; default last 7 days),
+    resolution (minute|hour|day, default: automatic)
+    """
     try:
-        # Try to get real data from blockchain
-        pool_balance = TON_API_CLIENT.get_address_balance(POOL_ADDRESS)
-        
-        # Get or create stats record in DB
-        stats = PoolStats.query.order_by(PoolStats.id.desc()).first()
-        if not stats:
-            stats = PoolStats(
-                total_staked=pool_balance,
-                total_staked_usd=pool_balance * 5.0,  # Approximate USD price
-                participants_count=42,
-                apy=0.097,
-                min_stake=0.5,
-                status='active',
-                testnet=False
-            )
-            db.session.add(stats)
-            db.session.commit()
-        else:
-            # Update with real balance from blockchain
-            stats.total_staked = pool_balance
-            stats.total_staked_usd = pool_balance * 5.0
-            stats.testnet = False
-            db.session.commit()
-        
-        return jsonify(stats.to_dict()), 200
+        now = datetime.utcnow()
+        end = _parse_time_arg(request.args.get("to"), now)
+        start = _parse_time_arg(request.args.get("from"), end - timedelta(days=7))
+        if start >= end:
+            return jsonify({"error": "'from' must be before 'to'"}), 400
+        
+        series = query_series(start, end, request.args.get("resolution"))
+        return jsonify(series), 200
+    except ValueError as e:
+        return jsonify({"error": f"Invalid time range: {str(e)}"}), 400
     except Exception as e:
-        print(f"Error fetching real pool stats: {str(e)}")
-        # Fallback to DB or mock data
-        stats = PoolStats.query.order_by(PoolStats.id.desc()).first()
-        if stats:
-            return jsonify(stats.to_dict()), 200
-        else:
-            # Return mock data as fallback
-            return jsonify({
-                "total_staked": 12345.678,
-                "total_staked_usd": 123456.78,
-                "participants_count": 42,
-                "apy": 0.097,
-                "min_stake": 0.5,
-                "status": 'active',
-                "testnet": False
-            }), 200
+        print(f"Error getting pool history: {str(e)}")
+        return jsonify({"error": str(e)}), 500
 
 @app.get("/api/user/<address>/balance")
 @limiter.limit("30/minute")
@@ -406,16 +415,142 @@ def api_user_balance(address: str):
             "share_percentage": 0.1
         }), 200
 
+@app.get("/api/user/<address>/transactions")
+@limiter.limit("60/minute")
+def api_user_pool_transactions(address: str):
+    """On-chain deposit/withdraw history of a wallet (served from the local pool index)"""
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    totals = POOL_SERVICE.get_user_stake_totals(address)
+    return jsonify({
+        "user_address": address,
+        "transactions": POOL_SERVICE.get_user_transactions(address, limit),
+        "totals": totals,
+        "source": "index" if totals is not None else "chain"
+    }), 200
+
+# --- Server-Sent Events -------------------------------------------------------
+STREAM_POOL_INTERVAL = float(os.getenv("STREAM_POOL_INTERVAL", "10"))
+STREAM_BALANCE_INTERVAL = float(os.getenv("STREAM_BALANCE_INTERVAL", "15"))
+STREAM_TX_INTERVAL = float(os.getenv("STREAM_TX_INTERVAL", "5"))
+STREAM_TOKEN_SECONDS = int(os.getenv("STREAM_TOKEN_SECONDS", "60"))  # Stream URLs end up in access logs
+STREAM_TX_LIMIT = 50
+
+def _stream_pool_stats(_):
+    return dict(get_pool_stats_refresher().get_snapshot().data)
+
+def _stream_user_transactions(user_id: str):
+    rows = Transaction.query.with_entities(
+        Transaction.tx_hash, Transaction.status, Transaction.updated_at
+    ).filter(
+        Transaction.user_id == int(user_id)
+    ).order_by(Transaction.id.desc()).limit(STREAM_TX_LIMIT).all()
+    return {
+        "transactions": [
+            {"tx_hash": tx_hash, "status": status, "updated_at": updated_at.isoformat() if updated_at else None}
+            for tx_hash, status, updated_at in rows
+        ]
+    }
+
+EVENT_BROKER = get_event_broker()
+EVENT_BROKER.register("pool", _stream_pool_stats, STREAM_POOL_INTERVAL)
+EVENT_BROKER.register("balance", POOL_SERVICE.get_user_balance, STREAM_BALANCE_INTERVAL)
+EVENT_BROKER.register("tx", _stream_user_transactions, STREAM_TX_INTERVAL)
+
+@app.post("/api/stream/token")
+@limiter.limit("20/minute")
+@jwt_required()
+def api_stream_token():
+    """
+    Short-lived token for /api/stream?token= (tx events)
+    EventSource cannot send headers, so the token goes in the URL and thus in
+    access logs; it is only accepted by /api/stream and expires after
+    STREAM_TOKEN_SECONDS, unlike the 2-hour access token.
+    """
+    token = create_access_token(
+        identity=get_jwt_identity(),
+        expires_delta=timedelta(seconds=STREAM_TOKEN_SECONDS),
+        additional_claims={"scope": "stream"}
+    )
+    return jsonify({"stream_token": token, "expires_in": STREAM_TOKEN_SECONDS}), 200
+
+@app.get("/api/stream")
+@limiter.limit("20/minute")
+def api_stream():
+    """
+    Server-Sent Events: pool stats, wallet balance and transaction statuses
+    Query params: pool (default 1), address (wallet for balance events),
+    token (stream token from POST /api/stream/token for tx events).
+    Events are sent only when a value changes.
+    """
+    topics = set()
+    if request.args.get("pool", "1") != "0":
+        topics.add("pool")
+    
+    address = request.args.get("address", "").strip()
+    if address:
+        if len(address) > 128 or not all(c.isalnum() or c in "-_:+/=" for c in address):
+            return jsonify({"error": "Invalid address"}), 400
+        topics.add(f"balance:{address}")
+    
+    token = request.args.get("token")
+    if token:
+        try:
+            claims = decode_token(token)
+        except Exception as e:
+            return jsonify({"error": "Authentication required", "message": str(e)}), 401
+        if claims.get("scope") != "stream":
+            return jsonify({"error": "Stream token required", "message": "POST /api/stream/token"}), 401
+        topics.add(f"tx:{int(claims['sub'])}")
+    
+    if not topics:
+        return jsonify({"error": "No topics requested"}), 400
+    
+    if EVENT_BROKER.client_count() >= STREAM_MAX_CLIENTS:
+        # Clients fall back to polling
+        response = jsonify({"error": "Too many stream clients"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+    
+    EVENT_BROKER.start(app)
+    response = Response(EVENT_BROKER.stream(topics), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # Disable proxy buffering
+    return response
+
 @app.get("/api/admin/stats")
 @admin_required
 def admin_stats():
+    snapshot = get_admin_stats_provider().get()
     return jsonify({
-        "total_users": User.query.count(),
-        "total_transactions": Transaction.query.count(),
+        "total_users": snapshot["users"]["total"],
+        "total_transactions": snapshot["transactions"]["total"],
         "total_staked": 123456.78,
         "active_subscriptions": Subscription.query.filter_by(status='active').count()
     }), 200
 
+def _user_transaction_activity(user_ids):
+    """
+    Transaction count and last activity for a page of users
+    (one grouped query on the (user_id, created_at, id) index, no row loading)
+    
+    Returns:
+        Dict user_id -> (transaction_count, last_created_at)
+    """
+    if not user_ids:
+        return {}
+    rows = db.session.query(
+        Transaction.user_id,
+        func.count(Transaction.id),
+        func.max(Transaction.created_at)
+    ).filter(
+        Transaction.user_id.in_(user_ids)
+    ).group_by(Transaction.user_id).all()
+    return {user_id: (count, last_at) for user_id, count, last_at in rows}
+
 @app.get("/api/admin/users")
 @admin_required
 def admin_users():
@@ -435,7 +570,14 @@ def health_ton():
             "network": "mainnet",
             "pool_address": POOL_ADDRESS,
             "pool_balance": balance,
-            "api_working": True
+            "api_working": True,
+            "http_pool": get_http_metrics(),
+            "cache": get_ton_cache().stats(),
+            "coalescing": get_single_flight().stats(),
+            "rate_limiter": get_rate_limiter().stats(),
+            "monitor": get_monitor_stats(),
+            "scheduler": SCHEDULER_ELECTOR.stats(),
+            "stream": EVENT_BROKER.stats()
         }), 200
     except Exception as e:
         print(f"Health check error: {str(e)}")
@@ -448,7 +590,14 @@ def health_ton():
             "pool_address": POOL_ADDRESS,
             "error": str(e)[:100],  # Truncate error message
             "api_working": False,
-            "message": "TON API connection failed - using fallback data"
+            "message": "TON API connection failed - using fallback data",
+            "http_pool": get_http_metrics(),
+            "cache": get_ton_cache().stats(),
+            "coalescing": get_single_flight().stats(),
+            "rate_limiter": get_rate_limiter().stats(),
+            "monitor": get_monitor_stats(),
+            "scheduler": SCHEDULER_ELECTOR.stats(),
+            "stream": EVENT_BROKER.stats()
         }), 200
 
 # Compatibility
@@ -524,6 +673,7 @@ def execute_stake():
             type="stake",
             amount=amount,
             tx_hash=tx_hash,
+            sender_address=user_address,  # Matched against the pool's incoming messages
             status="pending"
         )
         
@@ -532,20 +682,10 @@ def execute_stake():
             transaction.set_withdrawal_lock(STAKE_LOCK_DURATION)
         
         db.session.add(transaction)
-        db.session.commit()
         
-        # Send confirmation email
-        try:
-            email_service = get_email_service()
-            email_service.send_stake_confirmation(
-                user.email,
-                user.email.split('@')[0],  # Use email prefix as name
-                amount,
-                tx_hash
-            )
-        except Exception as e:
-            print(f"Warning: Failed to send email: {str(e)}")
-            # Don't fail the transaction if email fails
+        # Confirmation email: queued in the same DB transaction, sent by the worker
+        enqueue_email("stake_confirmation", user.email, amount=amount, tx_hash=tx_hash)
+        db.session.commit()
         
         return jsonify({
             "status": "recorded",
@@ -606,6 +746,7 @@ def execute_unstake():
             type="unstake",
             amount=0,  # Unstake doesn't have amount tracked this way
             tx_hash=tx_hash,
+            sender_address=user_address,
             status="pending"
         )
         
@@ -615,24 +756,14 @@ def execute_unstake():
             print(f"🔒 Withdrawal locked until: {withdrawal_available_at}")
         
         db.session.add(transaction)
+        
+        # Unstake email: queued in the same DB transaction, sent by the worker
+        lock_days = UNSTAKE_LOCK_DURATION // (24 * 3600)  # Convert seconds to days
+        enqueue_email("unstake_confirmation", user.email, tx_hash=tx_hash, lock_days=lock_days)
         db.session.commit()
         
         withdrawal_info = transaction.get_withdrawal_countdown()
         
-        # Send unstake confirmation email
-        try:
-            email_service = get_email_service()
-            lock_days = UNSTAKE_LOCK_DURATION // (24 * 3600)  # Convert seconds to days
-            email_service.send_unstake_confirmation(
-                user.email,
-                user.email.split('@')[0],  # Use email prefix as name
-                tx_hash,
-                lock_days
-            )
-        except Exception as e:
-            print(f"Warning: Failed to send email: {str(e)}")
-            # Don't fail the transaction if email fails
-        
         return jsonify({
             "status": "recorded",
             "tx_hash": tx_hash,
@@ -678,6 +809,13 @@ def prepare_transaction():
         print(f"Error preparing transaction: {str(e)}")
         return jsonify({"error": str(e)}), 400
 
+# Sort orders supported by keyset pagination (sort column, id)
+HISTORY_SORT_COLUMNS = {
+    "created_at": Transaction.created_at,
+    "amount": Transaction.amount,
+    "type": Transaction.type,
+}
+
 @app.get("/api/transaction/history")
 @login_required
 def get_transaction_history():
@@ -690,20 +828,15 @@ def get_transaction_history():
             return jsonify({"error": "User not found"}), 404
         
         # Get query parameters
-        page = request.args.get("page", 1, type=int)
-        limit = request.args.get("limit", 20, type=int)
+        cursor = request.args.get("cursor", None, type=str)
+        limit = clamp_limit(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int))
         sort_by = request.args.get("sort_by", "created_at", type=str)  # created_at, amount, type
         order = request.args.get("order", "desc", type=str)  # asc or desc
         status_filter = request.args.get("status", None, type=str)  # pending, confirmed, failed
+        include_total = request.args.get("include_total", "0") in ("1", "true")
         
         # Validate inputs
-        if page < 1:
-            page = 1
-        if limit > 100:
-            limit = 100
-        if limit < 1:
-            limit = 20
-        if sort_by not in ["created_at", "amount", "type"]:
+        if sort_by not in HISTORY_SORT_COLUMNS:
             sort_by = "created_at"
         if order not in ["asc", "desc"]:
             order = "desc"
@@ -715,29 +848,16 @@ def get_transaction_history():
         if status_filter:
             query = query.filter_by(status=status_filter)
         
-        # Get total count
-        total_count = query.count()
-        
-        # Apply sorting
-        if sort_by == "created_at":
-            if order == "desc":
-                query = query.order_by(Transaction.created_at.desc())
-            else:
-                query = query.order_by(Transaction.created_at.asc())
-        elif sort_by == "amount":
-            if order == "desc":
-                query = query.order_by(Transaction.amount.desc())
-            else:
-                query = query.order_by(Transaction.amount.asc())
-        elif sort_by == "type":
-            if order == "desc":
-                query = query.order_by(Transaction.type.desc())
-            else:
-                query = query.order_by(Transaction.type.asc())
-        
-        # Apply pagination
-        offset = (page - 1) * limit
-        transactions = query.offset(offset).limit(limit).all()
+        # Exact total only on request (one extra COUNT, e.g. for the first page)
+        total_count = query.count() if include_total else None
+        
+        # Keyset page on (sort column, id)
+        try:
+            transactions, next_cursor = keyset_page(
+                query, HISTORY_SORT_COLUMNS[sort_by], Transaction.id, sort_by, order, limit, cursor
+            )
+        except ValueError as e:
+            return jsonify({"error": f"Invalid cursor: {str(e)}"}), 400
         
         # Format response
         transaction_list = []
@@ -755,10 +875,10 @@ def get_transaction_history():
         return jsonify({
             "transactions": transaction_list,
             "pagination": {
-                "page": page,
                 "limit": limit,
-                "total": total_count,
-                "pages": (total_count + limit - 1) // limit  # Ceiling division
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                "total": total_count
             },
             "sort": {
                 "by": sort_by,
@@ -782,14 +902,13 @@ def get_transaction_status(tx_hash):
         if not tx:
             return jsonify({"error": "Transaction not found"}), 404
         
-        # Check status on blockchain
-        status_info = POOL_SERVICE.check_transaction_confirmed(tx_hash)
-        
-        # Update transaction status if changed
-        if status_info.get("confirmed"):
-            if tx.status != "confirmed":
-                tx.update_status("confirmed")
-                db.session.commit()
+        # Match a pending row against the pool scan (same path as the batch endpoint)
+        try:
+            resolve_pending_transactions([tx])
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error resolving transaction status: {str(e)}")
+        status_info = transaction_status(tx)
         
         return jsonify({
             "tx_hash": tx_hash,
@@ -806,6 +925,45 @@ def get_transaction_status(tx_hash):
         print(f"Error checking transaction status: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+BATCH_STATUS_MAX = int(os.getenv("BATCH_STATUS_MAX", "100"))
+
+@app.post("/api/transaction/status")
+@limiter.limit("60/minute")
+@login_required
+def get_transaction_statuses():
+    """
+    Statuses of many transactions in one request
+    Body: {"tx_hashes": [...]} (up to BATCH_STATUS_MAX)
+    One DB query for the rows, one pool scan + match for the pending ones.
+    """
+    data = request.get_json(force=True) or {}
+    tx_hashes = data.get("tx_hashes")
+    if not isinstance(tx_hashes, list) or not all(isinstance(h, str) for h in tx_hashes):
+        return jsonify({"error": "tx_hashes must be a list of strings"}), 400
+    tx_hashes = list(dict.fromkeys(h for h in tx_hashes if h))
+    if len(tx_hashes) > BATCH_STATUS_MAX:
+        return jsonify({"error": f"At most {BATCH_STATUS_MAX} tx_hashes per request"}), 400
+    if not tx_hashes:
+        return jsonify({"statuses": {}, "not_found": []}), 200
+    
+    user_id = get_jwt_identity()
+    transactions = Transaction.query.filter(
+        Transaction.user_id == user_id,
+        Transaction.tx_hash.in_(tx_hashes)
+    ).all()
+    
+    try:
+        resolve_pending_transactions(transactions)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error resolving transaction statuses: {str(e)}")
+    
+    statuses = {tx.tx_hash: tx.status for tx in transactions}
+    return jsonify({
+        "statuses": statuses,
+        "not_found": [h for h in tx_hashes if h not in statuses]
+    }), 200
+
 @app.get("/api/withdrawal/<tx_hash>/countdown")
 @login_required
 def get_withdrawal_countdown(tx_hash):
@@ -872,84 +1030,39 @@ def get_locked_transactions():
 @login_required
 @admin_required
 def get_admin_stats():
-    """Get admin dashboard statistics"""
+    """Get admin dashboard statistics (shared cached snapshot, see admin_stats.py)"""
     try:
-        # User statistics
-        total_users = User.query.count()
-        active_users = User.query.filter_by(subscription_status='active').count()
-        
-        # Transaction statistics
-        total_transactions = Transaction.query.count()
-        pending_transactions = Transaction.query.filter_by(status='pending').count()
-        confirmed_transactions = Transaction.query.filter_by(status='confirmed').count()
-        failed_transactions = Transaction.query.filter_by(status='failed').count()
-        
-        # Stake/Unstake breakdown
-        stake_transactions = Transaction.query.filter_by(type='stake').count()
-        unstake_transactions = Transaction.query.filter_by(type='unstake').count()
-        
-        # Calculate total volume
-        total_stake_volume = db.session.query(
-            db.func.coalesce(db.func.sum(Transaction.amount), 0)
-        ).filter(Transaction.type == 'stake').scalar() or 0.0
-        
-        total_unstake_volume = db.session.query(
-            db.func.coalesce(db.func.sum(Transaction.amount), 0)
-        ).filter(Transaction.type == 'unstake').scalar() or 0.0
-        
-        # Locked transactions
-        locked_count = Transaction.query.filter_by(is_locked=True).count()
-        
-        # Recent transactions (last 10)
-        recent_txs = Transaction.query.order_by(Transaction.created_at.desc()).limit(10).all()
-        
-        recent_transactions = []
-        for tx in recent_txs:
-            recent_transactions.append({
-                "id": tx.id,
-                "user_id": tx.user_id,
-                "type": tx.type,
-                "amount": float(tx.amount) if tx.amount else 0,
-                "status": tx.status,
-                "tx_hash": tx.tx_hash[:20] + "..." if len(tx.tx_hash) > 20 else tx.tx_hash,
-                "created_at": tx.created_at.isoformat() if tx.created_at else None,
-                "is_locked": tx.is_locked
-            })
-        
-        # Pool statistics
-        pool_stats = PoolStats.query.order_by(PoolStats.updated_at.desc()).first()
+        snapshot = get_admin_stats_provider().get()
+        users = snapshot["users"]
+        tx_stats = snapshot["transactions"]
         
         return jsonify({
             "users": {
-                "total": total_users,
-                "active_subscriptions": active_users,
-                "inactive": total_users - active_users
+                "total": users["total"],
+                "active_subscriptions": users["active_subscriptions"],
+                "inactive": users["total"] - users["active_subscriptions"]
             },
             "transactions": {
-                "total": total_transactions,
-                "pending": pending_transactions,
-                "confirmed": confirmed_transactions,
-                "failed": failed_transactions
+                "total": tx_stats["total"],
+                "pending": tx_stats["by_status"]["pending"],
+                "confirmed": tx_stats["by_status"]["confirmed"],
+                "failed": tx_stats["by_status"]["failed"]
             },
             "transaction_types": {
-                "stakes": stake_transactions,
-                "unstakes": unstake_transactions
+                "stakes": tx_stats["by_type"]["stake"],
+                "unstakes": tx_stats["by_type"]["unstake"]
             },
             "volume": {
-                "total_staked_ton": float(total_stake_volume),
-                "total_unstaked_ton": float(total_unstake_volume)
+                "total_staked_ton": tx_stats["volume_by_type"]["stake"],
+                "total_unstaked_ton": tx_stats["volume_by_type"]["unstake"]
             },
             "withdrawal_locks": {
-                "locked_count": locked_count,
-                "unlocked_available": total_transactions - locked_count
-            },
-            "pool": {
-                "total_pool_ton": pool_stats.total_pool_ton if pool_stats else 0.0,
-                "total_jettons": pool_stats.total_jettons if pool_stats else 0.0,
-                "apy": pool_stats.apy if pool_stats else 0.0,
-                "updated_at": pool_stats.updated_at.isoformat() if pool_stats else None
+                "locked_count": tx_stats["locked_count"],
+                "unlocked_available": tx_stats["total"] - tx_stats["locked_count"]
             },
-            "recent_transactions": recent_transactions,
+            "pool": snapshot["pool"],
+            "recent_transactions": snapshot["recent_transactions"],
+            "computed_at": snapshot["computed_at"],
             "timestamp": datetime.utcnow().isoformat()
         }), 200
         
@@ -963,26 +1076,22 @@ def get_admin_stats():
 def get_admin_users():
     """Get list of all users for admin"""
     try:
-        page = request.args.get("page", 1, type=int)
-        limit = request.args.get("limit", 20, type=int)
-        
-        # Validate inputs
-        if page < 1:
-            page = 1
-        if limit > 100:
-            limit = 100
-        if limit < 1:
-            limit = 20
+        cursor = request.args.get("cursor", None, type=str)
+        limit = clamp_limit(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int))
         
-        # Get users with pagination
-        query = User.query.order_by(User.created_at.desc())
-        total_count = query.count()
+        # Keyset page, newest first (total comes from the stat counters)
+        try:
+            users, next_cursor = keyset_page(
+                User.query, User.created_at, User.id, "created_at", "desc", limit, cursor
+            )
+        except ValueError as e:
+            return jsonify({"error": f"Invalid cursor: {str(e)}"}), 400
         
-        offset = (page - 1) * limit
-        users = query.offset(offset).limit(limit).all()
+        activity = _user_transaction_activity([user.id for user in users])
         
         user_list = []
         for user in users:
+            tx_count, last_activity = activity.get(user.id, (0, None))
             user_list.append({
                 "id": user.id,
                 "email": user.email,
@@ -990,17 +1099,18 @@ def get_admin_users():
                 "subscription_status": user.subscription_status,
                 "subscription_expires_at": user.subscription_expires_at.isoformat() if user.subscription_expires_at else None,
                 "wallet_address": user.wallet_address,
-                "transaction_count": len(user.transactions),
+                "transaction_count": tx_count,
+                "last_activity": last_activity.isoformat() if last_activity else None,
                 "created_at": user.created_at.isoformat()
             })
         
         return jsonify({
             "users": user_list,
             "pagination": {
-                "page": page,
                 "limit": limit,
-                "total": total_count,
-                "pages": (total_count + limit - 1) // limit
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                "total": count_users()
             }
         }), 200
         
@@ -1014,19 +1124,11 @@ def get_admin_users():
 def get_admin_transactions():
     """Get all transactions for admin"""
     try:
-        page = request.args.get("page", 1, type=int)
-        limit = request.args.get("limit", 20, type=int)
+        cursor = request.args.get("cursor", None, type=str)
+        limit = clamp_limit(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int))
         status_filter = request.args.get("status", None, type=str)
         type_filter = request.args.get("type", None, type=str)
         
-        # Validate inputs
-        if page < 1:
-            page = 1
-        if limit > 100:
-            limit = 100
-        if limit < 1:
-            limit = 20
-        
         # Build query
         query = Transaction.query
         
@@ -1035,10 +1137,13 @@ def get_admin_transactions():
         if type_filter:
             query = query.filter_by(type=type_filter)
         
-        total_count = query.count()
-        
-        # Get transactions with ordering
-        transactions = query.order_by(Transaction.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
+        # Keyset page, newest first (total comes from the stat counters)
+        try:
+            transactions, next_cursor = keyset_page(
+                query, Transaction.created_at, Transaction.id, "created_at", "desc", limit, cursor
+            )
+        except ValueError as e:
+            return jsonify({"error": f"Invalid cursor: {str(e)}"}), 400
         
         tx_list = []
         for tx in transactions:
@@ -1057,10 +1162,10 @@ def get_admin_transactions():
         return jsonify({
             "transactions": tx_list,
             "pagination": {
-                "page": page,
                 "limit": limit,
-                "total": total_count,
-                "pages": (total_count + limit - 1) // limit
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                "total": count_transactions(status_filter, type_filter)
             }
         }), 200
         
@@ -1073,65 +1178,31 @@ def get_admin_transactions():
 @app.get("/api/analytics/staking-trends")
 @login_required
 def get_staking_trends():
-    """Get staking activity trends over last 30 days"""
+    """
+    Daily staking activity from the rollup table (see staking_rollup.py)
+    Query params: from, to (ISO-8601 date/time or unix seconds, UTC days,
+    inclusive; default last 30 days)
+    """
     try:
-        from sqlalchemy import func, cast, Date
-        from datetime import datetime, timedelta
-        
-        # Get data from last 30 days
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        
-        # Query stakes by day
-        stake_by_day = db.session.query(
-            cast(Transaction.created_at, Date).label('date'),
-            func.count(Transaction.id).label('count'),
-            func.coalesce(func.sum(Transaction.amount), 0).label('volume')
-        ).filter(
-            Transaction.type == 'stake',
-            Transaction.created_at >= thirty_days_ago
-        ).group_by(
-            cast(Transaction.created_at, Date)
-        ).order_by(
-            cast(Transaction.created_at, Date).asc()
-        ).all()
-        
-        # Query unstakes by day
-        unstake_by_day = db.session.query(
-            cast(Transaction.created_at, Date).label('date'),
-            func.count(Transaction.id).label('count')
-        ).filter(
-            Transaction.type == 'unstake',
-            Transaction.created_at >= thirty_days_ago
-        ).group_by(
-            cast(Transaction.created_at, Date)
-        ).order_by(
-            cast(Transaction.created_at, Date).asc()
-        ).all()
-        
-        # Convert to dictionaries for JSON
-        stakes_dict = {str(row[0]): {'count': row[1], 'volume': float(row[2])} for row in stake_by_day}
-        unstakes_dict = {str(row[0]): {'count': row[1]} for row in unstake_by_day}
-        
-        # Build response with all days
-        trends = []
-        current_date = thirty_days_ago.date()
-        end_date = datetime.utcnow().date()
-        
-        while current_date <= end_date:
-            date_str = str(current_date)
-            trends.append({
-                "date": date_str,
-                "stakes": stakes_dict.get(date_str, {'count': 0, 'volume': 0}),
-                "unstakes": unstakes_dict.get(date_str, {'count': 0})
-            })
-            current_date += timedelta(days=1)
-        
+        end_day = _parse_time_arg(request.args.get("to"), datetime.utcnow()).date()
+        start_day = _parse_time_arg(request.args.get("from"), None)
+        start_day = start_day.date() if start_day else end_day - timedelta(days=30)
+        if start_day > end_day:
+            return jsonify({"error": "'from' must not be after 'to'"}), 400
+        if (end_day - start_day).days >= TRENDS_MAX_DAYS:
+            return jsonify({"error": f"Range is limited to {TRENDS_MAX_DAYS} days"}), 400
+        
+        default_range = not request.args.get("from") and not request.args.get("to")
         return jsonify({
-            "period": "last_30_days",
-            "trends": trends,
+            "period": "last_30_days" if default_range else "custom",
+            "from": start_day.isoformat(),
+            "to": end_day.isoformat(),
+            "trends": query_trends(start_day, end_day),
             "timestamp": datetime.utcnow().isoformat()
         }), 200
         
+    except ValueError as e:
+        return jsonify({"error": f"Invalid date range: {str(e)}"}), 400
     except Exception as e:
         print(f"Error getting staking trends: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -1143,25 +1214,34 @@ def get_user_activity():
     try:
         from datetime import datetime, timedelta
         
-        # Users by activity level (stakes + unstakes)
-        user_activity = db.session.query(
-            User.id,
-            User.email,
-            func.count(Transaction.id).label('transaction_count')
-        ).outerjoin(
-            Transaction, User.id == Transaction.user_id
+        # Users by activity level (stakes + unstakes): aggregate transactions
+        # per user first, then join only the top 20 users
+        activity = db.session.query(
+            Transaction.user_id.label('user_id'),
+            func.count(Transaction.id).label('transaction_count'),
+            func.max(Transaction.created_at).label('last_seen')
+        ).filter(
+            Transaction.user_id.isnot(None)
         ).group_by(
-            User.id, User.email
+            Transaction.user_id
         ).order_by(
             func.count(Transaction.id).desc()
-        ).limit(20).all()
+        ).limit(20).subquery()
+        
+        user_activity = db.session.query(
+            User.email, activity.c.transaction_count, activity.c.last_seen
+        ).join(
+            activity, activity.c.user_id == User.id
+        ).order_by(
+            activity.c.transaction_count.desc()
+        ).all()
         
         activity_list = []
-        for user_id, email, tx_count in user_activity:
+        for email, tx_count, last_seen in user_activity:
             activity_list.append({
                 "email": email,
                 "transaction_count": tx_count,
-                "last_seen": "N/A"  # Could be enhanced with last activity timestamp
+                "last_seen": last_seen.isoformat() if last_seen else "N/A"
             })
         
         # Overall stats
@@ -1184,27 +1264,24 @@ def get_user_activity():
 @app.get("/api/analytics/distribution")
 @login_required
 def get_rewards_distribution():
-    """Get transaction type distribution and status breakdown"""
+    """Get transaction type distribution and status breakdown (shared cached snapshot)"""
     try:
+        tx_stats = get_admin_stats_provider().get()["transactions"]
+        
         # Transaction type distribution
-        stake_count = Transaction.query.filter_by(type='stake').count() or 0
-        unstake_count = Transaction.query.filter_by(type='unstake').count() or 0
+        stake_count = tx_stats["by_type"]["stake"]
+        unstake_count = tx_stats["by_type"]["unstake"]
         
         total_tx = stake_count + unstake_count or 1  # Avoid division by zero
         
         # Status distribution
-        pending_count = Transaction.query.filter_by(status='pending').count() or 0
-        confirmed_count = Transaction.query.filter_by(status='confirmed').count() or 0
-        failed_count = Transaction.query.filter_by(status='failed').count() or 0
+        pending_count = tx_stats["by_status"]["pending"]
+        confirmed_count = tx_stats["by_status"]["confirmed"]
+        failed_count = tx_stats["by_status"]["failed"]
         
         # Volume by type
-        stake_volume = db.session.query(
-            db.func.coalesce(db.func.sum(Transaction.amount), 0)
-        ).filter(Transaction.type == 'stake').scalar() or 0
-        
-        unstake_volume = db.session.query(
-            db.func.coalesce(db.func.sum(Transaction.amount), 0)
-        ).filter(Transaction.type == 'unstake').scalar() or 0
+        stake_volume = tx_stats["volume_by_type"]["stake"]
+        unstake_volume = tx_stats["volume_by_type"]["unstake"]
         
         return jsonify({
             "transaction_types": {
@@ -1453,37 +1530,26 @@ def index_html():
 
 
 # --- Init DB & Scheduler ---
-with app.app_context():
-    try:
-        with db.engine.connect() as conn:
-            conn.execute(db.text("CREATE SCHEMA IF NOT EXISTS ton_pool"))
-            conn.commit()
-        db.create_all()
-        print("✅ Database schema 'ton_pool' ready")
-    except Exception as e:
-        print(f"⚠️  Database setup: {e}")
-    
-    # 🔍 Worker Detection: Validate single worker configuration
-    # Gunicorn should only run 1 worker to prevent duplicate APScheduler runs
-    import sys
-    gunicorn_workers = None
-    for arg in sys.argv:
-        if '--workers' in arg or arg.isdigit():
-            if '--workers' in str(sys.argv):
-                idx = list(sys.argv).index('--workers')
-                if idx + 1 < len(sys.argv):
-                    gunicorn_workers = sys.argv[idx + 1]
-    
-    if gunicorn_workers and gunicorn_workers != '1':
-        print(f"⚠️  WARNING: Gunicorn configured with {gunicorn_workers} workers!")
-        print(f"   This may cause duplicate APScheduler runs. Check Procfile/render.yaml")
-    
-    # Initialize background transaction monitoring (runs in single worker only)
+ensure_schema(app)
+
+# Background jobs run in worker.py by default; WEB_RUN_SCHEDULER=1 runs them
+# here instead (single-service deploys). Either way only the elected leader
+# among all processes runs the scheduler (see leader_election.py).
+if WEB_RUN_SCHEDULER:
     try:
-        init_scheduler(app)
-        print("✅ Transaction monitor scheduler initialized (verified single worker)")
+        SCHEDULER_ELECTOR.start(app, on_elected=lambda: init_scheduler(app), on_demoted=stop_scheduler)
+        atexit.register(SCHEDULER_ELECTOR.resign)
+        print("✅ Scheduler leader election started (in web process)")
     except Exception as e:
         print(f"⚠️  Scheduler setup: {e}")
+else:
+    # Nothing here notices if the worker service is missing: say so loudly at
+    # startup; the pool-stats reader warns again while no fresh rows appear
+    print("⚠️  ==============================================================")
+    print("⚠️  Scheduler disabled in web process (WEB_RUN_SCHEDULER=0).")
+    print("⚠️  Transaction monitor, pool stats and emails run ONLY in worker.py;")
+    print("⚠️  without a running worker nothing is confirmed and no email is sent.")
+    print("⚠️  ==============================================================")
 
 # --- Main ----
 if __name__ == "__main__":
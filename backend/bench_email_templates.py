@@ -0,0 +1,83 @@
+# backend/bench_email_templates.py
+"""
+Micro-benchmark: email template render throughput per template
+For every notification kind it times a full render (subject + HTML + text)
+three ways:
+- cached:   get_template(kind).render(values) (what EmailService does)
+- reload:   load_template(kind).render(values) (read + compile every time)
+- replace:  str.replace() of each {{ placeholder }} on the raw sources
+
+Usage:
+    python bench_email_templates.py [--seconds 0.5]
+"""
+import os
+import time
+import argparse
+import timeit
+
+from email_service import EMAIL_KINDS
+from email_templates import EMAIL_TEMPLATE_DIR, get_template, load_template
+
+SAMPLE_VALUES = {
+    "name": "alice",
+    "amount": 123.45,
+    "tx_hash": "4f1c9a0d7e2b" * 6,
+    "tx_hash_short": ("4f1c9a0d7e2b" * 6)[:20],
+    "lock_days": 7,
+    "icon": "💎",
+    "action": "Stake",
+    "action_lower": "stake",
+}
+
+
+def raw_sources(kind: str):
+    """Subject / HTML / text sources with {{ }} placeholders, as on disk"""
+    with open(os.path.join(EMAIL_TEMPLATE_DIR, f"{kind}.html"), encoding="utf-8") as f:
+        html_source = f.read()
+    with open(os.path.join(EMAIL_TEMPLATE_DIR, f"{kind}.txt"), encoding="utf-8") as f:
+        subject, _, text_source = f.read().partition("\n")
+    return subject[len("Subject:"):].strip(), html_source, text_source.lstrip("\n")
+
+
+def replace_render(sources, values):
+    """Baseline: one pass over the text per placeholder"""
+    rendered = []
+    for source in sources:
+        for key, value in values.items():
+            source = source.replace("{{ " + key + " }}", str(value))
+        rendered.append(source)
+    return rendered
+
+
+def rate(func, seconds: float):
+    """Calls per second of func over about the given time"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    runs = max(1, int(seconds / max(timer.timeit(number) / number, 1e-9)))
+    elapsed = min(timer.repeat(repeat=3, number=runs))
+    return runs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=0.5, help="Approximate time per measurement")
+    args = parser.parse_args()
+
+    print(f"{'template':<24}{'size':>8}{'cached/s':>12}{'reload/s':>12}{'replace/s':>12}{'µs/render':>11}")
+    started = time.perf_counter()
+    for kind in EMAIL_KINDS:
+        template = get_template(kind)
+        sources = raw_sources(kind)
+        values = {key: SAMPLE_VALUES[key] for key in template.fields}
+        assert list(template.render(values)) == replace_render(sources, values)
+
+        cached = rate(lambda: get_template(kind).render(values), args.seconds)
+        reload = rate(lambda: load_template(kind).render(values), args.seconds)
+        replace = rate(lambda: replace_render(sources, values), args.seconds)
+        size = sum(len(part) for part in template.render(values))
+        print(f"{kind:<24}{size:>8}{cached:>12,.0f}{reload:>12,.0f}{replace:>12,.0f}{1e6 / cached:>11.2f}")
+    print(f"⏱️  {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
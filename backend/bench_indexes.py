@@ -0,0 +1,155 @@
+# backend/bench_indexes.py
+"""
+Benchmark: transaction query plans before / after migrate_indexes.py
+Seeds a synthetic ton_pool_bench.transactions table (PostgreSQL), runs the
+queries behind each endpoint with EXPLAIN ANALYZE on the original indexes
+(user_id, tx_hash, created_at), adds the composite / partial indexes and
+runs them again.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python bench_indexes.py [--rows 1000000] [--keep]
+Never point it at production: the schema is dropped and recreated.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from dotenv import load_dotenv
+
+from migrate_indexes import create_transaction_indexes
+
+load_dotenv()
+
+SCHEMA = "ton_pool_bench"
+
+# Power user = user 1 (about 5% of all rows); regular user = user 500
+QUERIES = {
+    "history (power user, newest first)": f"""
+        SELECT * FROM {SCHEMA}.transactions WHERE user_id = 1
+        ORDER BY created_at DESC, id DESC LIMIT 21""",
+    "history (power user, status filter)": f"""
+        SELECT * FROM {SCHEMA}.transactions WHERE user_id = 1 AND status = 'confirmed'
+        ORDER BY created_at DESC, id DESC LIMIT 21""",
+    "history (regular user)": f"""
+        SELECT * FROM {SCHEMA}.transactions WHERE user_id = 500
+        ORDER BY created_at DESC, id DESC LIMIT 21""",
+    "monitor (pending batch)": f"""
+        SELECT * FROM {SCHEMA}.transactions WHERE status = 'pending' AND id > 0
+        ORDER BY id ASC LIMIT 200""",
+    "withdrawal locks (power user)": f"""
+        SELECT * FROM {SCHEMA}.transactions WHERE user_id = 1 AND is_locked""",
+    "analytics (stakes by day, 30 days)": f"""
+        SELECT cast(created_at AS date), count(id), coalesce(sum(amount), 0)
+        FROM {SCHEMA}.transactions
+        WHERE type = 'stake' AND created_at >= now() - interval '30 days'
+        GROUP BY cast(created_at AS date)""",
+}
+
+
+def seed(cur, rows: int, users: int):
+    print(f"🌱 Seeding {rows:,} transactions for {users:,} users...")
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    cur.execute(f"""
+        CREATE TABLE {SCHEMA}.transactions (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER,
+            tx_hash VARCHAR(200) NOT NULL UNIQUE,
+            type VARCHAR(20) NOT NULL,
+            amount DOUBLE PRECISION DEFAULT 0,
+            status VARCHAR(20) DEFAULT 'pending',
+            sender_address VARCHAR(128),
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            is_locked BOOLEAN DEFAULT FALSE,
+            lock_duration INTEGER DEFAULT 0,
+            withdrawal_available_at TIMESTAMP
+        )""")
+    # Original indexes (index=True / unique=True in models.py)
+    cur.execute(f"CREATE INDEX ix_bench_user_id ON {SCHEMA}.transactions (user_id)")
+    cur.execute(f"CREATE INDEX ix_bench_created_at ON {SCHEMA}.transactions (created_at)")
+    started = time.monotonic()
+    cur.execute(f"""
+        INSERT INTO {SCHEMA}.transactions
+            (user_id, tx_hash, type, amount, status, created_at, updated_at, is_locked)
+        SELECT
+            CASE WHEN random() < 0.05 THEN 1 ELSE 2 + (random() * %(users)s)::int END,
+            md5(t.g::text),
+            t.type,
+            round((random() * 100)::numeric, 2),
+            CASE WHEN random() < 0.01 THEN 'pending' WHEN random() < 0.03 THEN 'failed' ELSE 'confirmed' END,
+            t.created_at,
+            t.created_at,
+            t.type = 'unstake' AND t.created_at > now() - interval '7 days'
+        FROM (
+            SELECT g,
+                   CASE WHEN random() < 0.7 THEN 'stake' ELSE 'unstake' END AS type,
+                   now() - random() * interval '730 days' AS created_at
+            FROM generate_series(1, %(rows)s) AS g
+        ) AS t""", {"rows": rows, "users": users})
+    cur.execute(f"ANALYZE {SCHEMA}.transactions")
+    print(f"   done in {time.monotonic() - started:.1f}s")
+
+
+def run_queries(cur, repeat: int) -> dict:
+    results = {}
+    for label, sql in QUERIES.items():
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql)
+        plan = "\n".join(row[0] for row in cur.fetchall())
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cur.execute(sql)
+            cur.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[label] = {"plan": plan, "ms": statistics.median(timings)}
+    return results
+
+
+def print_plans(title: str, results: dict):
+    print(f"\n{'=' * 70}\n{title}\n{'=' * 70}")
+    for label, result in results.items():
+        print(f"\n--- {label} (median {result['ms']:.2f} ms)\n{result['plan']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="Keep the bench schema afterwards")
+    args = parser.parse_args()
+
+    database_url = os.getenv("BENCH_DATABASE_URL", "").replace("postgres://", "postgresql://")
+    if not database_url:
+        print("❌ Set BENCH_DATABASE_URL (a scratch PostgreSQL database)")
+        sys.exit(1)
+
+    import psycopg2
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        seed(cur, args.rows, args.users)
+        before = run_queries(cur, args.repeat)
+        print_plans("BEFORE (user_id, created_at single-column indexes)", before)
+
+        print("\n🔧 Creating composite / partial indexes...")
+        create_transaction_indexes(conn, schema=SCHEMA)
+        after = run_queries(cur, args.repeat)
+        print_plans("AFTER (migrate_indexes.py)", after)
+
+        print(f"\n{'query':<40} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for label in QUERIES:
+            b, a = before[label]["ms"], after[label]["ms"]
+            print(f"{label:<40} {b:>10.2f} {a:>10.2f} {b / a if a else 0:>7.1f}x")
+    finally:
+        if not args.keep:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,9 @@ with engine.connect() as conn:
     print("✅ Schema 'ton_pool' created/verified")
 END
 
+echo "🧱 Adding new transaction columns (idempotent, before the new code starts)..."
+python migrate_transaction_columns.py
+
 echo "🔄 Initializing Flask-Migrate..."
 export FLASK_APP=app.py
 
@@ -0,0 +1,49 @@
+# backend/db_config.py
+"""
+Database configuration shared by the web app (app.py) and the
+background worker (worker.py)
+"""
+
+import os
+from dotenv import load_dotenv
+
+from models import db
+
+load_dotenv()
+
+
+def database_uri() -> str:
+    """SQLAlchemy URI from DATABASE_URL (Render Postgres needs sslmode), SQLite locally"""
+    database_url = os.getenv("DATABASE_URL", "").strip()
+    if not database_url:
+        return "sqlite:///ton_pool.db"
+    db_uri = database_url.replace("postgres://", "postgresql://", 1)
+    if "postgresql://" in db_uri and "sslmode" not in db_uri:
+        separator = "&" if "?" in db_uri else "?"
+        db_uri += f"{separator}sslmode=require"
+    return db_uri
+
+
+def configure_database(app):
+    """Apply DB settings to a Flask app and bind Flask-SQLAlchemy"""
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith("sqlite"):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_pre_ping': True,
+            'pool_recycle': 300,
+        }
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+
+def ensure_schema(app):
+    """Create the ton_pool schema and missing tables (idempotent)"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(db.text("CREATE SCHEMA IF NOT EXISTS ton_pool"))
+                conn.commit()
+            db.create_all()
+            print("✅ Database schema 'ton_pool' ready")
+        except Exception as e:
+            print(f"⚠️  Database setup: {e}")
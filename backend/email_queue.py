@@ -0,0 +1,214 @@
+# backend/email_queue.py
+"""
+Durable email queue (transactional outbox)
+- enqueue_email() adds an EmailOutbox row to the caller's DB session, so the
+  email is committed together with the transaction / status change
+- The dispatcher job claims due rows in batches (FOR UPDATE SKIP LOCKED on
+  PostgreSQL), sends them outside any DB transaction and records the result
+- Claimed rows of the same template go out as one SendGrid request
+  (EmailService.deliver_batch); a request rejected as a whole with a
+  permanent error is retried recipient by recipient to isolate the bad one
+- Failures are retried with exponential backoff + jitter; after
+  EMAIL_MAX_ATTEMPTS or a permanent error the row is dead-lettered
+  (status 'dead', kept with last_error for inspection)
+"""
+
+import os
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import and_, or_, update
+
+from models import db, EmailOutbox
+from email_service import EMAIL_KINDS, EMAIL_SEND_BATCH_SIZE, EmailDeliveryError, get_email_service
+
+load_dotenv()
+
+EMAIL_DISPATCH_INTERVAL_SECONDS = int(os.getenv("EMAIL_DISPATCH_INTERVAL_SECONDS", "10"))
+EMAIL_DISPATCH_BATCH = int(os.getenv("EMAIL_DISPATCH_BATCH", "500"))
+EMAIL_DISPATCH_MAX_BATCHES = int(os.getenv("EMAIL_DISPATCH_MAX_BATCHES", "5"))  # Per tick
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+EMAIL_CLAIM_SECONDS = int(os.getenv("EMAIL_CLAIM_SECONDS", "300"))  # 'sending' rows are retried after this
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", "30"))  # Sent rows only
+
+
+def enqueue_email(kind: str, to_email: str, to_name: Optional[str] = None, **params) -> Optional[EmailOutbox]:
+    """
+    Queue a notification in the current DB session (the caller commits)
+
+    Args:
+        kind: One of email_service.EMAIL_KINDS
+        to_email: Recipient address (nothing is queued if empty)
+        to_name: Recipient name (default: email prefix)
+        **params: Arguments of EmailService.compose_<kind>()
+
+    Returns:
+        The added row, or None if there is no recipient
+    """
+    if kind not in EMAIL_KINDS:
+        raise ValueError(f"Unknown email kind: {kind}")
+    if not to_email:
+        return None
+    row = EmailOutbox(
+        kind=kind,
+        to_email=to_email,
+        to_name=to_name or to_email.split('@')[0],
+        payload=json.dumps(params, default=str),
+        status='pending',
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.session.add(row)
+    return row
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before attempt number attempts + 1 (exponential, capped, ±20% jitter)"""
+    delay = min(EMAIL_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), EMAIL_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_batch(limit: int = EMAIL_DISPATCH_BATCH, now: Optional[datetime] = None) -> List[Dict]:
+    """
+    Claim due rows (pending, or 'sending' past their claim) and commit the claim
+
+    Returns:
+        Plain dicts of the claimed rows (usable after the commit)
+    """
+    now = now or datetime.utcnow()
+    rows = EmailOutbox.query.filter(or_(
+        and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+        and_(EmailOutbox.status == 'sending', EmailOutbox.locked_until < now)
+    )).order_by(EmailOutbox.next_attempt_at.asc()).limit(limit).with_for_update(skip_locked=True).all()
+
+    claimed = []
+    for row in rows:
+        row.status = 'sending'
+        row.locked_until = now + timedelta(seconds=EMAIL_CLAIM_SECONDS)
+        claimed.append({
+            "id": row.id,
+            "kind": row.kind,
+            "to_email": row.to_email,
+            "to_name": row.to_name,
+            "payload": row.payload,
+            "attempts": row.attempts,
+        })
+    db.session.commit()
+    return claimed
+
+
+def _deliver_group(service, kind: str, shared, group: List, sent_ids: List, failures: List):
+    """Send a group of same-template jobs as one request, recording sent ids / failures"""
+    try:
+        service.deliver_batch(kind, [(job["to_email"], job["to_name"], values) for job, values in group], shared)
+        sent_ids.extend(job["id"] for job, _ in group)
+        return
+    except EmailDeliveryError as e:
+        error, retryable = str(e), e.retryable
+    except (ValueError, TypeError) as e:
+        error, retryable = f"Bad payload: {str(e)}", False
+    except Exception as e:
+        error, retryable = str(e), True
+
+    if not retryable and len(group) > 1:
+        # One bad address rejects the whole request: send one by one so only it fails
+        for item in group:
+            _deliver_group(service, kind, shared, [item], sent_ids, failures)
+        return
+    failures.extend((job, error, retryable) for job, _ in group)
+
+
+def dispatch_batch(service=None, limit: int = EMAIL_DISPATCH_BATCH) -> Dict[str, int]:
+    """
+    Send one batch of due emails and record the results
+
+    Returns:
+        Dict with claimed, sent, retried, dead counts
+    """
+    service = service or get_email_service()
+    result = {"claimed": 0, "sent": 0, "retried": 0, "dead": 0}
+    if not service.is_configured():
+        return result  # Rows stay queued until SendGrid is configured
+
+    jobs = claim_batch(limit)
+    result["claimed"] = len(jobs)
+    sent_ids = []
+    failures = []  # (job, error, retryable)
+    groups = {}  # (kind, batch_key) -> [(job, substitutions)]
+    for job in jobs:
+        try:
+            params = json.loads(job["payload"] or "{}")
+            values = service.substitutions(job["kind"], job["to_name"], params)
+            groups.setdefault((job["kind"], service.batch_key(job["kind"], params)), []).append((job, values))
+        except (ValueError, TypeError) as e:
+            failures.append((job, f"Bad payload: {str(e)}", False))  # Retrying cannot fix it
+
+    for (kind, shared), group in groups.items():
+        for start in range(0, len(group), EMAIL_SEND_BATCH_SIZE):
+            _deliver_group(service, kind, shared, group[start:start + EMAIL_SEND_BATCH_SIZE], sent_ids, failures)
+
+    now = datetime.utcnow()
+    if sent_ids:
+        db.session.execute(
+            update(EmailOutbox).where(EmailOutbox.id.in_(sent_ids)).values(
+                status='sent', sent_at=now, locked_until=None,
+                attempts=EmailOutbox.attempts + 1, last_error=None
+            )
+        )
+        result["sent"] = len(sent_ids)
+    for job, error, retryable in failures:
+        attempts = job["attempts"] + 1
+        dead = not retryable or attempts >= EMAIL_MAX_ATTEMPTS
+        db.session.execute(
+            update(EmailOutbox).where(EmailOutbox.id == job["id"]).values(
+                status='dead' if dead else 'pending',
+                attempts=attempts,
+                next_attempt_at=now + timedelta(seconds=retry_delay(attempts)),
+                locked_until=None,
+                last_error=error[:1000]
+            )
+        )
+        result["dead" if dead else "retried"] += 1
+        if dead:
+            print(f"  ☠️  Email #{job['id']} ({job['kind']}) to {job['to_email']} dead-lettered: {error}")
+    db.session.commit()
+    return result
+
+
+def dispatch_email_outbox():
+    """Scheduler job: drain due emails in batches (needs app context)"""
+    try:
+        totals = {"claimed": 0, "sent": 0, "retried": 0, "dead": 0}
+        for _ in range(EMAIL_DISPATCH_MAX_BATCHES):
+            result = dispatch_batch()
+            for key, value in result.items():
+                totals[key] += value
+            if result["claimed"] < EMAIL_DISPATCH_BATCH:
+                break
+        if totals["claimed"]:
+            print(f"📧 Email outbox: sent {totals['sent']}, retry {totals['retried']}, dead {totals['dead']}")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error dispatching emails: {str(e)}")
+
+
+def prune_email_outbox(now: Optional[datetime] = None) -> int:
+    """Delete sent rows older than the retention window (dead letters are kept)"""
+    if EMAIL_OUTBOX_RETENTION_DAYS <= 0:
+        return 0
+    cutoff = (now or datetime.utcnow()) - timedelta(days=EMAIL_OUTBOX_RETENTION_DAYS)
+    try:
+        deleted = EmailOutbox.query.filter(
+            EmailOutbox.status == 'sent',
+            EmailOutbox.created_at < cutoff
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error pruning email outbox: {str(e)}")
+        return 0
@@ -2,16 +2,54 @@
 """
 Email notification service using SendGrid API
 Sends email alerts for stake/unstake transactions and rewards
+- Batch mode: notifications of one kind share a template with -token-
+  placeholders and go out as one request with up to
+  SENDGRID_MAX_PERSONALIZATIONS personalizations (one per recipient,
+  each with its own substitutions)
+- Message bodies come from precompiled templates (email_templates.py);
+  batch templates are rendered once per (kind, batch key) and reused
 """
 
 import os
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content, Personalization
+from sendgrid.helpers.mail import Mail, Email, To, Content, Personalization, Substitution
 from dotenv import load_dotenv
 
+from email_templates import get_template
+
 load_dotenv()
 
+# Notification kinds: compose_<kind>() builds the message (see email_queue.py)
+EMAIL_KINDS = ("stake_confirmation", "unstake_confirmation", "transaction_confirmed", "withdrawal_ready")
+
+# Per-recipient params of each kind (sent as substitutions in batch mode).
+# Other params (tx_type) change the template itself: batches are grouped by them.
+BATCH_SUBSTITUTIONS = {
+    "stake_confirmation": ("amount", "tx_hash"),
+    "unstake_confirmation": ("tx_hash", "lock_days"),
+    "transaction_confirmed": ("amount", "tx_hash"),
+    "withdrawal_ready": ("amount", "tx_hash"),
+}
+
+SENDGRID_MAX_PERSONALIZATIONS = 1000  # API limit per /v3/mail/send request
+EMAIL_SEND_BATCH_SIZE = max(1, min(int(os.getenv("EMAIL_SEND_BATCH_SIZE", "1000")), SENDGRID_MAX_PERSONALIZATIONS))
+SENDGRID_API_HOST = os.getenv("SENDGRID_API_HOST", "https://api.sendgrid.com")  # e.g. fake_sendgrid.py
+
+
+def substitution_token(param: str) -> str:
+    """Placeholder for a per-recipient value in batch templates"""
+    return f"-{param}-"
+
+
+class EmailDeliveryError(Exception):
+    """Email was not accepted by SendGrid"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
 class EmailService:
     """Send emails via SendGrid"""
     
@@ -20,12 +58,57 @@ class EmailService:
         self.api_key = os.getenv("SENDGRID_API_KEY", "")
         self.from_email = os.getenv("EMAIL_FROM", "noreply@tonstakingpool.io")
         self.from_name = os.getenv("EMAIL_FROM_NAME", "TON Staking Pool")
-        self.client = SendGridAPIClient(self.api_key) if self.api_key else None
+        self.client = SendGridAPIClient(self.api_key, host=SENDGRID_API_HOST) if self.api_key else None
+        self._batch_templates: Dict[Tuple, Tuple[str, str, str]] = {}  # (kind, batch_key) -> rendered template
+        self._stats = {"requests": 0, "emails": 0, "batch_requests": 0, "failed_requests": 0}
         
     def is_configured(self) -> bool:
         """Check if SendGrid is properly configured"""
         return bool(self.api_key and self.client)
     
+    def _send(self, message: Mail, recipients: int):
+        """POST one message, raising EmailDeliveryError on failure"""
+        self._stats["requests"] += 1
+        try:
+            response = self.client.send(message)
+        except Exception as e:
+            self._stats["failed_requests"] += 1
+            status = getattr(e, "status_code", None)
+            # 4xx (except 429) = bad request / address, retrying will not help
+            retryable = status is None or status == 429 or status >= 500
+            raise EmailDeliveryError(str(e), retryable=retryable)
+        
+        if response.status_code not in [200, 201, 202]:
+            self._stats["failed_requests"] += 1
+            raise EmailDeliveryError(f"SendGrid returned {response.status_code}", retryable=response.status_code >= 500)
+        self._stats["emails"] += recipients
+    
+    def deliver(
+        self,
+        to_email: str,
+        to_name: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None
+    ):
+        """
+        Send email via SendGrid, raising on failure (used by the email queue)
+        
+        Raises:
+            EmailDeliveryError: Not configured, rejected or transport error
+        """
+        if not self.is_configured():
+            raise EmailDeliveryError("SendGrid not configured", retryable=False)
+        
+        message = Mail(
+            from_email=Email(self.from_email, self.from_name),
+            to_emails=To(to_email, to_name),
+            subject=subject,
+            plain_text_content=text_content or "N/A",
+            html_content=html_content
+        )
+        self._send(message, 1)
+    
     def send_email(
         self,
         to_email: str,
@@ -52,180 +135,200 @@ class EmailService:
             return False
         
         try:
-            message = Mail(
-                from_email=Email(self.from_email, self.from_name),
-                to_emails=To(to_email, to_name),
-                subject=subject,
-                plain_text_content=text_content or "N/A",
-                html_content=html_content
-            )
-            
-            response = self.client.send(message)
-            
-            if response.status_code in [200, 201, 202]:
-                print(f"✅ Email sent to {to_email}")
-                return True
-            else:
-                print(f"⚠️  Failed to send email to {to_email}: {response.status_code}")
-                return False
-                
-        except Exception as e:
+            self.deliver(to_email, to_name, subject, html_content, text_content)
+            print(f"✅ Email sent to {to_email}")
+            return True
+        except EmailDeliveryError as e:
             print(f"❌ Error sending email to {to_email}: {str(e)}")
             return False
     
-    def send_stake_confirmation(self, email: str, name: str, amount: float, tx_hash: str) -> bool:
-        """Send stake confirmation email"""
-        subject = f"✅ TON Staking Pool - Stake Confirmation ({amount} TON)"
+    def batch_key(self, kind: str, params: Dict) -> Tuple:
+        """Template-shaping params of a notification (same key = same batch template)"""
+        if kind not in EMAIL_KINDS:
+            raise ValueError(f"Unknown email kind: {kind}")
+        substituted = BATCH_SUBSTITUTIONS[kind]
+        return tuple(sorted((key, str(value)) for key, value in params.items() if key not in substituted))
+    
+    def substitutions(self, kind: str, name: str, params: Dict) -> Dict[str, str]:
+        """
+        Per-recipient substitutions for a batch template
         
-        html_content = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; border-radius: 10px;">
-                    <h1 style="color: #2563eb; text-align: center;">💎 Stake Successful</h1>
-                    
-                    <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                        <p>Hi <strong>{name}</strong>,</p>
-                        
-                        <p>Your stake transaction has been recorded on the TON Staking Pool.</p>
-                        
-                        <div style="background: #f0f9ff; padding: 15px; border-left: 4px solid #2563eb; margin: 15px 0;">
-                            <p><strong>Transaction Details:</strong></p>
-                            <p>Amount: <strong>{amount} TON</strong></p>
-                            <p>Status: <strong>⏳ Pending Confirmation</strong></p>
-                            <p>Transaction Hash: <code style="background: #e5e7eb; padding: 5px; border-radius: 3px;">{tx_hash[:20]}...</code></p>
-                        </div>
-                        
-                        <p>Your stake will be confirmed once the transaction is processed on the blockchain (usually within a few minutes).</p>
-                        
-                        <p>You can track your transaction on <a href="https://tonscan.org/tx/{tx_hash}" style="color: #2563eb; text-decoration: none;">TonScan</a>.</p>
-                        
-                        <p style="margin-top: 20px; color: #666; font-size: 12px;">
-                            This is an automated message. Please do not reply to this email.
-                        </p>
-                    </div>
-                </div>
-            </body>
-        </html>
+        Raises:
+            ValueError / TypeError: Unknown kind or missing parameter
         """
+        if kind not in EMAIL_KINDS:
+            raise ValueError(f"Unknown email kind: {kind}")
+        values = {"name": name}
+        for key in BATCH_SUBSTITUTIONS[kind]:
+            if key in params:
+                values[key] = str(params[key])
+        if kind == "unstake_confirmation":
+            values.setdefault("lock_days", "7")  # Same default as compose_unstake_confirmation()
+        missing = [key for key in BATCH_SUBSTITUTIONS[kind] if key not in values]
+        if missing:
+            raise TypeError(f"{kind} is missing parameters: {', '.join(missing)}")
+        values["tx_hash_short"] = values["tx_hash"][:20]
+        return {substitution_token(key): value for key, value in values.items()}
+    
+    def compose_batch_template(self, kind: str, shared: Tuple = ()):
+        """
+        Build (subject, html_content, text_content) with -token- placeholders
+        for every per-recipient value (rendered once, then cached)
         
-        return self.send_email(email, name, subject, html_content)
+        Args:
+            kind: One of EMAIL_KINDS
+            shared: batch_key() of the notifications in the batch
+        """
+        cached = self._batch_templates.get((kind, shared))
+        if cached is not None:
+            return cached
+        params = {key: substitution_token(key) for key in BATCH_SUBSTITUTIONS[kind]}
+        params.update(dict(shared))
+        params["tx_hash_short"] = substitution_token("tx_hash_short")
+        rendered = self.compose(kind, substitution_token("name"), params)
+        if len(self._batch_templates) >= 256:
+            self._batch_templates.clear()  # Batch keys are few (tx_type); bound it anyway
+        self._batch_templates[(kind, shared)] = rendered
+        return rendered
     
-    def send_unstake_confirmation(self, email: str, name: str, tx_hash: str, lock_days: int = 7) -> bool:
-        """Send unstake confirmation email with withdrawal lock info"""
-        subject = f"📤 TON Staking Pool - Unstake Initiated (Locked for {lock_days} days)"
+    def deliver_batch(self, kind: str, recipients: List[Tuple[str, str, Dict[str, str]]], shared: Tuple = ()):
+        """
+        Send one notification kind to many recipients in a single request
         
-        html_content = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; border-radius: 10px;">
-                    <h1 style="color: #ea580c; text-align: center;">📤 Unstake Initiated</h1>
-                    
-                    <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                        <p>Hi <strong>{name}</strong>,</p>
-                        
-                        <p>Your unstake request has been submitted to the TON Staking Pool.</p>
-                        
-                        <div style="background: #fff7ed; padding: 15px; border-left: 4px solid #ea580c; margin: 15px 0;">
-                            <p><strong>⏱️ Withdrawal Lock Notice:</strong></p>
-                            <p>Your funds will be locked for <strong>{lock_days} days</strong> for processing and security.</p>
-                            <p>Transaction Hash: <code style="background: #e5e7eb; padding: 5px; border-radius: 3px;">{tx_hash[:20]}...</code></p>
-                        </div>
-                        
-                        <p><strong>What happens next:</strong></p>
-                        <ol>
-                            <li>Your transaction is processed on the blockchain</li>
-                            <li>Funds are locked for {lock_days} days</li>
-                            <li>After the lock period, you can claim your withdrawn TON</li>
-                            <li>We'll send you an email when funds are ready to withdraw</li>
-                        </ol>
-                        
-                        <p>You can track your transaction on <a href="https://tonscan.org/tx/{tx_hash}" style="color: #ea580c; text-decoration: none;">TonScan</a>.</p>
-                        
-                        <p style="margin-top: 20px; color: #666; font-size: 12px;">
-                            This is an automated message. Please do not reply to this email.
-                        </p>
-                    </div>
-                </div>
-            </body>
-        </html>
+        Args:
+            kind: One of EMAIL_KINDS
+            recipients: (to_email, to_name, substitutions()) tuples, at most
+                SENDGRID_MAX_PERSONALIZATIONS
+            shared: batch_key() common to all recipients
+            
+        Raises:
+            EmailDeliveryError: Not configured, rejected or transport error
+                (the request is accepted or rejected as a whole)
         """
+        if not self.is_configured():
+            raise EmailDeliveryError("SendGrid not configured", retryable=False)
+        if not recipients:
+            return
+        if len(recipients) > SENDGRID_MAX_PERSONALIZATIONS:
+            raise ValueError(f"At most {SENDGRID_MAX_PERSONALIZATIONS} recipients per request")
         
-        return self.send_email(email, name, subject, html_content)
+        subject, html_content, text_content = self.compose_batch_template(kind, shared)
+        message = Mail(
+            from_email=Email(self.from_email, self.from_name),
+            subject=subject,
+            plain_text_content=text_content,
+            html_content=html_content
+        )
+        for to_email, to_name, values in recipients:
+            personalization = Personalization()
+            personalization.add_to(To(to_email, to_name))
+            for token, value in values.items():
+                personalization.add_substitution(Substitution(token, value))
+            message.add_personalization(personalization)
+        self._stats["batch_requests"] += 1
+        self._send(message, len(recipients))
     
-    def send_transaction_confirmed(self, email: str, name: str, amount: float, tx_hash: str, tx_type: str) -> bool:
-        """Send transaction confirmation email"""
-        is_stake = tx_type == "stake"
-        icon = "💎" if is_stake else "💸"
-        action = "Stake" if is_stake else "Unstake"
+    def send_batch(self, kind: str, recipients: List[Tuple[str, str, Dict]]) -> int:
+        """
+        Send notifications of one kind with as few requests as possible
+        
+        Args:
+            kind: One of EMAIL_KINDS
+            recipients: (to_email, to_name, params) tuples, params as for compose_<kind>()
+            
+        Returns:
+            Number of emails accepted by SendGrid
+        """
+        if not self.is_configured():
+            print(f"⚠️  SendGrid not configured, skipping {len(recipients)} emails")
+            return 0
         
-        subject = f"✅ {icon} TON Staking Pool - {action} Confirmed"
+        groups: Dict[Tuple, List] = {}
+        for to_email, to_name, params in recipients:
+            try:
+                groups.setdefault(self.batch_key(kind, params), []).append(
+                    (to_email, to_name, self.substitutions(kind, to_name, params))
+                )
+            except (ValueError, TypeError) as e:
+                print(f"❌ Error sending email to {to_email}: {str(e)}")
         
-        html_content = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; border-radius: 10px;">
-                    <h1 style="color: #16a34a; text-align: center;">✅ {action} Confirmed</h1>
-                    
-                    <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                        <p>Hi <strong>{name}</strong>,</p>
-                        
-                        <p>Great news! Your <strong>{action.lower()}</strong> transaction has been confirmed on the blockchain.</p>
-                        
-                        <div style="background: #f0fdf4; padding: 15px; border-left: 4px solid #16a34a; margin: 15px 0;">
-                            <p><strong>Transaction Details:</strong></p>
-                            <p>Type: <strong>{action}</strong></p>
-                            <p>Amount: <strong>{amount} TON</strong></p>
-                            <p>Status: <strong>✅ Confirmed</strong></p>
-                            <p>Transaction Hash: <code style="background: #e5e7eb; padding: 5px; border-radius: 3px;">{tx_hash[:20]}...</code></p>
-                        </div>
-                        
-                        <p>Your transaction is now permanently recorded on the TON blockchain.</p>
-                        
-                        <p style="margin-top: 20px; color: #666; font-size: 12px;">
-                            This is an automated message. Please do not reply to this email.
-                        </p>
-                    </div>
-                </div>
-            </body>
-        </html>
+        sent = 0
+        for shared, group in groups.items():
+            for start in range(0, len(group), EMAIL_SEND_BATCH_SIZE):
+                chunk = group[start:start + EMAIL_SEND_BATCH_SIZE]
+                try:
+                    self.deliver_batch(kind, chunk, shared)
+                    sent += len(chunk)
+                except EmailDeliveryError as e:
+                    print(f"❌ Error sending {len(chunk)} {kind} emails: {str(e)}")
+        if sent:
+            print(f"✅ {sent} {kind} emails sent")
+        return sent
+    
+    def stats(self) -> Dict:
+        return dict(self._stats)
+    
+    def compose(self, kind: str, name: str, params: Dict):
         """
+        Build (subject, html_content, text_content) for a notification kind
         
-        return self.send_email(email, name, subject, html_content)
+        Args:
+            kind: One of EMAIL_KINDS
+            name: Recipient name
+            params: Kind-specific parameters (amount, tx_hash, ...)
+        """
+        if kind not in EMAIL_KINDS:
+            raise ValueError(f"Unknown email kind: {kind}")
+        return getattr(self, f"compose_{kind}")(name, **params)
+    
+    def compose_stake_confirmation(self, name: str, amount: float, tx_hash: str, tx_hash_short: Optional[str] = None):
+        """Build stake confirmation email"""
+        return get_template("stake_confirmation").render({
+            "name": name, "amount": amount, "tx_hash": tx_hash,
+            "tx_hash_short": tx_hash_short or tx_hash[:20]
+        })
+    
+    def send_stake_confirmation(self, email: str, name: str, amount: float, tx_hash: str) -> bool:
+        """Send stake confirmation email"""
+        return self.send_email(email, name, *self.compose_stake_confirmation(name, amount, tx_hash))
+    
+    def compose_unstake_confirmation(self, name: str, tx_hash: str, lock_days: int = 7, tx_hash_short: Optional[str] = None):
+        """Build unstake confirmation email with withdrawal lock info"""
+        return get_template("unstake_confirmation").render({
+            "name": name, "tx_hash": tx_hash, "lock_days": lock_days,
+            "tx_hash_short": tx_hash_short or tx_hash[:20]
+        })
+    
+    def send_unstake_confirmation(self, email: str, name: str, tx_hash: str, lock_days: int = 7) -> bool:
+        """Send unstake confirmation email with withdrawal lock info"""
+        return self.send_email(email, name, *self.compose_unstake_confirmation(name, tx_hash, lock_days))
+    
+    def compose_transaction_confirmed(self, name: str, amount: float, tx_hash: str, tx_type: str, tx_hash_short: Optional[str] = None):
+        """Build transaction confirmation email"""
+        is_stake = tx_type == "stake"
+        action = "Stake" if is_stake else "Unstake"
+        return get_template("transaction_confirmed").render({
+            "name": name, "amount": amount, "tx_hash": tx_hash,
+            "tx_hash_short": tx_hash_short or tx_hash[:20],
+            "icon": "💎" if is_stake else "💸",
+            "action": action,
+            "action_lower": action.lower()
+        })
+    
+    def send_transaction_confirmed(self, email: str, name: str, amount: float, tx_hash: str, tx_type: str) -> bool:
+        """Send transaction confirmation email"""
+        return self.send_email(email, name, *self.compose_transaction_confirmed(name, amount, tx_hash, tx_type))
+    
+    def compose_withdrawal_ready(self, name: str, amount: float, tx_hash: str, tx_hash_short: Optional[str] = None):
+        """Build notification that withdrawal is ready to claim"""
+        return get_template("withdrawal_ready").render({
+            "name": name, "amount": amount, "tx_hash": tx_hash,
+            "tx_hash_short": tx_hash_short or tx_hash[:20]
+        })
     
     def send_withdrawal_ready(self, email: str, name: str, amount: float, tx_hash: str) -> bool:
         """Send notification that withdrawal is ready to claim"""
-        subject = "💰 TON Staking Pool - Your Withdrawal is Ready!"
-        
-        html_content = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; border-radius: 10px;">
-                    <h1 style="color: #16a34a; text-align: center;">💰 Withdrawal Ready!</h1>
-                    
-                    <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                        <p>Hi <strong>{name}</strong>,</p>
-                        
-                        <p>Your withdrawal lock has expired and your funds are now ready to claim!</p>
-                        
-                        <div style="background: #f0fdf4; padding: 15px; border-left: 4px solid #16a34a; margin: 15px 0;">
-                            <p><strong>Withdrawal Details:</strong></p>
-                            <p>Amount: <strong>{amount} TON</strong></p>
-                            <p>Status: <strong>🔓 Ready to Withdraw</strong></p>
-                            <p>Transaction Hash: <code style="background: #e5e7eb; padding: 5px; border-radius: 3px;">{tx_hash[:20]}...</code></p>
-                        </div>
-                        
-                        <p>Log in to your TON Staking Pool account to complete your withdrawal.</p>
-                        
-                        <p style="margin-top: 20px; color: #666; font-size: 12px;">
-                            This is an automated message. Please do not reply to this email.
-                        </p>
-                    </div>
-                </div>
-            </body>
-        </html>
-        """
-        
-        return self.send_email(email, name, subject, html_content)
+        return self.send_email(email, name, *self.compose_withdrawal_ready(name, amount, tx_hash))
 
 
 # Singleton instance
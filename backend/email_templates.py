@@ -0,0 +1,116 @@
+# backend/email_templates.py
+"""
+Email templates (templates/email/<kind>.html and <kind>.txt)
+- Placeholders are {{ name }}; the .txt template starts with a
+  "Subject: ..." line followed by a blank line
+- Each template is read and compiled once per process into a str.format
+  string (literal braces escaped) and cached, so rendering is a single
+  format_map() call
+- The same compiled template renders both single emails and batch
+  templates (values = SendGrid substitution tokens, see email_service.py)
+"""
+
+import os
+import re
+import threading
+from typing import Dict, FrozenSet, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMAIL_TEMPLATE_DIR = os.getenv(
+    "EMAIL_TEMPLATE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "email")
+)
+
+_PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+
+class CompiledTemplate:
+    """One template source compiled to a format string"""
+
+    __slots__ = ("name", "fields", "_format")
+
+    def __init__(self, name: str, source: str):
+        """
+        Args:
+            name: Template name (for error messages)
+            source: Text with {{ placeholder }} fields
+        """
+        parts = []
+        fields = set()
+        pos = 0
+        for match in _PLACEHOLDER.finditer(source):
+            parts.append(source[pos:match.start()].replace("{", "{{").replace("}", "}}"))
+            parts.append("{" + match.group(1) + "}")
+            fields.add(match.group(1))
+            pos = match.end()
+        parts.append(source[pos:].replace("{", "{{").replace("}", "}}"))
+        self.name = name
+        self.fields: FrozenSet[str] = frozenset(fields)
+        self._format = "".join(parts)
+
+    def render(self, values: Dict) -> str:
+        """
+        Substitute values (extra keys are ignored)
+
+        Raises:
+            TypeError: A placeholder has no value
+        """
+        try:
+            return self._format.format_map(values)
+        except KeyError as e:
+            raise TypeError(f"Template {self.name} is missing value '{e.args[0]}'")
+
+
+class EmailTemplate:
+    """Subject, HTML and text templates of one notification kind"""
+
+    __slots__ = ("kind", "subject", "html", "text")
+
+    def __init__(self, kind: str, html_source: str, text_source: str):
+        first_line, _, body = text_source.partition("\n")
+        if not first_line.startswith("Subject:"):
+            raise ValueError(f"Template {kind}.txt must start with a 'Subject:' line")
+        self.kind = kind
+        self.subject = CompiledTemplate(f"{kind} (subject)", first_line[len("Subject:"):].strip())
+        self.html = CompiledTemplate(f"{kind}.html", html_source)
+        self.text = CompiledTemplate(f"{kind}.txt", body.lstrip("\n"))
+
+    @property
+    def fields(self) -> FrozenSet[str]:
+        return self.subject.fields | self.html.fields | self.text.fields
+
+    def render(self, values: Dict) -> Tuple[str, str, str]:
+        """Render (subject, html_content, text_content)"""
+        return self.subject.render(values), self.html.render(values), self.text.render(values)
+
+
+def load_template(kind: str, template_dir: str = EMAIL_TEMPLATE_DIR) -> EmailTemplate:
+    """Read and compile a template from disk (uncached, see get_template)"""
+    with open(os.path.join(template_dir, f"{kind}.html"), encoding="utf-8") as f:
+        html_source = f.read()
+    with open(os.path.join(template_dir, f"{kind}.txt"), encoding="utf-8") as f:
+        text_source = f.read()
+    return EmailTemplate(kind, html_source, text_source)
+
+
+# Compiled template cache (one entry per kind)
+_templates: Dict[str, EmailTemplate] = {}
+_templates_lock = threading.Lock()
+
+def get_template(kind: str) -> EmailTemplate:
+    """Get the compiled template of a kind, loading it on first use"""
+    template = _templates.get(kind)
+    if template is None:
+        with _templates_lock:
+            template = _templates.get(kind)
+            if template is None:
+                template = _templates[kind] = load_template(kind)
+    return template
+
+
+def clear_template_cache():
+    """Drop compiled templates (next render reloads them from disk)"""
+    with _templates_lock:
+        _templates.clear()
@@ -0,0 +1,253 @@
+# backend/event_stream.py
+"""
+Server-Sent Events fan-out
+One background thread schedules a refresh of each *subscribed* topic once
+per interval and publishes only when the value changed; every client
+subscribed to the topic receives the same event. Refreshes run in parallel
+on the broker's own thread pool, so one slow loader delays only its own
+topic (loaders may use the TonCenter fan-out pool without waiting behind
+themselves). Topics:
+- pool                pool stats snapshot
+- balance:<address>   wallet / staking balance
+- tx:<user_id>        statuses of the user's latest transactions
+Loaders are registered by app.py, so this module has no app dependencies.
+"""
+
+import os
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STREAM_TICK_SECONDS = float(os.getenv("STREAM_TICK_SECONDS", "1"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "20"))  # Keeps proxies from closing idle streams
+STREAM_MAX_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", "300"))  # Client reconnects, frees the worker thread
+STREAM_MAX_CLIENTS = int(os.getenv("STREAM_MAX_CLIENTS", "24"))  # Keep gthread threads for normal requests
+STREAM_REFRESH_WORKERS = int(os.getenv("STREAM_REFRESH_WORKERS", "4"))  # Topic refreshes running at once
+STREAM_RETRY_MS = 5000
+SUBSCRIBER_QUEUE_SIZE = 32
+
+
+class Subscription:
+    """One connected client"""
+
+    __slots__ = ("topics", "queue")
+
+    def __init__(self, topics: Set[str]):
+        self.topics = topics
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, event: Dict):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Slow client: drop the oldest event, newer values supersede it
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(event)
+
+
+class EventBroker:
+    """Topic registry, change detection and background refresh"""
+
+    def __init__(self):
+        self._loaders: Dict[str, tuple] = {}  # prefix -> (loader, interval)
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._last: Dict[str, Dict] = {}  # topic -> last published event
+        self._due: Dict[str, float] = {}  # topic -> monotonic time of next refresh
+        self._inflight: Set[str] = set()  # topics being refreshed on the executor
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._event_id = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._app = None
+        self._stats = {"published": 0, "suppressed": 0, "refreshes": 0, "errors": 0}
+
+    def register(self, prefix: str, loader: Callable[[str], Dict], interval: float):
+        """
+        Register a topic loader
+
+        Args:
+            prefix: Topic prefix ('pool', 'balance', 'tx')
+            loader: Called with the topic argument ('' for 'pool'), returns JSON-able data
+            interval: Seconds between upstream refreshes of one topic
+        """
+        self._loaders[prefix] = (loader, interval)
+
+    # --- Subscriptions ----------------------------------------------------------
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        sub = Subscription(set(topics))
+        now = time.monotonic()
+        with self._lock:
+            for topic in sub.topics:
+                if topic not in self._subscribers:
+                    self._subscribers[topic] = set()
+                    self._due[topic] = now  # Refresh a new topic right away
+                self._subscribers[topic].add(sub)
+            for topic in sub.topics:
+                if topic in self._last:
+                    sub.deliver(self._last[topic])
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            for topic in sub.topics:
+                subs = self._subscribers.get(topic)
+                if subs is None:
+                    continue
+                subs.discard(sub)
+                if not subs:
+                    # Nobody listens: stop refreshing and forget the value
+                    del self._subscribers[topic]
+                    self._due.pop(topic, None)
+                    self._last.pop(topic, None)
+
+    def client_count(self) -> int:
+        with self._lock:
+            return len({sub for subs in self._subscribers.values() for sub in subs})
+
+    def mark_due(self, topic: str):
+        """Refresh a topic on the next tick (e.g. after a status change)"""
+        with self._lock:
+            if topic in self._due:
+                self._due[topic] = 0.0
+
+    # --- Publishing -------------------------------------------------------------
+    def publish(self, topic: str, data) -> bool:
+        """
+        Fan out a value to the topic's subscribers if it changed
+
+        Returns:
+            True if an event was sent
+        """
+        body = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+        with self._lock:
+            last = self._last.get(topic)
+            if last is not None and last["data"] == body:
+                self._stats["suppressed"] += 1
+                return False
+            self._event_id += 1
+            event = {"id": self._event_id, "event": topic.split(":", 1)[0], "data": body}
+            self._last[topic] = event
+            for sub in self._subscribers.get(topic, ()):
+                sub.deliver(event)
+            self._stats["published"] += 1
+        return True
+
+    def _refresh_topic(self, topic: str, loader: Callable, arg: str, interval: float):
+        """Load and publish one topic (refresh thread or executor thread)"""
+        try:
+            if self._app is not None:
+                with self._app.app_context():
+                    data = loader(arg)
+            else:
+                data = loader(arg)
+            self.publish(topic, data)
+            with self._lock:
+                self._stats["refreshes"] += 1
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            print(f"⚠️  Stream refresh failed for {topic}: {str(e)}")
+        finally:
+            with self._lock:
+                self._inflight.discard(topic)
+                # Keep a mark_due() that arrived during the refresh
+                if self._due.get(topic, 0.0) != 0.0:
+                    self._due[topic] = time.monotonic() + interval
+
+    def _refresh_due(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [topic for topic, at in self._due.items() if at <= now and topic not in self._inflight]
+        for topic in due:
+            prefix, _, arg = topic.partition(":")
+            loader, interval = self._loaders.get(prefix, (None, 0))
+            if loader is None:
+                continue
+            if self._executor is None:
+                self._refresh_topic(topic, loader, arg, interval)
+                continue
+            with self._lock:
+                if len(self._inflight) >= STREAM_REFRESH_WORKERS:
+                    break  # The rest stay due for the next tick
+                self._inflight.add(topic)
+            try:
+                self._executor.submit(self._refresh_topic, topic, loader, arg, interval)
+            except RuntimeError as e:  # Executor shut down (interpreter exit)
+                with self._lock:
+                    self._inflight.discard(topic)
+                print(f"⚠️  Stream refresh not scheduled for {topic}: {str(e)}")
+
+    def _run(self):
+        while not self._stop.wait(STREAM_TICK_SECONDS):
+            self._refresh_due()
+
+    def start(self, app=None):
+        """
+        Start the refresh thread and its thread pool once per process
+
+        Args:
+            app: Flask app (loaders run in its app context)
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._app = app
+            self._executor = ThreadPoolExecutor(
+                max_workers=STREAM_REFRESH_WORKERS,
+                thread_name_prefix="event-stream-refresh"
+            )
+            self._thread = threading.Thread(target=self._run, name="event-stream", daemon=True)
+            self._thread.start()
+
+    def stream(self, topics: Iterable[str]) -> Iterator[str]:
+        """
+        SSE body generator for one client
+
+        Subscribes when the response starts and unsubscribes on disconnect
+        or after STREAM_MAX_SECONDS (EventSource reconnects by itself).
+        """
+        sub = self.subscribe(topics)
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            while time.monotonic() < deadline:
+                try:
+                    event = sub.queue.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {event['data']}\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            data = dict(self._stats)
+            data["topics"] = len(self._subscribers)
+            data["inflight"] = len(self._inflight)
+            data["clients"] = len({sub for subs in self._subscribers.values() for sub in subs})
+        return data
+
+
+# Singleton instance
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_event_broker() -> EventBroker:
+    """Get or create the process-wide event broker"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = EventBroker()
+    return _broker
@@ -0,0 +1,196 @@
+# backend/fake_sendgrid.py
+"""
+Local fake of the SendGrid v3 mail API (POST /v3/mail/send)
+Validates requests like the real API does (auth header, 1..1000
+personalizations, each with a recipient), counts them and answers 202.
+Point the app at it with SENDGRID_API_HOST=http://127.0.0.1:8025 and any
+SENDGRID_API_KEY. GET /stats returns the counters as JSON.
+
+Usage:
+    python fake_sendgrid.py [--port 8025] [--latency-ms 50] [--fail-rate 0.01]
+    python fake_sendgrid.py --bench 2000 [--latency-ms 50]
+The bench mode starts the server in-process and compares one request per
+email (EmailService.deliver) with batched personalizations (send_batch).
+"""
+import os
+import json
+import time
+import random
+import argparse
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_PERSONALIZATIONS = 1000
+
+
+class FakeSendGrid:
+    """In-process fake SendGrid API server"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8025, latency_ms: float = 0, fail_rate: float = 0):
+        """
+        Args:
+            host / port: Listen address (port 0 = pick a free one)
+            latency_ms: Delay added to every request (simulates the round trip)
+            fail_rate: Share of requests answered with 500
+        """
+        self.latency = latency_ms / 1000
+        self.fail_rate = fail_rate
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "accepted": 0, "rejected": 0, "failed": 0, "personalizations": 0, "bytes": 0}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._stats[key] += value
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def validate(self, headers, body: bytes):
+        """Return (status, error message or None) for a mail/send request"""
+        if not headers.get("Authorization", "").startswith("Bearer "):
+            return 401, "The provided authorization grant is invalid, expired, or revoked"
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return 400, "Bad Request"
+        personalizations = payload.get("personalizations") or []
+        if not 1 <= len(personalizations) <= MAX_PERSONALIZATIONS:
+            return 400, f"The personalizations field must have between 1 and {MAX_PERSONALIZATIONS} items"
+        if any(not p.get("to") for p in personalizations):
+            return 400, "Each personalization must have at least one to address"
+        if not (payload.get("from") or {}).get("email"):
+            return 400, "The from object must be provided for every email send"
+        if not payload.get("content") and not payload.get("template_id"):
+            return 400, "Unless a valid template_id is provided, the content parameter is required"
+        return 202, len(personalizations)
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status: int, body: bytes = b"", content_type: str = "application/json"):
+                self.send_response(status)
+                if status == 202:
+                    self.send_header("X-Message-Id", uuid.uuid4().hex)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/stats":
+                    self._reply(200, json.dumps(fake.stats()).encode())
+                else:
+                    self._reply(404)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                fake._count(requests=1, bytes=len(body))
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if self.path.rstrip("/") != "/v3/mail/send":
+                    self._reply(404)
+                    return
+                if fake.fail_rate and random.random() < fake.fail_rate:
+                    fake._count(failed=1)
+                    self._reply(500, json.dumps({"errors": [{"message": "Internal error (simulated)"}]}).encode())
+                    return
+                status, detail = fake.validate(self.headers, body)
+                if status != 202:
+                    fake._count(rejected=1)
+                    self._reply(status, json.dumps({"errors": [{"message": detail}]}).encode())
+                    return
+                fake._count(accepted=1, personalizations=detail)
+                self._reply(202)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+        return Handler
+
+    def start(self) -> "FakeSendGrid":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-sendgrid", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_bench(emails: int, latency_ms: float):
+    """Send the same burst one request per email, then batched, and print throughput"""
+    fake = FakeSendGrid(port=0, latency_ms=latency_ms).start()
+    os.environ["SENDGRID_API_KEY"] = "SG.fake-key"
+    os.environ["SENDGRID_API_HOST"] = fake.url
+    from email_service import EmailService  # Reads SENDGRID_API_HOST at import
+
+    service = EmailService()
+    recipients = [
+        (f"user{i}@example.com", f"user{i}", {
+            "amount": round(random.uniform(1, 500), 2),
+            "tx_hash": uuid.uuid4().hex * 2,
+            "tx_type": random.choice(["stake", "unstake"]),
+        })
+        for i in range(emails)
+    ]
+    print(f"📨 {emails} transaction_confirmed emails, {latency_ms:g} ms simulated latency ({fake.url})")
+
+    before = fake.stats()
+    started = time.perf_counter()
+    for to_email, to_name, params in recipients:
+        service.deliver(to_email, to_name, *service.compose("transaction_confirmed", to_name, params))
+    elapsed = time.perf_counter() - started
+    after = fake.stats()
+    print(f"  one per email: {elapsed:7.2f}s  {emails / elapsed:9.1f} emails/s  "
+          f"{after['requests'] - before['requests']} requests  {(after['bytes'] - before['bytes']) / 1024:.0f} KiB")
+
+    before = fake.stats()
+    started = time.perf_counter()
+    sent = service.send_batch("transaction_confirmed", recipients)
+    elapsed = time.perf_counter() - started
+    after = fake.stats()
+    print(f"  batched:       {elapsed:7.2f}s  {sent / elapsed:9.1f} emails/s  "
+          f"{after['requests'] - before['requests']} requests  {(after['bytes'] - before['bytes']) / 1024:.0f} KiB")
+    fake.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0)
+    parser.add_argument("--bench", type=int, metavar="EMAILS", help="Run the throughput benchmark instead of serving")
+    args = parser.parse_args()
+
+    if args.bench:
+        run_bench(args.bench, args.latency_ms)
+        return
+
+    fake = FakeSendGrid(args.host, args.port, args.latency_ms, args.fail_rate)
+    print(f"📮 Fake SendGrid listening on {fake.url} (SENDGRID_API_HOST={fake.url})")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# backend/http_session.py
+"""
+Shared HTTP session layer for TON API calls
+One pooled, keep-alive requests.Session per process, so every TONAPIClient
+reuses TCP+TLS connections to toncenter.com instead of opening a new one per call
+"""
+
+import os
+import threading
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Pool configuration (override via environment variables)
+POOL_CONNECTIONS = int(os.getenv("TON_HTTP_POOL_CONNECTIONS", "4"))  # Number of hosts kept in the pool
+POOL_MAXSIZE = int(os.getenv("TON_HTTP_POOL_MAXSIZE", "10"))  # Max open connections per host
+POOL_BLOCK = os.getenv("TON_HTTP_POOL_BLOCK", "true").lower() == "true"  # Wait for a free connection instead of opening extra ones
+MAX_RETRIES = int(os.getenv("TON_HTTP_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("TON_HTTP_BACKOFF_FACTOR", "0.5"))  # 0.5s, 1s, 2s...
+# 429 is left to the token-bucket limiter (rate_limiter.py) so it can adapt its rate
+SESSION_RETRY_STATUSES = (500, 502, 503, 504)
+THROTTLE_RETRIES = int(os.getenv("TON_HTTP_THROTTLE_RETRIES", "3"))
+
+_session = None
+_session_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics = {
+    "requests": 0,
+    "errors": 0,
+}
+
+
+def _build_session() -> requests.Session:
+    """Create a requests.Session with a pooled adapter and retry policy"""
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=SESSION_RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Let the caller inspect the final response
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=POOL_BLOCK,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": "TON-Pool-Backend/1.0",
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """
+    Отримати shared pooled session (створюється один раз на процес)
+
+    Returns:
+        requests.Session, safe to share between threads
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """
+    GET через shared session з обліком метрик
+
+    Args:
+        url: Request URL
+        **kwargs: Passed through to requests.Session.get
+
+    Returns:
+        requests.Response
+    """
+    session = get_http_session()
+    with _metrics_lock:
+        _metrics["requests"] += 1
+    try:
+        return session.get(url, **kwargs)
+    except requests.exceptions.RequestException:
+        with _metrics_lock:
+            _metrics["errors"] += 1
+        raise
+
+
+def get_http_metrics() -> Dict:
+    """
+    Connection reuse metrics for the shared session
+
+    Returns:
+        Dict with request count, connections opened and reuse ratio
+    """
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+
+    connections_opened = 0
+    pool_requests = 0
+    if _session is not None:
+        # The same adapter is mounted for https:// and http://: count each pool once
+        adapters = {id(adapter): adapter for adapter in _session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections_opened += pool.num_connections
+                pool_requests += pool.num_requests
+
+    # pool_requests includes urllib3-level retries, so it is the right base for reuse
+    reused = max(pool_requests - connections_opened, 0)
+    snapshot.update({
+        "pool_requests": pool_requests,
+        "connections_opened": connections_opened,
+        "connections_reused": reused,
+        "reuse_ratio": round(reused / pool_requests, 4) if pool_requests else 0.0,
+        "pool_maxsize": POOL_MAXSIZE,
+        "pool_connections": POOL_CONNECTIONS,
+    })
+    return snapshot
@@ -0,0 +1,230 @@
+# backend/leader_election.py
+"""
+Leader election for background jobs
+Every gunicorn worker runs an elector thread; exactly one of them holds
+leadership and runs the APScheduler jobs, the others only serve HTTP.
+- PostgreSQL: session-level advisory lock held on a dedicated connection.
+  It is released by the server as soon as the leader's connection dies,
+  so a new leader takes over on the next tick.
+- Other databases (SQLite in development): lease row in scheduler_leases,
+  renewed every LEADER_RENEW_SECONDS and taken over after it expires.
+"""
+
+import os
+import socket
+import hashlib
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from dotenv import load_dotenv
+from sqlalchemy import or_, text, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, SchedulerLease
+
+load_dotenv()
+
+LEADER_RENEW_SECONDS = float(os.getenv("LEADER_RENEW_SECONDS", "10"))
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "30"))  # Lease-row mode only
+
+
+def advisory_key(name: str) -> int:
+    """Stable signed 64-bit advisory lock key for a lock name"""
+    return int.from_bytes(hashlib.sha1(f"ton_pool:{name}".encode()).digest()[:8], "big", signed=True)
+
+
+class LeaderElector:
+    """Elects one process (among all workers / instances) as job leader"""
+
+    def __init__(self, name: str, renew_seconds: float = LEADER_RENEW_SECONDS, lease_seconds: float = LEADER_LEASE_SECONDS):
+        """
+        Args:
+            name: Lock / lease name (one leader per name)
+            renew_seconds: Check / renew interval
+            lease_seconds: Lease length in lease-row mode
+        """
+        self.name = name
+        self.renew_seconds = renew_seconds
+        self.lease_seconds = lease_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._is_leader = False
+        self._lock_conn = None  # Connection holding the advisory lock
+        self._on_elected: Optional[Callable] = None
+        self._on_demoted: Optional[Callable] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._app = None
+        self._stats = {"elections": 0, "demotions": 0, "errors": 0, "mode": None}
+
+    # --- PostgreSQL advisory lock -----------------------------------------------
+    def _advisory_tick(self) -> bool:
+        if self._lock_conn is not None:
+            self._lock_conn.execute(text("SELECT 1"))  # Connection alive = lock still held
+            return True
+        conn = db.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": advisory_key(self.name)}
+            ).scalar()
+        except Exception:
+            conn.close()
+            raise
+        if not acquired:
+            conn.close()
+            return False
+        self._lock_conn = conn
+        return True
+
+    def _release_advisory(self):
+        conn, self._lock_conn = self._lock_conn, None
+        if conn is None:
+            return
+        try:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": advisory_key(self.name)})
+        except Exception:
+            pass
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    # --- Lease row --------------------------------------------------------------
+    def _lease_tick(self) -> bool:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        result = db.session.execute(
+            update(SchedulerLease)
+            .where(
+                SchedulerLease.name == self.name,
+                or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now)
+            )
+            .values(holder=self.holder, expires_at=expires_at, updated_at=now)
+        )
+        if result.rowcount:
+            db.session.commit()
+            return True
+        if db.session.get(SchedulerLease, self.name) is not None:
+            db.session.commit()
+            return False  # Held by a live leader
+        try:
+            db.session.add(SchedulerLease(name=self.name, holder=self.holder, expires_at=expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()  # Another process created it first
+            return False
+
+    def _release_lease(self):
+        try:
+            db.session.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+                .values(expires_at=datetime.utcnow())
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+
+    # --- Election loop ----------------------------------------------------------
+    def _use_advisory_lock(self) -> bool:
+        return db.engine.dialect.name == "postgresql"
+
+    def tick(self):
+        """Acquire / renew leadership once and fire callbacks on changes (needs app context)"""
+        advisory = self._use_advisory_lock()
+        self._stats["mode"] = "advisory_lock" if advisory else "lease"
+        try:
+            held = self._advisory_tick() if advisory else self._lease_tick()
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"⚠️  Leader election ({self.name}) failed: {str(e)}")
+            if not advisory:
+                db.session.rollback()
+            held = False
+
+        if held and not self._is_leader:
+            self._is_leader = True
+            self._stats["elections"] += 1
+            print(f"👑 {self.holder} elected leader for '{self.name}'")
+            self._fire(self._on_elected)
+        elif not held and self._is_leader:
+            self._is_leader = False
+            self._stats["demotions"] += 1
+            print(f"⬇️  {self.holder} lost leadership for '{self.name}'")
+            self._fire(self._on_demoted)
+        if not held and advisory:
+            self._release_advisory()  # After on_demoted: running jobs have finished
+
+    def _fire(self, callback: Optional[Callable]):
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"⚠️  Leader callback ({self.name}) failed: {str(e)}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._app is not None:
+                with self._app.app_context():
+                    self.tick()
+            else:
+                self.tick()
+            self._stop.wait(self.renew_seconds)
+
+    def start(self, app, on_elected: Callable, on_demoted: Callable):
+        """
+        Start the election thread once per process
+
+        Args:
+            app: Flask app (DB access needs an app context)
+            on_elected: Called when this process becomes leader (start jobs)
+            on_demoted: Called when leadership is lost (stop jobs)
+        """
+        if self._thread is not None:
+            return
+        self._app = app
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._thread = threading.Thread(target=self._run, name=f"leader-{self.name}", daemon=True)
+        self._thread.start()
+
+    def resign(self):
+        """Stop electing and hand leadership over once running jobs finish (e.g. on shutdown)"""
+        self._stop.set()
+        was_leader, self._is_leader = self._is_leader, False
+        if was_leader:
+            self._fire(self._on_demoted)
+        if self._lock_conn is not None:
+            self._release_advisory()
+        elif was_leader and self._app is not None:
+            with self._app.app_context():
+                self._release_lease()
+
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def stats(self) -> Dict:
+        data = dict(self._stats)
+        data["name"] = self.name
+        data["holder"] = self.holder
+        data["is_leader"] = self._is_leader
+        return data
+
+
+# Singleton instances (one elector per name)
+_electors: Dict[str, LeaderElector] = {}
+_electors_lock = threading.Lock()
+
+def get_leader_elector(name: str = "scheduler") -> LeaderElector:
+    """Get or create the process-wide elector for a name"""
+    elector = _electors.get(name)
+    if elector is None:
+        with _electors_lock:
+            elector = _electors.get(name)
+            if elector is None:
+                elector = _electors[name] = LeaderElector(name)
+    return elector
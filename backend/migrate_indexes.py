@@ -0,0 +1,82 @@
+# backend/migrate_indexes.py
+"""
+Add composite / partial indexes on ton_pool.transactions, and the
+updated_at index on ton_pool.pool_stats (latest snapshot / retention)
+Uses CREATE INDEX CONCURRENTLY, so writes are not blocked on a large table.
+Run this once on Render Shell before deploying the models change
+(flask db migrate then sees the indexes and does nothing).
+Names and definitions match Transaction.__table_args__ and
+PoolStats.updated_at (index=True) in models.py
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# (name, columns, partial-index predicate or None)
+TRANSACTION_INDEXES = [
+    ("ix_transactions_user_created", "user_id, created_at, id", None),
+    ("ix_transactions_user_status_created", "user_id, status, created_at, id", None),
+    ("ix_transactions_pending", "id", "status = 'pending'"),
+    ("ix_transactions_user_locked", "user_id", "is_locked"),
+    ("ix_transactions_type_created", "type, created_at", None),
+]
+
+POOL_STATS_INDEXES = [
+    ("ix_pool_stats_updated_at", "updated_at", None),
+]
+
+
+def create_index_sql(schema: str, name: str, columns: str, where=None, table: str = "transactions") -> str:
+    sql = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {schema}.{table} ({columns})"
+    if where:
+        sql += f" WHERE {where}"
+    return sql
+
+
+def create_indexes(conn, table: str, indexes, schema: str = "ton_pool"):
+    """
+    Create the indexes of one table (conn must be in autocommit mode for CONCURRENTLY)
+    """
+    cur = conn.cursor()
+    try:
+        for name, columns, where in indexes:
+            print(f"🔧 {name} ({columns}{' WHERE ' + where if where else ''})...")
+            cur.execute(create_index_sql(schema, name, columns, where, table=table))
+        cur.execute(f"ANALYZE {schema}.{table}")
+    finally:
+        cur.close()
+
+
+def create_transaction_indexes(conn, schema: str = "ton_pool"):
+    create_indexes(conn, "transactions", TRANSACTION_INDEXES, schema)
+
+
+def create_pool_stats_indexes(conn, schema: str = "ton_pool"):
+    create_indexes(conn, "pool_stats", POOL_STATS_INDEXES, schema)
+
+
+if __name__ == "__main__":
+    import psycopg2
+
+    DATABASE_URL = os.getenv("DATABASE_URL", "").replace("postgres://", "postgresql://")
+
+    # Add SSL mode for Render PostgreSQL
+    if "sslmode" not in DATABASE_URL:
+        separator = "&" if "?" in DATABASE_URL else "?"
+        DATABASE_URL += f"{separator}sslmode=require"
+
+    print("🔧 Connecting to database...")
+    conn = psycopg2.connect(DATABASE_URL)
+    conn.autocommit = True  # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+
+    try:
+        create_transaction_indexes(conn)
+        create_pool_stats_indexes(conn)
+        print("\n✅ Indexes created successfully!")
+    except Exception as e:
+        # A failed concurrent build leaves an INVALID index: drop it and re-run
+        print(f"\n❌ Error: {e}")
+        raise
+    finally:
+        conn.close()
@@ -0,0 +1,92 @@
+# backend/migrate_transaction_columns.py
+"""
+Add the on-chain matching columns to an existing ton_pool.transactions
+- sender_address: wallet that signed the TX (tx_confirmation.py matches on it)
+- chain_tx_hash: pool transaction that confirmed the row (UNIQUE)
+db.create_all() never alters existing tables, and the models query these
+columns on every Transaction load, so this must run BEFORE the new code
+is deployed. It is idempotent (ADD COLUMN IF NOT EXISTS) and build.sh
+runs it on every Render build; it can also be run once on Render Shell.
+It also backfills NULLs in the keyset-pagination sort columns and makes
+them NOT NULL (pagination.py compares (sort value, id) tuples, and a NULL
+there would silently drop the row from every page).
+Definitions match Transaction and User in models.py
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# (column, definition)
+TRANSACTION_COLUMNS = [
+    ("sender_address", "VARCHAR(128)"),
+    ("chain_tx_hash", "VARCHAR(64) UNIQUE"),  # Constraint transactions_chain_tx_hash_key, as create_all names it
+]
+
+# (table, column, value for existing NULLs) - sort columns of keyset_page()
+NOT_NULL_SORT_COLUMNS = [
+    ("transactions", "amount", "0"),
+    ("transactions", "created_at", "COALESCE(updated_at, NOW() AT TIME ZONE 'UTC')"),
+    ("users", "created_at", "NOW() AT TIME ZONE 'UTC'"),
+]
+
+
+def add_transaction_columns(conn, schema: str = "ton_pool"):
+    """Add missing columns (nullable, so old code keeps working during the deploy)"""
+    cur = conn.cursor()
+    try:
+        for column, definition in TRANSACTION_COLUMNS:
+            print(f"🔧 {schema}.transactions.{column} {definition}...")
+            cur.execute(f"ALTER TABLE {schema}.transactions ADD COLUMN IF NOT EXISTS {column} {definition}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def enforce_not_null_sort_columns(conn, schema: str = "ton_pool"):
+    """Backfill NULL sort values and add NOT NULL (no-op once applied)"""
+    cur = conn.cursor()
+    try:
+        for table, column, fill in NOT_NULL_SORT_COLUMNS:
+            cur.execute(f"UPDATE {schema}.{table} SET {column} = {fill} WHERE {column} IS NULL")
+            print(f"🔧 {schema}.{table}.{column} NOT NULL ({cur.rowcount} NULLs backfilled)...")
+            cur.execute(f"ALTER TABLE {schema}.{table} ALTER COLUMN {column} SET NOT NULL")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+if __name__ == "__main__":
+    import psycopg2
+
+    DATABASE_URL = os.getenv("DATABASE_URL", "").replace("postgres://", "postgresql://")
+    if not DATABASE_URL:
+        print("⚠️  DATABASE_URL not set, nothing to migrate (SQLite tables are created by the app)")
+        raise SystemExit(0)
+
+    # Add SSL mode for Render PostgreSQL
+    if "sslmode" not in DATABASE_URL:
+        separator = "&" if "?" in DATABASE_URL else "?"
+        DATABASE_URL += f"{separator}sslmode=require"
+
+    print("🔧 Connecting to database...")
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT to_regclass('ton_pool.transactions'), to_regclass('ton_pool.users')")
+        transactions_exist, users_exist = (value is not None for value in cur.fetchone())
+        cur.close()
+        if not (transactions_exist and users_exist):
+            print("ℹ️  ton_pool tables do not exist yet, the app creates them with all columns")
+        else:
+            add_transaction_columns(conn)
+            enforce_not_null_sort_columns(conn)
+            print("\n✅ Transaction columns ready!")
+    finally:
+        conn.close()
@@ -28,7 +28,7 @@ class User(UserMixin, db.Model):
 
     wallet_address = db.Column(db.String(128), nullable=True)
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # NOT NULL: keyset sort column
 
     def set_password(self, pwd: str):
         self.password_hash = generate_password_hash(pwd)
@@ -79,13 +79,14 @@ class Subscription(db.Model):
         }
 
 class PoolStats(db.Model):
+    """Raw pool snapshots, appended by the pool-stats refresher (one row per refresh)"""
     __tablename__ = 'pool_stats'
     __table_args__ = _schema()
     id = db.Column(db.Integer, primary_key=True)
     total_pool_ton = db.Column(db.Float, default=0.0)
     total_jettons = db.Column(db.Float, default=0.0)
     apy = db.Column(db.Float, default=0.0)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def to_dict(self):
         return {
@@ -95,18 +96,98 @@ class PoolStats(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class PoolStatsRollup(db.Model):
+    """
+    Downsampled pool history: one row per (resolution, bucket)
+    resolution: 'minute' | 'hour' | 'day'
+    """
+    __tablename__ = 'pool_stats_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('resolution', 'bucket_start', name='uq_pool_stats_rollup_bucket'),
+        _schema(),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    resolution = db.Column(db.String(8), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    samples = db.Column(db.Integer, default=0, nullable=False)
+
+    # total_pool_ton aggregates (OHLC + sum for the average)
+    ton_open = db.Column(db.Float, default=0.0)
+    ton_close = db.Column(db.Float, default=0.0)
+    ton_min = db.Column(db.Float, default=0.0)
+    ton_max = db.Column(db.Float, default=0.0)
+    ton_sum = db.Column(db.Float, default=0.0)
+    apy_close = db.Column(db.Float, default=0.0)
+
+    def to_dict(self):
+        return {
+            't': self.bucket_start.isoformat(),
+            'open': self.ton_open,
+            'close': self.ton_close,
+            'min': self.ton_min,
+            'max': self.ton_max,
+            'avg': (self.ton_sum / self.samples) if self.samples else 0.0,
+            'apy': self.apy_close,
+            'samples': self.samples
+        }
+
+class DailyStakingRollup(db.Model):
+    """
+    Staking activity per UTC day (filled by staking_rollup.py)
+    One row per day, including days without activity
+    """
+    __tablename__ = 'daily_staking_rollups'
+    __table_args__ = _schema()
+
+    day = db.Column(db.Date, primary_key=True)
+    stake_count = db.Column(db.Integer, default=0, nullable=False)
+    stake_volume = db.Column(db.Float, default=0.0, nullable=False)
+    unstake_count = db.Column(db.Integer, default=0, nullable=False)
+    active_users = db.Column(db.Integer, default=0, nullable=False)  # Distinct users with a stake/unstake that day
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'date': self.day.isoformat(),
+            'stakes': {'count': self.stake_count, 'volume': self.stake_volume},
+            'unstakes': {'count': self.unstake_count},
+            'active_users': self.active_users
+        }
+
 class Transaction(db.Model):
     __tablename__ = 'transactions'
-    __table_args__ = _schema()
+    # Composite / partial indexes for the hot query patterns
+    # (created concurrently on existing databases by migrate_indexes.py)
+    __table_args__ = (
+        # History: user_id = ? ORDER BY created_at, id (keyset pages)
+        db.Index('ix_transactions_user_created', 'user_id', 'created_at', 'id'),
+        # History filtered by status
+        db.Index('ix_transactions_user_status_created', 'user_id', 'status', 'created_at', 'id'),
+        # Monitor: status = 'pending' ORDER BY id (only pending rows are indexed)
+        db.Index('ix_transactions_pending', 'id',
+                 postgresql_where=db.text("status = 'pending'"),
+                 sqlite_where=db.text("status = 'pending'")),
+        # Withdrawal locks: user_id = ? AND is_locked
+        db.Index('ix_transactions_user_locked', 'user_id',
+                 postgresql_where=db.text("is_locked"),
+                 sqlite_where=db.text("is_locked")),
+        # Analytics: type = ? AND created_at range
+        db.Index('ix_transactions_type_created', 'type', 'created_at'),
+        _schema(),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey(f"ton_pool.users.id"), nullable=True, index=True)
     tx_hash = db.Column(db.String(200), nullable=False, unique=True, index=True)
     type = db.Column(db.String(20), nullable=False)  # 'stake' | 'unstake'
-    amount = db.Column(db.Float, default=0.0)
+    amount = db.Column(db.Float, nullable=False, default=0.0)  # NOT NULL: keyset sort column
     status = db.Column(db.String(20), default='pending')  # 'pending' | 'confirmed' | 'failed'
+    sender_address = db.Column(db.String(128), nullable=True)  # Wallet that signed the TX (for on-chain matching)
+    # Pool transaction (hex hash) that confirmed this row; unique, so one on-chain
+    # deposit can never confirm two rows (also across processes / restarts)
+    chain_tx_hash = db.Column(db.String(64), nullable=True, unique=True)
     direction = db.Column(db.String(10), nullable=True)  # DEPRECATED: use 'type' instead
     amount_ton = db.Column(db.Float, default=0.0)  # DEPRECATED: use 'amount' instead
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Withdrawal lock fields
@@ -178,6 +259,144 @@ class Transaction(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class ChainCursor(db.Model):
+    """
+    Persistent blockchain scan position (logical time + hash of a transaction)
+    One row per scanner, e.g. 'pool_confirmations'
+    """
+    __tablename__ = 'chain_cursors'
+    __table_args__ = _schema()
+
+    name = db.Column(db.String(64), primary_key=True)
+    address = db.Column(db.String(128), nullable=False)
+    lt = db.Column(db.BigInteger, nullable=True)
+    tx_hash = db.Column(db.String(64), nullable=True)  # base64, as returned by TonCenter
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'address': self.address,
+            'lt': self.lt,
+            'tx_hash': self.tx_hash,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class SchedulerLease(db.Model):
+    """
+    Leader lease for background jobs (see leader_election.py)
+    Used when PostgreSQL advisory locks are not available (e.g. SQLite)
+    """
+    __tablename__ = 'scheduler_leases'
+    __table_args__ = _schema()
+
+    name = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(128), nullable=False)  # host:pid:nonce of the leader
+    expires_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class StatCounter(db.Model):
+    """
+    Incrementally maintained metric (kept up to date by stat_counters.py)
+    Keys: 'tx:<status>:<type>', 'tx_locked', 'users:<subscription_status>'
+    """
+    __tablename__ = 'stat_counters'
+    __table_args__ = _schema()
+
+    key = db.Column(db.String(80), primary_key=True)
+    count = db.Column(db.BigInteger, default=0, nullable=False)
+    total = db.Column(db.Float, default=0.0, nullable=False)  # Sum of amounts in TON (tx keys)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'count': self.count,
+            'total': self.total,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class PoolMessage(db.Model):
+    """
+    Indexed inbound pool message (filled by pool_indexer.py)
+    kind: 'deposit' (op=1) | 'withdraw' (op=2)
+    """
+    __tablename__ = 'pool_messages'
+    __table_args__ = (
+        db.Index('ix_pool_messages_sender_lt', 'sender', 'lt'),
+        _schema(),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    tx_hash = db.Column(db.String(64), unique=True, nullable=False)  # lowercase hex
+    lt = db.Column(db.BigInteger, nullable=False, index=True)
+    utime = db.Column(db.DateTime, nullable=False)
+    sender = db.Column(db.String(128), nullable=False)  # raw "wc:hex"
+    op = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    value_nanoton = db.Column(db.BigInteger, default=0, nullable=False)
+    query_id = db.Column(db.BigInteger, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def amount_ton(self) -> float:
+        return (self.value_nanoton or 0) / 1_000_000_000
+
+    def to_dict(self):
+        return {
+            'hash': self.tx_hash,
+            'lt': self.lt,
+            'timestamp': int((self.utime - datetime(1970, 1, 1)).total_seconds()),
+            'type': self.kind,
+            'amount': self.amount_ton,
+            'sender': self.sender,
+            'status': 'completed'
+        }
+
+class EmailOutbox(db.Model):
+    """
+    Durable email notification queue (see email_queue.py)
+    Rows are added in the same DB transaction as the change they announce.
+    status: 'pending' | 'sending' | 'sent' | 'dead'
+    """
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next', 'status', 'next_attempt_at'),
+        _schema(),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(40), nullable=False)  # email_service.EMAIL_KINDS
+    to_email = db.Column(db.String(255), nullable=False)
+    to_name = db.Column(db.String(255), nullable=True)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON params for compose_<kind>()
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = db.Column(db.DateTime, nullable=True)  # 'sending' rows are reclaimed after this
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'to_email': self.to_email,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
 class WebhookEvent(db.Model):
     """
     Track processed webhook events for idempotency
@@ -0,0 +1,108 @@
+# backend/pagination.py
+"""
+Keyset (cursor) pagination
+Pages are read with WHERE (sort_col, id) < (last_value, last_id)
+ORDER BY sort_col, id LIMIT n+1, so every page costs the same index range
+scan regardless of depth. Cursors are opaque url-safe tokens that carry
+the sort and the last row's key; clients only pass them back.
+Sort columns must be NOT NULL: a NULL makes the tuple comparison NULL, so
+the row would silently drop out of every page.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import literal, tuple_
+
+MAX_PAGE_SIZE = 100
+DEFAULT_PAGE_SIZE = 20
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """Page size limited to 1..MAX_PAGE_SIZE (DEFAULT_PAGE_SIZE if invalid)"""
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _dump_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _load_value(value: Any):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(sort: str, order: str, value: Any, row_id: int) -> str:
+    """Opaque cursor for the row after which the next page starts"""
+    payload = json.dumps({"s": sort, "o": order, "k": [_dump_value(value), row_id]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor and check it belongs to the requested sort
+
+    Returns:
+        (sort value, id) of the last row of the previous page
+
+    Raises:
+        ValueError: Malformed cursor or cursor from a different sort/order
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, row_id = payload["k"]
+        value, row_id = _load_value(value), int(row_id)
+    except Exception:
+        raise ValueError("malformed cursor")
+    if payload.get("s") != sort or payload.get("o") != order:
+        raise ValueError("cursor does not match sort order")
+    return value, row_id
+
+
+def keyset_page(query, sort_column, id_column, sort: str, order: str, limit: int, cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page ordered by (sort_column, id_column)
+
+    Args:
+        query: Filtered query (no ORDER BY / OFFSET)
+        sort_column: Model column to sort by (e.g. Transaction.created_at)
+        id_column: Unique tie-breaker column (primary key)
+        sort: Sort name stored in the cursor
+        order: 'asc' | 'desc'
+        limit: Page size
+        cursor: Cursor from the previous page, None for the first page
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+
+    Raises:
+        ValueError: Invalid cursor
+    """
+    if sort_column.nullable:
+        raise TypeError(f"keyset sort column {sort_column.key} must be NOT NULL")
+    key = tuple_(sort_column, id_column)
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort, order)
+        after = tuple_(literal(value, sort_column.type), literal(row_id, id_column.type))
+        query = query.filter(key < after if order == "desc" else key > after)
+
+    if order == "desc":
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor(sort, order, getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
@@ -0,0 +1,319 @@
+# backend/pool_indexer.py
+"""
+Persistent pool-address indexer
+Pages getTransactions for the pool contract by logical time and stores
+inbound deposit (op=1) and withdraw (op=2) messages in pool_messages.
+Progress is checkpointed in chain_cursors, so restarts resume instead of
+rescanning:
+- pool_indexer:head      newest lt indexed without gaps
+- pool_indexer:fill      resume point while catching up to head (+ fill_top = target head)
+- pool_indexer:tail      oldest lt reached by the backfill (lt=0 when history is complete)
+User history and stake totals are then served from the local table.
+"""
+
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+
+from models import db, ChainCursor, PoolMessage
+from ton_api import TONAPIClient, normalize_address, normalize_hash
+from tx_decoder import POOL_OPS, message_op
+
+load_dotenv()
+
+INDEXER_INTERVAL_SECONDS = int(os.getenv("POOL_INDEXER_INTERVAL_SECONDS", "60"))
+INDEXER_PAGE_SIZE = int(os.getenv("POOL_INDEXER_PAGE_SIZE", "100"))
+INDEXER_MAX_PAGES = int(os.getenv("POOL_INDEXER_MAX_PAGES", "10"))  # Forward pages per run
+BACKFILL_PAGES = int(os.getenv("POOL_INDEXER_BACKFILL_PAGES", "5"))  # Backward pages per run (0 = off)
+
+HEAD = "pool_indexer:head"
+FILL = "pool_indexer:fill"
+FILL_TOP = "pool_indexer:fill_top"
+TAIL = "pool_indexer:tail"
+
+
+def parse_pool_message(raw: Dict) -> Optional[Dict]:
+    """
+    Extract an indexed deposit/withdraw message from a getTransactions item
+
+    Returns:
+        Dict with PoolMessage columns, or None for other transactions
+    """
+    in_msg = raw.get("in_msg") or {}
+    source = in_msg.get("source")
+    if not source or in_msg.get("bounced"):
+        return None  # External or bounced message
+    op, query_id, _ = message_op(in_msg)
+    kind = POOL_OPS.get(op)
+    if kind is None:
+        return None
+    tx_id = raw.get("transaction_id", {})
+    return {
+        "tx_hash": normalize_hash(tx_id.get("hash", "")),
+        "lt": int(tx_id.get("lt", 0)),
+        "utime": datetime.utcfromtimestamp(int(raw.get("utime", 0))),
+        "sender": normalize_address(source),
+        "op": op,
+        "kind": kind,
+        "value_nanoton": int(in_msg.get("value", 0) or 0),
+        "query_id": query_id,
+    }
+
+
+def _tx_position(raw: Dict) -> Tuple[int, str]:
+    tx_id = raw.get("transaction_id", {})
+    return int(tx_id.get("lt", 0)), tx_id.get("hash", "")
+
+
+class PoolIndexer:
+    """Checkpointed indexer for one pool address (needs app context)"""
+
+    def __init__(self, api: TONAPIClient, pool_address: str):
+        """
+        Args:
+            api: TONAPIClient для мережі пулу
+            pool_address: Адреса pool контракту
+        """
+        self.api = api
+        self.pool_address = pool_address
+        self._lock = threading.Lock()
+
+    # --- Cursors ----------------------------------------------------------------
+    def _get_cursor(self, name: str) -> Optional[ChainCursor]:
+        return db.session.get(ChainCursor, name)
+
+    def _set_cursor(self, name: str, lt: Optional[int], tx_hash: Optional[str]):
+        row = db.session.get(ChainCursor, name)
+        if row is None:
+            row = ChainCursor(name=name, address=self.pool_address)
+            db.session.add(row)
+        row.lt = lt
+        row.tx_hash = tx_hash
+        row.updated_at = datetime.utcnow()
+
+    def _delete_cursor(self, name: str):
+        row = db.session.get(ChainCursor, name)
+        if row is not None:
+            db.session.delete(row)
+
+    # --- Paging -----------------------------------------------------------------
+    def _fetch_page(self, start: Optional[Tuple[int, str]], archival: bool = False) -> Tuple[List[Dict], bool]:
+        """
+        One page older than `start` (newest page when start is None)
+
+        Returns:
+            (transactions, exhausted) - exhausted means no older history exists
+        """
+        if start is None:
+            page = self.api.get_transactions(self.pool_address, limit=INDEXER_PAGE_SIZE, archival=archival)
+            return page, len(page) < INDEXER_PAGE_SIZE
+        lt, tx_hash = start
+        page = self.api.get_transactions(
+            self.pool_address, limit=INDEXER_PAGE_SIZE, lt=lt, tx_hash=tx_hash, archival=archival
+        )
+        exhausted = len(page) < INDEXER_PAGE_SIZE
+        if page and _tx_position(page[0]) == (int(lt), tx_hash):
+            page = page[1:]  # Start position is inclusive
+        return page, exhausted
+
+    def _store(self, transactions: List[Dict]) -> int:
+        """Insert new deposit/withdraw messages (idempotent by tx hash)"""
+        rows = [msg for msg in (parse_pool_message(raw) for raw in transactions) if msg and msg["tx_hash"]]
+        if not rows:
+            return 0
+        hashes = [row["tx_hash"] for row in rows]
+        existing = {h for (h,) in db.session.query(PoolMessage.tx_hash).filter(PoolMessage.tx_hash.in_(hashes))}
+        new_rows = [PoolMessage(**row) for row in rows if row["tx_hash"] not in existing]
+        db.session.add_all(new_rows)
+        return len(new_rows)
+
+    # --- Sync -------------------------------------------------------------------
+    def sync_forward(self) -> int:
+        """
+        Index transactions newer than the head cursor (bounded pages per run)
+
+        A run that cannot reach the head saves a fill cursor and the next run
+        continues from there, so no range is skipped.
+
+        Returns:
+            Number of stored messages
+        """
+        head = self._get_cursor(HEAD)
+        fill = self._get_cursor(FILL)
+        stop_lt = head.lt if head is not None else None
+
+        if head is None and fill is None:
+            # First run: index the newest page and start both cursors there
+            page, exhausted = self._fetch_page(None)
+            stored = self._store(page)
+            if page:
+                self._set_cursor(HEAD, *_tx_position(page[0]))
+                oldest = _tx_position(page[-1])
+                self._set_cursor(TAIL, 0 if exhausted else oldest[0], None if exhausted else oldest[1])
+            db.session.commit()
+            return stored
+
+        start = (fill.lt, fill.tx_hash) if fill is not None else None
+        newest = None
+        collected = []
+        reached = False
+        for _ in range(INDEXER_MAX_PAGES):
+            page, exhausted = self._fetch_page(start)
+            for raw in page:
+                if stop_lt is not None and _tx_position(raw)[0] <= stop_lt:
+                    reached = True
+                    break
+                collected.append(raw)
+            if newest is None and page:
+                newest = _tx_position(page[0])
+            if reached or exhausted or not page:
+                reached = True
+                break
+            start = _tx_position(page[-1])
+
+        stored = self._store(collected)
+        if reached:
+            if fill is not None:
+                top = self._get_cursor(FILL_TOP)
+                self._set_cursor(HEAD, top.lt, top.tx_hash)
+                self._delete_cursor(FILL)
+                self._delete_cursor(FILL_TOP)
+            elif collected:
+                self._set_cursor(HEAD, *_tx_position(collected[0]))
+        else:
+            if fill is None:
+                self._set_cursor(FILL_TOP, *newest)
+            self._set_cursor(FILL, *start)
+            print(f"⏩ Pool indexer catching up (fill cursor at lt {start[0]})")
+        db.session.commit()
+        return stored
+
+    def backfill(self, max_pages: int = BACKFILL_PAGES) -> int:
+        """
+        Index older history below the tail cursor (archival nodes)
+
+        Returns:
+            Number of stored messages
+        """
+        tail = self._get_cursor(TAIL)
+        if tail is None or not tail.lt or max_pages <= 0:
+            return 0
+
+        start = (tail.lt, tail.tx_hash)
+        stored = 0
+        done = False
+        for _ in range(max_pages):
+            page, exhausted = self._fetch_page(start, archival=True)
+            stored += self._store(page)
+            if page:
+                start = _tx_position(page[-1])
+            if exhausted or not page:
+                done = True
+                break
+
+        if done:
+            self._set_cursor(TAIL, 0, None)
+            print("✅ Pool indexer backfill complete")
+        else:
+            self._set_cursor(TAIL, *start)
+        db.session.commit()
+        return stored
+
+    def run_once(self) -> Dict:
+        """Forward sync, then a bounded backfill step"""
+        with self._lock:
+            return {
+                "forward": self.sync_forward(),
+                "backfill": self.backfill(),
+            }
+
+    def is_ready(self) -> bool:
+        """True once the indexer has a head checkpoint"""
+        return self._get_cursor(HEAD) is not None
+
+    def state(self) -> Dict:
+        """Cursor positions and row count (for health checks)"""
+        cursors = {name: self._get_cursor(name) for name in (HEAD, FILL, TAIL)}
+        return {
+            "pool_address": self.pool_address,
+            "head_lt": cursors[HEAD].lt if cursors[HEAD] else None,
+            "fill_lt": cursors[FILL].lt if cursors[FILL] else None,
+            "tail_lt": cursors[TAIL].lt if cursors[TAIL] else None,
+            "backfill_complete": bool(cursors[TAIL] is not None and not cursors[TAIL].lt),
+            "messages": PoolMessage.query.count(),
+        }
+
+
+def get_user_messages(user_address: str, limit: int = 10) -> List[Dict]:
+    """
+    Latest deposit/withdraw messages of a wallet from the local index
+
+    Args:
+        user_address: Адреса користувача (raw або user-friendly)
+        limit: Кількість записів
+
+    Returns:
+        List у форматі PoolService.get_user_transactions
+    """
+    rows = PoolMessage.query.filter(
+        PoolMessage.sender == normalize_address(user_address)
+    ).order_by(PoolMessage.lt.desc()).limit(limit).all()
+    return [row.to_dict() for row in rows]
+
+
+def get_user_totals(user_address: str) -> Dict:
+    """
+    Per-wallet totals from the local index (one grouped query)
+
+    Withdraw messages only carry the gas fee, so withdrawals are counted, not summed.
+    """
+    rows = db.session.query(
+        PoolMessage.kind,
+        func.count(PoolMessage.id),
+        func.coalesce(func.sum(PoolMessage.value_nanoton), 0),
+        func.max(PoolMessage.utime)
+    ).filter(
+        PoolMessage.sender == normalize_address(user_address)
+    ).group_by(PoolMessage.kind).all()
+
+    by_kind = {kind: (count, total, last) for kind, count, total, last in rows}
+    deposits = by_kind.get("deposit", (0, 0, None))
+    withdraws = by_kind.get("withdraw", (0, 0, None))
+    last_activity = max((r[2] for r in (deposits, withdraws) if r[2]), default=None)
+    return {
+        "user_address": user_address,
+        "deposits": deposits[0],
+        "deposited_ton": int(deposits[1]) / 1_000_000_000,
+        "withdraw_requests": withdraws[0],
+        "last_activity": last_activity.isoformat() if last_activity else None,
+    }
+
+
+# Singleton instance
+_indexer = None
+_indexer_lock = threading.Lock()
+
+def get_pool_indexer() -> PoolIndexer:
+    """Get or create the indexer for the configured pool"""
+    global _indexer
+    if _indexer is None:
+        with _indexer_lock:
+            if _indexer is None:
+                pool_address = os.getenv("POOL_CONTRACT_ADDRESS", "EQD-AKzjnXxLk8PFyVJvt9sIQW2_MqmSwi5qPfBZbhKT5bXf")
+                _indexer = PoolIndexer(TONAPIClient(testnet=False), pool_address)  # Mainnet
+    return _indexer
+
+
+def index_pool_transactions():
+    """Scheduler job: advance the pool indexer (needs app context)"""
+    try:
+        result = get_pool_indexer().run_once()
+        if result["forward"] or result["backfill"]:
+            print(f"📇 Pool indexer stored {result['forward']} new, {result['backfill']} backfilled messages")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error indexing pool transactions: {str(e)}")
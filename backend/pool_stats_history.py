@@ -0,0 +1,192 @@
+# backend/pool_stats_history.py
+"""
+Pool-stats time series
+- Raw samples: PoolStats rows appended by the pool-stats refresher
+- Rollups: minute / hour / day buckets in PoolStatsRollup, updated
+  incrementally with every sample (same DB transaction)
+- Retention: raw rows and fine-grained rollups are pruned by a periodic job
+- Range queries read a single resolution via the (resolution, bucket_start) index
+"""
+
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+from models import db, PoolStats, PoolStatsRollup
+
+load_dotenv()
+
+RESOLUTIONS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+# Retention in days (0 = keep forever). Days of day-rollups cost ~365 rows/year.
+RETENTION_DAYS = {
+    "raw": int(os.getenv("POOL_HISTORY_RAW_RETENTION_DAYS", "2")),
+    "minute": int(os.getenv("POOL_HISTORY_MINUTE_RETENTION_DAYS", "14")),
+    "hour": int(os.getenv("POOL_HISTORY_HOUR_RETENTION_DAYS", "400")),
+    "day": int(os.getenv("POOL_HISTORY_DAY_RETENTION_DAYS", "0")),
+}
+
+MAX_POINTS = int(os.getenv("POOL_HISTORY_MAX_POINTS", "1000"))
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    """Floor a timestamp to the start of its bucket"""
+    if resolution == "minute":
+        return ts.replace(second=0, microsecond=0)
+    if resolution == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+def record_sample(ts: datetime, total_pool_ton: float, apy: float):
+    """
+    Fold one pool sample into the minute/hour/day rollups
+
+    Adds the changes to db.session; the caller commits (together with the raw row).
+
+    Args:
+        ts: Sample time (UTC)
+        total_pool_ton: Pool balance in TON
+        apy: APY at sample time
+    """
+    for resolution in RESOLUTIONS:
+        start = bucket_start(ts, resolution)
+        row = PoolStatsRollup.query.filter_by(resolution=resolution, bucket_start=start).first()
+        if row is None:
+            db.session.add(PoolStatsRollup(
+                resolution=resolution,
+                bucket_start=start,
+                samples=1,
+                ton_open=total_pool_ton,
+                ton_close=total_pool_ton,
+                ton_min=total_pool_ton,
+                ton_max=total_pool_ton,
+                ton_sum=total_pool_ton,
+                apy_close=apy
+            ))
+        else:
+            row.samples += 1
+            row.ton_close = total_pool_ton
+            row.ton_min = min(row.ton_min, total_pool_ton)
+            row.ton_max = max(row.ton_max, total_pool_ton)
+            row.ton_sum += total_pool_ton
+            row.apy_close = apy
+
+
+def apply_retention(now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Delete raw samples and rollups older than their retention window
+
+    Returns:
+        Dict with deleted row counts per tier
+    """
+    now = now or datetime.utcnow()
+    deleted = {}
+
+    if RETENTION_DAYS["raw"] > 0:
+        cutoff = now - timedelta(days=RETENTION_DAYS["raw"])
+        deleted["raw"] = PoolStats.query.filter(
+            PoolStats.updated_at < cutoff
+        ).delete(synchronize_session=False)
+
+    for resolution in RESOLUTIONS:
+        days = RETENTION_DAYS[resolution]
+        if days <= 0:
+            continue
+        cutoff = now - timedelta(days=days)
+        deleted[resolution] = PoolStatsRollup.query.filter(
+            PoolStatsRollup.resolution == resolution,
+            PoolStatsRollup.bucket_start < cutoff
+        ).delete(synchronize_session=False)
+
+    db.session.commit()
+    return deleted
+
+
+def prune_pool_history():
+    """Scheduler job: apply retention policies (needs app context)"""
+    try:
+        deleted = apply_retention()
+        if any(deleted.values()):
+            print(f"🧹 Pool history pruned: {deleted}")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error pruning pool history: {str(e)}")
+
+
+def bucket_count(start: datetime, end: datetime, resolution: str) -> int:
+    """Number of buckets of a resolution that overlap [start, end)"""
+    span = (end - bucket_start(start, resolution)).total_seconds()
+    return max(math.ceil(span / RESOLUTIONS[resolution]), 1)
+
+
+def choose_resolution(start: datetime, end: datetime, max_points: int = MAX_POINTS, finest: str = "minute") -> str:
+    """
+    Pick the finest resolution (not finer than `finest`) that fits max_points
+    and is still retained for start
+
+    Raises:
+        ValueError: Even day buckets exceed max_points
+    """
+    names = list(RESOLUTIONS)
+    now = datetime.utcnow()
+    for resolution in names[names.index(finest):]:
+        days = RETENTION_DAYS[resolution]
+        retained = days <= 0 or start >= now - timedelta(days=days)
+        if retained and bucket_count(start, end, resolution) <= max_points:
+            return resolution
+    if bucket_count(start, end, "day") > max_points:
+        raise ValueError(f"range exceeds {max_points} daily points")
+    return "day"
+
+
+def query_series(
+    start: datetime,
+    end: datetime,
+    resolution: Optional[str] = None,
+    max_points: int = MAX_POINTS
+) -> Dict:
+    """
+    Chart-ready pool series for [start, end)
+
+    Args:
+        start: Range start (UTC)
+        end: Range end (UTC)
+        resolution: 'minute' | 'hour' | 'day' or None for automatic. A
+            resolution that would exceed max_points is stepped up to the next
+            coarser one (requested_resolution shows what was asked for)
+        max_points: Upper bound on points
+
+    Returns:
+        Dict with resolution and points (one indexed range query)
+
+    Raises:
+        ValueError: Range too wide even for day buckets
+    """
+    requested = resolution if resolution in RESOLUTIONS else None
+    if requested is None:
+        resolution = choose_resolution(start, end, max_points)
+    elif bucket_count(start, end, requested) > max_points:
+        resolution = choose_resolution(start, end, max_points, finest=requested)
+
+    rows = PoolStatsRollup.query.filter(
+        PoolStatsRollup.resolution == resolution,
+        PoolStatsRollup.bucket_start >= bucket_start(start, resolution),
+        PoolStatsRollup.bucket_start < end
+    ).order_by(PoolStatsRollup.bucket_start.asc()).limit(max_points).all()
+
+    return {
+        "resolution": resolution,
+        "requested_resolution": requested,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "points": [row.to_dict() for row in rows]
+    }
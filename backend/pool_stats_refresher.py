@@ -0,0 +1,237 @@
+# backend/pool_stats_refresher.py
+"""
+Background pool-stats refresher
+Pulls the pool balance and contract state on a fixed cadence, keeps an
+immutable in-memory snapshot for /api/pool/stats and appends a PoolStats
+history row (plus rollups, see pool_stats_history.py) per refresh.
+Only the process running the scheduler jobs (see set_chain_reader) talks
+to TonCenter; every other process serves the newest PoolStats row that
+process wrote. Readers never write to the DB.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+from models import db, PoolStats
+from ton_api import TONAPIClient, parse_balance_ton, build_pool_stats
+from pool_stats_history import record_sample
+
+load_dotenv()
+
+POOL_STATS_REFRESH_SECONDS = int(os.getenv("POOL_STATS_REFRESH_SECONDS", "30"))
+# A snapshot older than this is refreshed lazily by the reader (job process, e.g. the refresh job failed)
+POOL_STATS_MAX_AGE = float(os.getenv("POOL_STATS_MAX_AGE", str(POOL_STATS_REFRESH_SECONDS * 3)))
+# Other processes re-read the newest PoolStats row at most this often
+POOL_STATS_DB_MAX_AGE = float(os.getenv("POOL_STATS_DB_MAX_AGE", "5"))
+# Newest row older than this = no process runs the refresh job
+POOL_STATS_STALE_SECONDS = float(os.getenv("POOL_STATS_STALE_SECONDS", str(POOL_STATS_REFRESH_SECONDS * 10)))
+STALE_WARNING_INTERVAL = 300  # seconds between repeated stale warnings
+
+# Last-resort response when neither TonCenter nor the DB has data
+FALLBACK_POOL_STATS = {
+    "total_staked": 12345.678,
+    "total_staked_usd": 123456.78,
+    "participants_count": 42,
+    "apy": 0.097,
+    "min_stake": 0.5,
+    "status": 'active',
+    "testnet": False
+}
+
+
+class PoolStatsSnapshot:
+    """Immutable pool-stats snapshot with a pre-serialized JSON body"""
+
+    __slots__ = ("data", "body", "etag", "last_modified", "source")
+
+    def __init__(self, data: Dict, last_modified: datetime, source: str):
+        body = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        object.__setattr__(self, "data", MappingProxyType(dict(data)))
+        object.__setattr__(self, "body", body)
+        object.__setattr__(self, "etag", hashlib.sha1(body).hexdigest())
+        object.__setattr__(self, "last_modified", last_modified)
+        object.__setattr__(self, "source", source)  # "chain" | "db" | "fallback"
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PoolStatsSnapshot is immutable")
+
+
+class PoolStatsRefresher:
+    """Keeps the latest pool-stats snapshot in memory"""
+
+    def __init__(self, pool_address: str, api: TONAPIClient):
+        """
+        Args:
+            pool_address: Адреса pool контракту
+            api: TONAPIClient для мережі пулу
+        """
+        self.pool_address = pool_address
+        self.api = api
+        self._snapshot: Optional[PoolStatsSnapshot] = None
+        self._checked_at = 0.0  # monotonic time of the last successful check
+        self._refresh_lock = threading.Lock()
+        self.reads_chain = False  # True only while this process runs the scheduler jobs
+        self._stale_warned_at = None
+
+    def set_chain_reader(self, enabled: bool):
+        """Let this process (scheduler leader) fetch from TonCenter; others read the DB"""
+        with self._refresh_lock:
+            self.reads_chain = enabled
+            self._checked_at = 0.0  # Switch source on the next read
+
+    def _fetch(self) -> Dict:
+        """Read pool balance and contract state from TonCenter"""
+        info = self.api.get_address_info(self.pool_address)
+        balance = parse_balance_ton(info)
+        data = build_pool_stats(balance, self.pool_address, self.api.testnet)
+        data["contract_state"] = info.get("state", "unknown")
+        if data["contract_state"] != "active":
+            data["status"] = data["contract_state"]
+        return data
+
+    def _publish(self, data: Dict, source: str, last_modified: Optional[datetime] = None) -> PoolStatsSnapshot:
+        """Swap in a new snapshot only if the values changed (keeps ETag stable)"""
+        current = self._snapshot
+        if current is not None and current.source == source and dict(current.data) == data:
+            return current
+        snapshot = PoolStatsSnapshot(data, (last_modified or datetime.utcnow()).replace(microsecond=0), source)
+        self._snapshot = snapshot
+        return snapshot
+
+    def refresh(self, persist: bool = True) -> PoolStatsSnapshot:
+        """
+        Fetch fresh stats, publish the snapshot and append a history row
+
+        Args:
+            persist: Append a PoolStats row (requires app context)
+
+        Returns:
+            Current snapshot
+        """
+        data = self._fetch()
+        snapshot = self._publish(data, "chain")
+        self._checked_at = time.monotonic()
+
+        if persist:
+            try:
+                now = datetime.utcnow()
+                db.session.add(PoolStats(
+                    total_pool_ton=data["total_staked"],
+                    total_jettons=0.0,
+                    apy=data["apy"],
+                    updated_at=now
+                ))
+                record_sample(now, data["total_staked"], data["apy"])  # minute/hour/day rollups
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️  Pool stats history write failed: {str(e)}")
+        return snapshot
+
+    def _latest_row(self) -> Optional[PoolStats]:
+        """Newest persisted row (ix_pool_stats_updated_at), None if empty or on DB error"""
+        try:
+            return PoolStats.query.filter(PoolStats.updated_at.isnot(None)) \
+                .order_by(PoolStats.updated_at.desc()).first()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️  Pool stats DB read failed: {str(e)}")
+            return None
+
+    def _publish_row(self, row: PoolStats) -> PoolStatsSnapshot:
+        data = build_pool_stats(row.total_pool_ton or 0.0, self.pool_address, self.api.testnet)
+        data["apy"] = row.apy if row.apy else data["apy"]
+        return self._publish(data, "db", row.updated_at)
+
+    def _warn_if_stale(self, updated_at: Optional[datetime]):
+        """Loud, rate-limited warning when nobody has written pool stats for a while"""
+        if updated_at is not None and datetime.utcnow() - updated_at < timedelta(seconds=POOL_STATS_STALE_SECONDS):
+            self._stale_warned_at = None
+            return
+        now = time.monotonic()
+        if self._stale_warned_at is not None and now - self._stale_warned_at < STALE_WARNING_INTERVAL:
+            return
+        self._stale_warned_at = now
+        age = f"since {updated_at.isoformat()}Z" if updated_at else "ever"
+        print(f"🚨 No pool stats written {age}: no process is running the background jobs "
+              f"(start worker.py or set WEB_RUN_SCHEDULER=1). Transaction monitor and emails are stopped too.")
+
+    def _load_latest(self) -> PoolStatsSnapshot:
+        """Publish the newest row written by the job process (no TonCenter call)"""
+        row = self._latest_row()
+        self._checked_at = time.monotonic()
+        self._warn_if_stale(row.updated_at if row is not None else None)
+        if row is not None:
+            return self._publish_row(row)
+        return self._snapshot or self._publish(dict(FALLBACK_POOL_STATS), "fallback")
+
+    def _fallback(self) -> PoolStatsSnapshot:
+        """Serve the latest persisted row, or static data if the DB is empty"""
+        if self._snapshot is not None:
+            return self._snapshot
+        row = self._latest_row()
+        if row is not None:
+            return self._publish_row(row)
+        return self._publish(dict(FALLBACK_POOL_STATS), "fallback")
+
+    def get_snapshot(self) -> PoolStatsSnapshot:
+        """
+        Snapshot for readers
+
+        In the job process the scheduler keeps it fresh; if it is missing or
+        older than POOL_STATS_MAX_AGE, one reader refreshes it from TonCenter
+        (without writing history). Other processes reload the newest PoolStats
+        row every POOL_STATS_DB_MAX_AGE instead. Concurrent readers get the
+        stale copy meanwhile.
+        """
+        max_age = POOL_STATS_MAX_AGE if self.reads_chain else POOL_STATS_DB_MAX_AGE
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < max_age:
+            return snapshot
+
+        if not self._refresh_lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < max_age:
+                return self._snapshot
+            if not self.reads_chain:
+                return self._load_latest()
+            try:
+                return self.refresh(persist=False)
+            except Exception as e:
+                print(f"Error fetching real pool stats: {str(e)}")
+                # Retry upstream after one refresh interval, not on every request
+                self._checked_at = time.monotonic() - POOL_STATS_MAX_AGE + POOL_STATS_REFRESH_SECONDS
+                return self._fallback()
+        finally:
+            self._refresh_lock.release()
+
+
+# Singleton instance
+_refresher = None
+_refresher_lock = threading.Lock()
+
+def get_pool_stats_refresher() -> PoolStatsRefresher:
+    """Get or create the pool-stats refresher for the configured pool"""
+    global _refresher
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                pool_address = os.getenv("POOL_CONTRACT_ADDRESS", "EQD-AKzjnXxLk8PFyVJvt9sIQW2_MqmSwi5qPfBZbhKT5bXf")
+                _refresher = PoolStatsRefresher(pool_address, TONAPIClient(testnet=False))  # Mainnet
+    return _refresher
+
+
+def refresh_pool_stats():
+    """Scheduler job: refresh the snapshot and append history (needs app context)"""
+    try:
+        get_pool_stats_refresher().refresh(persist=True)
+    except Exception as e:
+        print(f"❌ Error refreshing pool stats: {str(e)}")
@@ -0,0 +1,174 @@
+# backend/rate_limiter.py
+"""
+Client-side token-bucket rate limiter for TonCenter
+- Rate matches the configured API key tier (TONCENTER_RPS overrides)
+- Callers queue briefly for a token instead of failing
+- Adaptive: halves the rate on HTTP 429, recovers additively on success (AIMD)
+Works for both threads (acquire) and asyncio (acquire_async).
+"""
+
+import os
+import time
+import asyncio
+import threading
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# TonCenter tiers: no key = 1 rps, free key = 10 rps
+_DEFAULT_RPS = "10" if os.getenv("TONCENTER_API_KEY") else "1"
+TONCENTER_RPS = float(os.getenv("TONCENTER_RPS", _DEFAULT_RPS))
+TONCENTER_BURST = float(os.getenv("TONCENTER_BURST", str(max(TONCENTER_RPS, 1))))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("TONCENTER_MAX_QUEUE_WAIT", "5"))  # Seconds a caller may queue
+MIN_RATE_FRACTION = 0.1  # Never throttle below 10% of the tier rate
+RECOVERY_STEP_FRACTION = 0.05  # Each success restores 5% of the tier rate
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a caller would have to queue longer than max_wait"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with reservations
+
+    A caller reserves the next token (the balance may go negative) and sleeps
+    until that token is due, so waiters are served in arrival order.
+    """
+
+    def __init__(
+        self,
+        rate: float = TONCENTER_RPS,
+        burst: float = TONCENTER_BURST,
+        max_wait: float = RATE_LIMIT_MAX_WAIT,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = max(rate * MIN_RATE_FRACTION, 0.01)
+        self.burst = burst
+        self.max_wait = max_wait
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {
+            "acquired": 0,
+            "queued": 0,  # Acquisitions that had to wait
+            "timeouts": 0,
+            "throttle_events": 0,  # 429 responses seen
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "total_wait": 0.0,
+            "max_wait_seen": 0.0,
+        }
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self, max_wait: Optional[float]) -> float:
+        """Reserve one token and return how long the caller must wait for it"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            if wait > max_wait:
+                self._tokens += 1  # Give the reservation back
+                self._stats["timeouts"] += 1
+                raise RateLimitExceeded(
+                    f"TonCenter rate limit: queue wait {wait:.2f}s exceeds {max_wait:.2f}s"
+                )
+            self._stats["acquired"] += 1
+            if wait > 0:
+                self._stats["queued"] += 1
+                self._stats["queue_depth"] += 1
+                self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._stats["queue_depth"])
+                self._stats["total_wait"] += wait
+                self._stats["max_wait_seen"] = max(self._stats["max_wait_seen"], wait)
+            return wait
+
+    def _release_waiter(self):
+        with self._lock:
+            self._stats["queue_depth"] -= 1
+
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """
+        Block until a token is available
+
+        Args:
+            max_wait: Max seconds to queue (default: TONCENTER_MAX_QUEUE_WAIT)
+
+        Returns:
+            Seconds waited
+
+        Raises:
+            RateLimitExceeded if the wait would exceed max_wait
+        """
+        wait = self._reserve(max_wait)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._release_waiter()
+        return wait
+
+    async def acquire_async(self, max_wait: Optional[float] = None) -> float:
+        """Async variant of acquire() (does not block the event loop)"""
+        wait = self._reserve(max_wait)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._release_waiter()
+        return wait
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        """
+        Upstream returned 429: halve the rate and drain the burst
+
+        Args:
+            retry_after: Seconds from the Retry-After header, if any
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._tokens -= retry_after * self.rate
+            self._stats["throttle_events"] += 1
+        print(f"⚠️  TonCenter 429: rate lowered to {self.rate:.2f} rps")
+
+    def on_success(self):
+        """Upstream accepted a request: recover the rate additively"""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP_FRACTION)
+
+    def stats(self) -> Dict:
+        """Rate, queue depth and wait-time metrics"""
+        with self._lock:
+            data = dict(self._stats)
+            data["rate"] = round(self.rate, 3)
+            data["max_rate"] = self.max_rate
+            data["burst"] = self.burst
+            data["tokens"] = round(self._tokens, 3)
+        data["total_wait"] = round(data["total_wait"], 3)
+        data["max_wait_seen"] = round(data["max_wait_seen"], 3)
+        data["avg_wait"] = round(data["total_wait"] / data["queued"], 4) if data["queued"] else 0.0
+        return data
+
+
+# Singleton instance
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> TokenBucket:
+    """Get or create the process-wide TonCenter rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = TokenBucket()
+    return _rate_limiter
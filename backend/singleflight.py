@@ -0,0 +1,98 @@
+# backend/singleflight.py
+"""
+Request coalescing (single-flight) for upstream TON API calls
+Concurrent callers asking for the same key share one in-flight call:
+the first caller (leader) executes it, the rest wait and receive the same
+result or exception.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Thread-safe single-flight group"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,  # Total do() invocations
+            "executed": 0,  # Upstream calls actually made
+            "coalesced": 0,  # Callers that piggybacked on an in-flight call
+            "in_flight": 0,
+        }
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Execute fn once per key among concurrent callers
+
+        Args:
+            key: Hashable identity of the call (e.g. (url, method, params))
+            fn: Zero-argument callable doing the real work
+
+        Returns:
+            fn() result (shared by all callers of the same flight)
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executed"] += 1
+                self._stats["in_flight"] += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e  # Incl. SystemExit (worker timeout): followers must not get None as a result
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                self._stats["in_flight"] -= 1
+            call.event.set()
+
+    def stats(self) -> Dict:
+        """Coalescing counters"""
+        with self._lock:
+            data = dict(self._stats)
+        data["coalesced_ratio"] = round(data["coalesced"] / data["calls"], 4) if data["calls"] else 0.0
+        return data
+
+
+# Singleton instance
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+def get_single_flight() -> SingleFlight:
+    """Get or create the process-wide single-flight group for TON API calls"""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
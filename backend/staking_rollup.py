@@ -0,0 +1,132 @@
+# backend/staking_rollup.py
+"""
+Daily staking activity rollup
+- One DailyStakingRollup row per UTC day: stakes count/volume, unstakes
+  count, distinct active users (days without activity are stored as zeros)
+- A periodic job recomputes the open days (yesterday and today) with
+  created_at range scans; on first run it backfills from the first transaction
+- Trend queries read any date range with one primary-key range scan
+"""
+
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import func
+
+from models import db, DailyStakingRollup, Transaction
+
+load_dotenv()
+
+ROLLUP_INTERVAL_SECONDS = int(os.getenv("STAKING_ROLLUP_INTERVAL_SECONDS", "300"))
+ROLLUP_LOOKBACK_DAYS = int(os.getenv("STAKING_ROLLUP_LOOKBACK_DAYS", "1"))  # Closed days re-checked for late rows
+ROLLUP_MAX_DAYS_PER_RUN = int(os.getenv("STAKING_ROLLUP_MAX_DAYS_PER_RUN", "400"))  # Backfill chunk
+TRENDS_MAX_DAYS = int(os.getenv("STAKING_TRENDS_MAX_DAYS", "1100"))
+
+
+def day_bounds(day: date):
+    """[start, end) datetimes of a UTC day (index-friendly, no cast on created_at)"""
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def compute_day(day: date) -> Dict:
+    """
+    Aggregate one day of transactions
+
+    Returns:
+        Dict with stake_count, stake_volume, unstake_count, active_users
+    """
+    start, end = day_bounds(day)
+    in_day = (Transaction.created_at >= start, Transaction.created_at < end)
+
+    values = {"stake_count": 0, "stake_volume": 0.0, "unstake_count": 0}
+    rows = db.session.query(
+        Transaction.type,
+        func.count(Transaction.id),
+        func.coalesce(func.sum(Transaction.amount), 0)
+    ).filter(*in_day).group_by(Transaction.type).all()
+    for tx_type, count, volume in rows:
+        if tx_type == "stake":
+            values["stake_count"] = count
+            values["stake_volume"] = float(volume)
+        elif tx_type == "unstake":
+            values["unstake_count"] = count
+
+    values["active_users"] = db.session.query(
+        func.count(func.distinct(Transaction.user_id))
+    ).filter(*in_day, Transaction.type.in_(("stake", "unstake"))).scalar() or 0
+    return values
+
+
+def refresh_daily_rollups(now: Optional[datetime] = None) -> int:
+    """
+    Recompute open days and backfill missing history
+
+    Returns:
+        Number of day rows written
+    """
+    today = (now or datetime.utcnow()).date()
+    last_day = db.session.query(func.max(DailyStakingRollup.day)).scalar()
+    if last_day is None:
+        first_created = db.session.query(func.min(Transaction.created_at)).scalar()
+        start = first_created.date() if first_created else today
+    else:
+        start = min(last_day, today) - timedelta(days=ROLLUP_LOOKBACK_DAYS)
+    end = min(today, start + timedelta(days=ROLLUP_MAX_DAYS_PER_RUN - 1))
+
+    written = 0
+    day = start
+    while day <= end:
+        row = db.session.get(DailyStakingRollup, day)
+        if row is None:
+            row = DailyStakingRollup(day=day)
+            db.session.add(row)
+        for field, value in compute_day(day).items():
+            setattr(row, field, value)
+        written += 1
+        day += timedelta(days=1)
+
+    db.session.commit()
+    return written
+
+
+def rollup_staking_activity():
+    """Scheduler job: refresh daily staking rollups (needs app context)"""
+    try:
+        written = refresh_daily_rollups()
+        if written > ROLLUP_LOOKBACK_DAYS + 1:
+            print(f"📊 Staking rollup backfilled {written} days")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error refreshing staking rollup: {str(e)}")
+
+
+def query_trends(start: date, end: date) -> List[Dict]:
+    """
+    Daily staking trends for [start, end] (inclusive, UTC days)
+
+    Args:
+        start: First day
+        end: Last day
+
+    Returns:
+        One entry per day; days not rolled up yet are returned as zeros
+    """
+    rows = DailyStakingRollup.query.filter(
+        DailyStakingRollup.day >= start,
+        DailyStakingRollup.day <= end
+    ).order_by(DailyStakingRollup.day.asc()).all()
+    by_day = {row.day: row.to_dict() for row in rows}
+
+    trends = []
+    day = start
+    while day <= end:
+        trends.append(by_day.get(day) or {
+            "date": day.isoformat(),
+            "stakes": {"count": 0, "volume": 0.0},
+            "unstakes": {"count": 0},
+            "active_users": 0
+        })
+        day += timedelta(days=1)
+    return trends
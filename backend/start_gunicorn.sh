@@ -19,15 +19,16 @@ echo "Working directory: $(pwd)"
 echo "Python: $(python --version)"
 echo "Gunicorn: $(gunicorn --version)"
 echo "Port: ${PORT:-8000}"
-echo "Workers: 1 (single worker)"
+echo "Workers: ${GUNICORN_WORKERS:-2} (${GUNICORN_THREADS:-32} threads each, scheduler runs in the elected leader)"
 echo "================================"
 echo ""
 
 # Start gunicorn from the backend directory
 exec gunicorn \
   --bind 0.0.0.0:${PORT:-8000} \
-  --workers 1 \
-  --worker-class sync \
+  --workers ${GUNICORN_WORKERS:-2} \
+  --worker-class gthread \
+  --threads ${GUNICORN_THREADS:-32} \
   --timeout 120 \
   --access-logfile - \
   --error-logfile - \
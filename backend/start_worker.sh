@@ -0,0 +1,23 @@
+#!/bin/bash
+# Background worker startup script for TON Staking Pool
+# Runs scheduler jobs (monitor, pool stats, indexer, rollups) outside gunicorn
+
+set -e
+
+# Get the directory where this script is located (backend directory)
+SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
+
+# Change to backend directory
+cd "$SCRIPT_DIR"
+
+# Log startup info
+echo "================================"
+echo "⚙️  TON Staking Pool Worker Starting"
+echo "================================"
+echo "Working directory: $(pwd)"
+echo "Python: $(python --version)"
+echo "Job threads: ${SCHEDULER_THREADS:-8}"
+echo "================================"
+echo ""
+
+exec python worker.py
@@ -0,0 +1,282 @@
+# backend/stat_counters.py
+"""
+Incrementally maintained counters for admin / analytics metrics
+Rows in stat_counters (one per key) hold a count and an amount total:
+- tx:<status>:<type>      transactions and volume by status and type
+- tx_locked               transactions created with a withdrawal lock
+- users:<subscription>    users by subscription status
+ORM changes to Transaction / User rows are applied in the same flush by a
+before_flush hook (execute_stake, execute_unstake, update_status, Stripe
+webhook, registration). Bulk UPDATEs call apply_deltas() explicitly.
+rebuild_counters() recomputes everything from the base tables and sets
+the INITIALIZED_KEY marker row. The scheduler runs it at start (the
+initial rebuild after deploy) and every COUNTERS_RECONCILE_HOURS to
+correct drift (e.g. rows changed by scripts that do not import this
+module). Until the marker exists (hook deltas written right after the
+deploy are partial) readers aggregate the base tables instead; they never
+lock or commit.
+"""
+
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import case, event, func, inspect, text
+from sqlalchemy.orm import Session
+
+from models import db, StatCounter, Transaction, User
+
+load_dotenv()
+
+COUNTERS_RECONCILE_HOURS = float(os.getenv("COUNTERS_RECONCILE_HOURS", "24"))
+LOCKED_KEY = "tx_locked"
+INITIALIZED_KEY = "meta:initialized"  # Written by rebuild_counters(); counters are partial without it
+
+
+def tx_key(status: str, tx_type: str) -> str:
+    return f"tx:{status}:{tx_type}"
+
+
+def user_key(subscription_status: str) -> str:
+    return f"users:{subscription_status}"
+
+
+def _upsert_statement(dialect: str, key: str, count: int, total: float, now: datetime, absolute: bool = False):
+    """INSERT ... ON CONFLICT adding to (or, if absolute, replacing) the stored values"""
+    table = StatCounter.__table__
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    stmt = insert(table).values(key=key, count=count, total=total, updated_at=now)
+    if absolute:
+        return stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={"count": count, "total": total, "updated_at": now},
+        )
+    return stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"count": StatCounter.count + count, "total": StatCounter.total + total, "updated_at": now},
+    )
+
+
+def _set_value(connection, key: str, count: int, total: float, now: datetime):
+    """Set one counter to an absolute value (upsert)"""
+    stmt = _upsert_statement(connection.dialect.name, key, count, total, now, absolute=True)
+    if stmt is not None:
+        connection.execute(stmt)
+        return
+    table = StatCounter.__table__
+    result = connection.execute(
+        table.update().where(StatCounter.key == key).values(count=count, total=total, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(key=key, count=count, total=total, updated_at=now))
+
+
+def apply_deltas(connection, deltas: Dict[str, Tuple[int, float]]):
+    """
+    Add (count, total) deltas to counters with one atomic upsert per key
+
+    Args:
+        connection: Connection of the current transaction (commits with it)
+        deltas: key -> (count delta, total delta)
+    """
+    table = StatCounter.__table__
+    now = datetime.utcnow()
+    for key, (count, total) in deltas.items():
+        if not count and not total:
+            continue
+        stmt = _upsert_statement(connection.dialect.name, key, count, total, now)
+        if stmt is not None:
+            connection.execute(stmt)
+            continue
+        result = connection.execute(
+            table.update().where(StatCounter.key == key).values(
+                count=StatCounter.count + count, total=StatCounter.total + total, updated_at=now
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(key=key, count=count, total=total, updated_at=now))
+
+
+def _old_value(obj, attr: str):
+    """Value before the pending change (current value if unchanged)"""
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, attr)
+
+
+def _changed(obj, *attrs) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+def _collect_deltas(session) -> Dict[str, Tuple[int, float]]:
+    deltas = defaultdict(lambda: [0, 0.0])
+
+    def add(key, count, total=0.0):
+        deltas[key][0] += count
+        deltas[key][1] += total
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            add(tx_key(obj.status or "pending", obj.type), 1, obj.amount or 0.0)
+            if obj.is_locked:
+                add(LOCKED_KEY, 1)
+        elif isinstance(obj, User):
+            add(user_key(obj.subscription_status or "inactive"), 1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and _changed(obj, "status", "type", "amount", "is_locked"):
+            add(tx_key(_old_value(obj, "status"), _old_value(obj, "type")), -1, -(_old_value(obj, "amount") or 0.0))
+            add(tx_key(obj.status, obj.type), 1, obj.amount or 0.0)
+            add(LOCKED_KEY, int(bool(obj.is_locked)) - int(bool(_old_value(obj, "is_locked"))))
+        elif isinstance(obj, User) and _changed(obj, "subscription_status"):
+            add(user_key(_old_value(obj, "subscription_status")), -1)
+            add(user_key(obj.subscription_status), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            add(tx_key(_old_value(obj, "status"), _old_value(obj, "type")), -1, -(_old_value(obj, "amount") or 0.0))
+            if _old_value(obj, "is_locked"):
+                add(LOCKED_KEY, -1)
+        elif isinstance(obj, User):
+            add(user_key(_old_value(obj, "subscription_status")), -1)
+
+    return {key: (count, total) for key, (count, total) in deltas.items()}
+
+
+@event.listens_for(Session, "before_flush")
+def _track_counter_changes(session, flush_context, instances):
+    """Apply counter deltas for ORM changes in the same transaction"""
+    deltas = _collect_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def status_change_deltas(rows: Iterable[Tuple[str, float]], old_status: str, new_status: str) -> Dict[str, Tuple[int, float]]:
+    """
+    Deltas for a bulk status change
+
+    Args:
+        rows: (type, amount) of every row the UPDATE actually changed
+    """
+    deltas = defaultdict(lambda: [0, 0.0])
+    for tx_type, amount in rows:
+        amount = amount or 0.0
+        deltas[tx_key(old_status, tx_type)][0] -= 1
+        deltas[tx_key(old_status, tx_type)][1] -= amount
+        deltas[tx_key(new_status, tx_type)][0] += 1
+        deltas[tx_key(new_status, tx_type)][1] += amount
+    return {key: (count, total) for key, (count, total) in deltas.items()}
+
+
+def read_counters() -> Dict[str, Tuple[int, float]]:
+    """
+    All counters (one primary-key scan of a small table)
+
+    Until the first rebuild_counters() (scheduler start) has set the marker,
+    the values are aggregated live from the base tables instead, since the
+    hook may already have written partial delta rows.
+    """
+    rows = db.session.query(StatCounter.key, StatCounter.count, StatCounter.total).all()
+    if not any(key == INITIALIZED_KEY for key, _, _ in rows):
+        return compute_counters()
+    return {key: (count, total) for key, count, total in rows if key != INITIALIZED_KEY}
+
+
+def count_transactions(status: Optional[str] = None, tx_type: Optional[str] = None) -> int:
+    """Transaction count for an optional status / type filter (from counters)"""
+    total = 0
+    for key, (count, _) in read_counters().items():
+        if not key.startswith("tx:"):
+            continue
+        _, key_status, key_type = key.split(":", 2)
+        if (status is None or key_status == status) and (tx_type is None or key_type == tx_type):
+            total += count
+    return total
+
+
+def count_users() -> int:
+    """Total users (from counters)"""
+    return sum(count for key, (count, _) in read_counters().items() if key.startswith("users:"))
+
+
+def compute_counters() -> Dict[str, Tuple[int, float]]:
+    """Counter values aggregated from transactions and users (read only)"""
+    values: Dict[str, Tuple[int, float]] = {}
+    tx_rows = db.session.query(
+        Transaction.status,
+        Transaction.type,
+        func.count(Transaction.id),
+        func.coalesce(func.sum(Transaction.amount), 0),
+        func.coalesce(func.sum(case((Transaction.is_locked.is_(True), 1), else_=0)), 0)
+    ).group_by(Transaction.status, Transaction.type).all()
+    locked = 0
+    for status, tx_type, count, volume, locked_count in tx_rows:
+        values[tx_key(status, tx_type)] = (count, float(volume))
+        locked += int(locked_count)
+    values[LOCKED_KEY] = (locked, 0.0)
+
+    user_rows = db.session.query(
+        User.subscription_status, func.count(User.id)
+    ).group_by(User.subscription_status).all()
+    for subscription_status, count in user_rows:
+        values[user_key(subscription_status)] = (count, 0.0)
+    return values
+
+
+def rebuild_counters() -> Dict[str, Tuple[int, float]]:
+    """
+    Recompute all counters from transactions and users (reconciliation)
+
+    On PostgreSQL the counters table is locked (EXCLUSIVE) before the
+    aggregates are read: writers that already touched a counter finish
+    first, later ones wait and add their deltas on top of the new values,
+    so no increment is lost. Keys are corrected in place (no delete).
+
+    Returns:
+        New counter values
+    """
+    connection = db.session.connection()
+    if connection.dialect.name == "postgresql":
+        schema = StatCounter.__table__.schema
+        name = f"{schema}.{StatCounter.__tablename__}" if schema else StatCounter.__tablename__
+        connection.execute(text(f"LOCK TABLE {name} IN EXCLUSIVE MODE"))
+
+    values = compute_counters()
+    now = datetime.utcnow()
+    stale = [key for (key,) in db.session.query(StatCounter.key).all() if key not in values and key != INITIALIZED_KEY]
+    if stale:
+        db.session.execute(
+            StatCounter.__table__.update().where(StatCounter.key.in_(stale)).values(count=0, total=0.0, updated_at=now)
+        )
+    for key, (count, total) in values.items():
+        _set_value(connection, key, count, total, now)
+    _set_value(connection, INITIALIZED_KEY, 1, 0.0, now)
+    db.session.commit()
+    return values
+
+
+def reconcile_counters():
+    """Scheduler job: rebuild counters and report drift (needs app context)"""
+    try:
+        before = {key: value for key, value in db.session.query(
+            StatCounter.key, StatCounter.count
+        ).filter(StatCounter.key != INITIALIZED_KEY).all()}
+        after = rebuild_counters()
+        drift = {key: after.get(key, (0, 0.0))[0] - before.get(key, 0)
+                 for key in set(before) | set(after)
+                 if after.get(key, (0, 0.0))[0] != before.get(key, 0)}
+        if drift:
+            print(f"🔧 Stat counters reconciled, drift: {drift}")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error reconciling stat counters: {str(e)}")
@@ -6,12 +6,235 @@ TON Blockchain API Integration
 
 import os
 import json
+import base64
+import binascii
+import threading
 import requests
+from decimal import Decimal, ROUND_HALF_UP
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, Optional, List
 from dotenv import load_dotenv
 
+from http_session import http_get, THROTTLE_RETRIES
+from rate_limiter import get_rate_limiter
+from ton_cache import get_ton_cache, TTLCache
+from singleflight import get_single_flight
+
 load_dotenv()
 
+NANOTON = 1_000_000_000
+WITHDRAW_GAS_FEE_NANOTON = 50_000_000  # 0.05 TON sent with op=2 withdraw requests
+
+
+def ton_to_nanoton(amount_ton) -> int:
+    """
+    TON -> nanoton, exact for decimal input (2.01 -> 2010000000, not 2009999999)
+    Used for the value sent on-chain and for matching it back (tx_confirmation.py)
+    """
+    return int((Decimal(str(amount_ton or 0)) * NANOTON).to_integral_value(rounding=ROUND_HALF_UP))
+
+# Parallel fan-out for per-user lookups (shared by all PoolService instances)
+FANOUT_MAX_WORKERS = int(os.getenv("TON_FANOUT_WORKERS", "16"))
+BALANCE_DEADLINE = float(os.getenv("TON_BALANCE_DEADLINE", "8"))
+
+_fanout_executor = None
+_fanout_lock = threading.Lock()
+
+def _get_fanout_executor() -> ThreadPoolExecutor:
+    """Bounded thread pool for concurrent TonCenter lookups"""
+    global _fanout_executor
+    if _fanout_executor is None:
+        with _fanout_lock:
+            if _fanout_executor is None:
+                _fanout_executor = ThreadPoolExecutor(
+                    max_workers=FANOUT_MAX_WORKERS,
+                    thread_name_prefix="ton-fanout"
+                )
+    return _fanout_executor
+
+
+def parse_stack_ton(result: Dict) -> float:
+    """
+    Витягнути перше числове значення зі стеку get-методу і перевести в TON
+    
+    TonCenter повертає числа у стеку як hex: [["num", "0x1dcd6500"], ...]
+    
+    Args:
+        result: Відповідь runGetMethod
+        
+    Returns:
+        Значення в TON або 0.0 якщо стек порожній
+    """
+    if result and "stack" in result:
+        stack = result["stack"]
+        if len(stack) > 0:
+            entry = stack[0]
+            if len(entry) > 1:
+                value = entry[1]
+                if isinstance(value, str):
+                    value = int(value, 16) if value.lstrip("-").startswith("0x") else int(value)
+                return int(value) / NANOTON
+    return 0.0
+
+def normalize_address(address: str) -> str:
+    """
+    Привести TON адресу до raw формату "wc:hex" для порівняння
+    
+    Приймає raw ("0:abc...") або user-friendly (base64/base64url, 48 символів)
+    форму. Невідомі формати повертаються без змін.
+    """
+    if not address:
+        return ""
+    if ":" in address:
+        wc, _, account = address.partition(":")
+        return f"{int(wc)}:{account.lower()}"
+    try:
+        raw = base64.urlsafe_b64decode(address.replace("+", "-").replace("/", "_") + "=" * (-len(address) % 4))
+    except (binascii.Error, ValueError):
+        return address
+    if len(raw) != 36:
+        return address
+    workchain = raw[1] - 256 if raw[1] > 127 else raw[1]
+    return f"{workchain}:{raw[2:34].hex()}"
+
+
+def normalize_hash(value: str) -> str:
+    """
+    Привести хеш транзакції/повідомлення до lowercase hex
+    
+    TonCenter v2 повертає base64, TonScan використовує hex/base64url.
+    """
+    if not value:
+        return ""
+    if len(value) == 64:
+        try:
+            bytes.fromhex(value)
+            return value.lower()
+        except ValueError:
+            pass
+    try:
+        raw = base64.urlsafe_b64decode(value.replace("+", "-").replace("/", "_") + "=" * (-len(value) % 4))
+    except (binascii.Error, ValueError):
+        return value
+    return raw.hex() if len(raw) == 32 else value
+
+
+def toncenter_base_url(testnet: bool) -> str:
+    """Базовий URL TonCenter API v2 для мережі"""
+    return (
+        "https://testnet.toncenter.com/api/v2"
+        if testnet
+        else "https://toncenter.com/api/v2"
+    )
+
+
+def build_request_headers(api_key: str) -> Dict:
+    """HTTP заголовки для запитів до TonCenter"""
+    headers = {
+        "User-Agent": "TON-Pool-Backend/1.0"
+    }
+    if api_key:
+        headers["X-API-Key"] = api_key
+    return headers
+
+
+def parse_api_response(data: Dict) -> Dict:
+    """
+    Розпакувати JSON відповідь TonCenter ({"ok": bool, "result": ..., "error": ...})
+    
+    Raises:
+        Exception якщо ok=false
+    """
+    if not data.get("ok"):
+        raise Exception(f"API error: {data.get('error', 'Unknown error')}")
+    return data.get("result", {})
+
+
+def parse_balance_ton(info: Dict) -> float:
+    """Баланс з відповіді getAddressInformation у TON (не в nanoton)"""
+    balance_nanoton = int(info.get("balance", 0))
+    return balance_nanoton / NANOTON
+
+
+def build_run_get_method_params(address: str, method: str, stack: List = None) -> Dict:
+    """
+    Параметри для runGetMethod
+    
+    TonCenter очікує stack у форматі JSON: [["num", "123"], ["slice", "..."], ...]
+    """
+    params = {
+        "address": address,
+        "method": method
+    }
+    if stack:
+        params["stack"] = json.dumps(stack)
+    return params
+
+
+def build_pool_stats(balance: float, pool_address: str, testnet: bool) -> Dict:
+    """Сформувати відповідь get_pool_stats з балансу контракту"""
+    # TODO: Викликати get-методи контракту для отримання:
+    # - кількість учасників (nominators_count)
+    # - total staked amount
+    # - validator rewards
+    return {
+        "total_staked": balance,  # Реальний баланс контракту
+        "total_staked_usd": balance * 2.5,  # Приблизна ціна TON
+        "participants_count": 0,  # TODO: з контракту
+        "apy": 9.7,  # TODO: розрахувати з validator rewards
+        "pool_address": pool_address,
+        "status": "active",
+        "min_stake": 1,  # Змінено: 1 TON мінімум
+        "max_participants": 100000,  # Практично необмежено
+        "testnet": testnet
+    }
+
+
+def build_user_balance(user_address: str, values: Dict, errors: Dict, expected: int = 4) -> Dict:
+    """
+    Зібрати відповідь get_user_balance з результатів окремих запитів
+    
+    Args:
+        user_address: Адреса користувача
+        values: Успішні значення (wallet_balance, staked_amount, accumulated_rewards, pool_balance)
+        errors: Помилки по тих самих ключах
+        expected: Загальна кількість запитів
+        
+    Returns:
+        Dict з staked amount, rewards, jettons balance (+ "partial"/"missing" якщо є помилки)
+    """
+    staked_amount = values.get("staked_amount", 0.0)
+    total_pool_balance = values.get("pool_balance", 0.0)
+    share_percentage = (staked_amount / total_pool_balance * 100) if total_pool_balance > 0 else 0.0
+    
+    result = {
+        "user_address": user_address,
+        "wallet_balance": values.get("wallet_balance", 0),  # Реальний баланс гаманця
+        "staked_amount": staked_amount,  # Реальні дані з контракту
+        "jettons_balance": 0,  # TODO: з контракту JettonWallet
+        "accumulated_rewards": values.get("accumulated_rewards", 0.0),  # Реальні награди з контракту
+        "share_percentage": share_percentage,  # Розраховано з балансу
+    }
+    if errors:
+        result["partial"] = True
+        result["missing"] = sorted(errors.keys())
+        if len(errors) >= expected:
+            result["error"] = "; ".join(f"{k}: {v}" for k, v in errors.items())
+    return result
+
+
+def parse_user_transactions(transactions: List[Dict], pool_address: str = "") -> List[Dict]:
+    """
+    Розібрати сторінку getTransactions у формат API (deposit / withdraw / payout)
+    
+    Args:
+        transactions: Raw getTransactions items
+        pool_address: Якщо задано, залишаються тільки транзакції з пулом
+    """
+    from tx_decoder import decode_transactions  # tx_decoder imports this module
+    return decode_transactions(transactions, pool_address, only_pool=bool(pool_address))
+
+
 class TONAPIClient:
     """Клієнт для роботи з TON blockchain через TonCenter API"""
     
@@ -23,17 +246,20 @@ class TONAPIClient:
             testnet: True для testnet, False для mainnet
         """
         self.testnet = testnet
-        self.base_url = (
-            "https://testnet.toncenter.com/api/v2"
-            if testnet
-            else "https://toncenter.com/api/v2"
-        )
+        self.base_url = toncenter_base_url(testnet)
         self.api_key = os.getenv("TONCENTER_API_KEY", "")  # Опційно для більше rate limit
+        self.network = "testnet" if testnet else "mainnet"
+        self.cache = get_ton_cache()  # Shared per-process cache (TTL + stale-while-revalidate)
+        self.single_flight = get_single_flight()  # Coalesce identical concurrent calls
+        self.limiter = get_rate_limiter()  # Process-wide token bucket for the key tier
         
     def _make_request(self, method: str, params: Dict = None) -> Dict:
         """
         Виконати HTTP запит до TON API
         
+        Однакові одночасні запити (method + params) об'єднуються в один
+        upstream виклик, результат отримують усі.
+        
         Args:
             method: Назва методу API
             params: Параметри запиту
@@ -41,34 +267,42 @@ class TONAPIClient:
         Returns:
             JSON відповідь від API
         """
+        key = (self.base_url, method, json.dumps(params or {}, sort_keys=True, default=str))
+        return self.single_flight.do(key, lambda: self._send_request(method, params))
+    
+    def _send_request(self, method: str, params: Dict = None) -> Dict:
+        """
+        Один HTTP запит до TON API через shared session
+        
+        Перед кожною спробою чекає токен у rate limiter. На 429 limiter знижує
+        rate, і запит повторюється (до TON_HTTP_THROTTLE_RETRIES разів).
+        """
         url = f"{self.base_url}/{method}"
-        headers = {
-            "User-Agent": "TON-Pool-Backend/1.0"
-        }
-        if self.api_key:
-            headers["X-API-Key"] = self.api_key
+        headers = build_request_headers(self.api_key)
             
         try:
-            # Set timeout and retry logic
-            response = requests.get(
-                url, 
-                params=params or {}, 
-                headers=headers, 
-                timeout=15,
-                allow_redirects=True
-            )
+            for attempt in range(THROTTLE_RETRIES + 1):
+                self.limiter.acquire()
+                # Shared keep-alive session: connection pooling + retry with backoff on 5xx
+                response = http_get(
+                    url, 
+                    params=params or {}, 
+                    headers=headers, 
+                    timeout=15,
+                    allow_redirects=True
+                )
+                if response.status_code != 429:
+                    self.limiter.on_success()
+                    break
+                retry_after = response.headers.get("Retry-After", "")
+                self.limiter.on_throttled(float(retry_after) if retry_after.isdigit() else None)
             
             # Log response for debugging
             if response.status_code != 200:
                 print(f"API Response ({response.status_code}): {response.text[:200]}")
             
             response.raise_for_status()
-            data = response.json()
-            
-            if not data.get("ok"):
-                raise Exception(f"API error: {data.get('error', 'Unknown error')}")
-                
-            return data.get("result", {})
+            return parse_api_response(response.json())
         except requests.exceptions.RequestException as e:
             # Log full error for debugging
             print(f"API Request Error: {str(e)}")
@@ -84,7 +318,11 @@ class TONAPIClient:
         Returns:
             Dict з balance, state, last_transaction_id, etc.
         """
-        return self._make_request("getAddressInformation", {"address": address})
+        key = TTLCache.make_key(self.network, address, "getAddressInformation")
+        return self.cache.get_or_load(
+            key,
+            lambda: self._make_request("getAddressInformation", {"address": address})
+        )
     
     def get_address_balance(self, address: str) -> float:
         """
@@ -96,75 +334,43 @@ class TONAPIClient:
         Returns:
             Баланс у TON (не в nanoton)
         """
-        info = self.get_address_info(address)
-        balance_nanoton = int(info.get("balance", 0))
-        return balance_nanoton / 1_000_000_000  # Convert to TON
+        return parse_balance_ton(self.get_address_info(address))
     
-    def get_transactions(self, address: str, limit: int = 10) -> List[Dict]:
-        """
-        Отримати історію транзакцій адреси
+    def get_transactions(
+        self,
+        address: str,
+        limit: int = 10,
+        lt: Optional[int] = None,
+        tx_hash: Optional[str] = None,
+        to_lt: Optional[int] = None,
+        archival: bool = False
+    ) -> List[Dict]:
+        """
+        Отримати історію транзакцій адреси (від новіших до старіших)
         
         Args:
             address: TON адреса
             limit: Максимальна кількість транзакцій
+            lt: Почати з транзакції з цим logical time (разом з tx_hash)
+            tx_hash: Хеш транзакції для lt (base64)
+            to_lt: Зупинитись на транзакціях з lt <= to_lt
+            archival: Шукати в архівних нодах (для старої історії)
             
         Returns:
             List транзакцій
         """
-        return self._make_request("getTransactions", {
+        params = {
             "address": address,
             "limit": limit
-        })
-    
-    def check_transaction_status(self, tx_hash: str) -> Dict:
-        """
-        Перевірити статус транзакції на blockchain
-        
-        Args:
-            tx_hash: BOC хеш транзакції (Transaction ID з blockchain)
-            
-        Returns:
-            Dict з информацією про транзакцію:
-            {
-                "status": "not_found" | "pending" | "confirmed",
-                "confirmations": int,
-                "block_time": int (unix timestamp),
-                "block_height": int,
-                "fee": int (nanotons),
-                "amount": int (nanotons),
-                "from": str,
-                "to": str,
-                "message": str,
-            }
-        """
-        try:
-            # BOC transactions can be queried directly by hash
-            # We need to search for the transaction in blocks or by hash
-            # TonCenter API doesn't have direct transaction lookup by hash
-            # So we'll return "pending" status since we can't verify yet
-            # Later, we'll need to implement better verification
-            
-            # For now, we return a structure that indicates transaction is still pending
-            # In production, you'd want to implement block explorer integration
-            return {
-                "status": "pending",
-                "confirmations": 0,
-                "block_time": None,
-                "block_height": None,
-                "fee": None,
-                "amount": None,
-                "from": None,
-                "to": None,
-                "message": "Transaction status will be updated when confirmed",
-                "tx_hash": tx_hash
-            }
-        except Exception as e:
-            print(f"Error checking transaction status: {str(e)}")
-            return {
-                "status": "unknown",
-                "error": str(e),
-                "tx_hash": tx_hash
-            }
+        }
+        if lt is not None and tx_hash:
+            params["lt"] = lt
+            params["hash"] = tx_hash
+        if to_lt is not None:
+            params["to_lt"] = to_lt
+        if archival:
+            params["archival"] = "true"
+        return self._make_request("getTransactions", params)
     
     def run_get_method(self, address: str, method: str, stack: List = None) -> Dict:
         """
@@ -179,16 +385,11 @@ class TONAPIClient:
         Returns:
             Результат виконання методу з stack-ом відповідей
         """
-        params = {
-            "address": address,
-            "method": method
-        }
-        if stack:
-            # Конвертувати stack у правильний формат для TonCenter
-            # TonCenter очікує stack у форматі: [["num", "123"], ["slice", "..."], ...]
-            params["stack"] = json.dumps(stack)
-            
-        return self._make_request("runGetMethod", params)
+        params = build_run_get_method_params(address, method, stack)
+        
+        # Кешуємо по (network, address, method, stack)
+        key = TTLCache.make_key(self.network, address, method, stack)
+        return self.cache.get_or_load(key, lambda: self._make_request("runGetMethod", params))
 
 
 class PoolService:
@@ -218,24 +419,7 @@ class PoolService:
         try:
             # Баланс контракту
             balance = self.api.get_address_balance(self.pool_address)
-            
-            # TODO: Викликати get-методи контракту для отримання:
-            # - кількість учасників (nominators_count)
-            # - total staked amount
-            # - validator rewards
-            
-            # Mock дані (замінити на реальні)
-            return {
-                "total_staked": balance,  # Реальний баланс контракту
-                "total_staked_usd": balance * 2.5,  # Приблизна ціна TON
-                "participants_count": 0,  # TODO: з контракту
-                "apy": 9.7,  # TODO: розрахувати з validator rewards
-                "pool_address": self.pool_address,
-                "status": "active",
-                "min_stake": 1,  # Змінено: 1 TON мінімум
-                "max_participants": 100000,  # Практично необмежено
-                "testnet": self.api.testnet
-            }
+            return build_pool_stats(balance, self.pool_address, self.api.testnet)
         except Exception as e:
             return {
                 "error": str(e),
@@ -244,6 +428,24 @@ class PoolService:
                 "apy": 0
             }
     
+    def _get_method_ton(self, method: str, user_address: str) -> float:
+        """
+        Виконати get-метод пулу з адресою користувача і повернути перше значення стеку в TON
+
+        Args:
+            method: Назва get-методу ("get_staked", "get_rewards")
+            user_address: Адреса користувача (user-friendly)
+
+        Returns:
+            Сума в TON (помилки API не перехоплюються)
+        """
+        result = self.api.run_get_method(
+            self.pool_address,
+            method,
+            [["slice", user_address]]  # Параметр: адреса користувача
+        )
+        return parse_stack_ton(result)
+    
     def get_user_staked_amount(self, user_address: str) -> float:
         """
         Отримати скільки користувач застейкав у пулі
@@ -255,26 +457,7 @@ class PoolService:
             Сума в TON або 0 якщо користувач не в пулі
         """
         try:
-            # Виконати get-метод "get_staked" на контракту пула
-            # Метод очікує адресу користувача як параметр
-            result = self.api.run_get_method(
-                self.pool_address,
-                "get_staked",
-                [["slice", user_address]]  # Параметр: адреса користувача
-            )
-            
-            # Парсити результат
-            if result and "stack" in result:
-                stack = result["stack"]
-                if len(stack) > 0:
-                    # Перший елемент - staked amount
-                    # TonCenter повертає у форматі ["num", "123456789"]
-                    staked_data = stack[0]
-                    if len(staked_data) > 1:
-                        staked_nanoton = int(staked_data[1])
-                        return staked_nanoton / 1_000_000_000  # У TON
-            
-            return 0.0
+            return self._get_method_ton("get_staked", user_address)
         except Exception as e:
             print(f"Error getting staked amount for {user_address}: {str(e)}")
             return 0.0
@@ -290,71 +473,52 @@ class PoolService:
             Сума награди в TON
         """
         try:
-            # Виконати get-метод "get_rewards" на контракту пула
-            result = self.api.run_get_method(
-                self.pool_address,
-                "get_rewards",
-                [["slice", user_address]]  # Параметр: адреса користувача
-            )
-            
-            # Парсити результат
-            if result and "stack" in result:
-                stack = result["stack"]
-                if len(stack) > 0:
-                    # Перший елемент - rewards
-                    rewards_data = stack[0]
-                    if len(rewards_data) > 1:
-                        rewards_nanoton = int(rewards_data[1])
-                        return rewards_nanoton / 1_000_000_000  # У TON
-            
-            return 0.0
+            return self._get_method_ton("get_rewards", user_address)
         except Exception as e:
             print(f"Error getting rewards for {user_address}: {str(e)}")
             return 0.0
     
-    def get_user_balance(self, user_address: str) -> Dict:
+    def get_user_balance(self, user_address: str, deadline: float = None) -> Dict:
         """
         Отримати баланс користувача в пулі
         
+        Чотири незалежні запити (баланс гаманця, get_staked, get_rewards, баланс пулу)
+        виконуються паралельно на спільному bounded executor з одним загальним deadline.
+        Якщо частина запитів не встигла або впала, повертаються часткові дані
+        зі списком відсутніх полів у "missing".
+        
         Args:
             user_address: Адреса користувача
+            deadline: Загальний таймаут у секундах (default: TON_BALANCE_DEADLINE)
             
         Returns:
             Dict з staked amount, rewards, jettons balance
         """
-        try:
-            # Баланс гаманця користувача
-            wallet_balance = self.api.get_address_balance(user_address)
-            
-            # Отримати з контракту реальні дані
-            staked_amount = self.get_user_staked_amount(user_address)
-            accumulated_rewards = self.get_user_rewards(user_address)
-            
-            # Розрахувати share percentage
-            try:
-                total_pool_balance = self.api.get_address_balance(self.pool_address)
-                share_percentage = (staked_amount / total_pool_balance * 100) if total_pool_balance > 0 else 0.0
-            except:
-                share_percentage = 0.0
-            
-            return {
-                "user_address": user_address,
-                "wallet_balance": wallet_balance,  # Реальний баланс гаманця
-                "staked_amount": staked_amount,  # Реальні дані з контракту
-                "jettons_balance": 0,  # TODO: з контракту JettonWallet
-                "accumulated_rewards": accumulated_rewards,  # Реальні награди з контракту
-                "share_percentage": share_percentage,  # Розраховано з балансу
-            }
-        except Exception as e:
-            print(f"Error getting user balance: {str(e)}")
-            return {
-                "error": str(e),
-                "user_address": user_address,
-                "wallet_balance": 0,
-                "staked_amount": 0,
-                "accumulated_rewards": 0,
-                "share_percentage": 0,
-            }
+        deadline = BALANCE_DEADLINE if deadline is None else deadline
+        executor = _get_fanout_executor()
+        futures = {
+            "wallet_balance": executor.submit(self.api.get_address_balance, user_address),
+            "staked_amount": executor.submit(self._get_method_ton, "get_staked", user_address),
+            "accumulated_rewards": executor.submit(self._get_method_ton, "get_rewards", user_address),
+            "pool_balance": executor.submit(self.api.get_address_balance, self.pool_address),
+        }
+        done, _ = wait(futures.values(), timeout=deadline)
+        
+        values = {}
+        errors = {}
+        for name, future in futures.items():
+            if future not in done:
+                future.cancel()
+                errors[name] = f"timeout after {deadline}s"
+            elif future.exception() is not None:
+                errors[name] = str(future.exception())
+            else:
+                values[name] = future.result()
+        
+        if errors:
+            print(f"Partial user balance for {user_address}: {errors}")
+        
+        return build_user_balance(user_address, values, errors, expected=len(futures))
     
     def get_user_transactions(self, user_address: str, limit: int = 10) -> List[Dict]:
         """
@@ -366,65 +530,49 @@ class PoolService:
             
         Returns:
             List транзакцій (deposit, withdraw, rewards)
+        
+        Served from the local pool index (pool_indexer.py) when it covers this
+        pool; falls back to a live getTransactions call otherwise.
         """
+        indexer = self._get_local_indexer()
+        if indexer is not None:
+            try:
+                from pool_indexer import get_user_messages
+                return get_user_messages(user_address, limit)
+            except Exception as e:
+                print(f"Local pool index unavailable, using TonCenter: {str(e)}")
         try:
             transactions = self.api.get_transactions(user_address, limit)
-            
-            # TODO: Фільтрувати тільки транзакції з pool_address
-            # TODO: Парсити тип транзакції (deposit/withdraw/reward)
-            
-            parsed_txs = []
-            for tx in transactions:
-                # Спрощений парсинг (потрібно покращити)
-                parsed_txs.append({
-                    "hash": tx.get("transaction_id", {}).get("hash", ""),
-                    "timestamp": tx.get("utime", 0),
-                    "type": "unknown",  # TODO: визначити тип
-                    "amount": 0,  # TODO: парсити з in_msg/out_msg
-                    "status": "completed"
-                })
-            
-            return parsed_txs
+            return parse_user_transactions(transactions, self.pool_address)
         except Exception as e:
             return []
     
-    def check_transaction_confirmed(self, tx_hash: str) -> Dict:
+    def get_user_stake_totals(self, user_address: str) -> Optional[Dict]:
         """
-        Перевірити, чи підтверджена транзакція на blockchain
+        Deposit/withdraw totals of a wallet from the local pool index
         
-        Args:
-            tx_hash: BOC хеш транзакції
-            
         Returns:
-            Dict з статусом:
-            {
-                "confirmed": bool,
-                "status": "pending" | "confirmed" | "failed" | "unknown",
-                "message": str
-            }
+            Dict з totals або None, якщо індекс недоступний
         """
+        if self._get_local_indexer() is None:
+            return None
         try:
-            # Спроба перевірити статус транзакції через API
-            status_data = self.api.check_transaction_status(tx_hash)
-            
-            is_confirmed = status_data.get("status") == "confirmed"
-            
-            return {
-                "confirmed": is_confirmed,
-                "status": status_data.get("status", "unknown"),
-                "confirmations": status_data.get("confirmations", 0),
-                "block_time": status_data.get("block_time"),
-                "message": status_data.get("message", ""),
-                "tx_hash": tx_hash
-            }
+            from pool_indexer import get_user_totals
+            return get_user_totals(user_address)
         except Exception as e:
-            print(f"Error checking transaction confirmation: {str(e)}")
-            return {
-                "confirmed": False,
-                "status": "unknown",
-                "message": f"Error: {str(e)}",
-                "tx_hash": tx_hash
-            }
+            print(f"Error reading stake totals for {user_address}: {str(e)}")
+            return None
+    
+    def _get_local_indexer(self):
+        """Pool indexer for this pool address, if one is configured and synced"""
+        try:
+            from pool_indexer import get_pool_indexer  # Lazy: needs models / app context
+            indexer = get_pool_indexer()
+            if normalize_address(indexer.pool_address) != normalize_address(self.pool_address):
+                return None
+            return indexer if indexer.is_ready() else None
+        except Exception:
+            return None
     
     def prepare_deposit_transaction(self, user_address: str, amount_ton: float) -> Dict:
         """
@@ -438,7 +586,7 @@ class PoolService:
         Returns:
             Dict з даними для транзакції (ready for TonConnect signing)
         """
-        amount_nanoton = int(amount_ton * 1_000_000_000)
+        amount_nanoton = ton_to_nanoton(amount_ton)
         
         # Simple deposit: send TON to pool with op=1
         # No payload needed - just send coins with op=1 opcode
@@ -467,7 +615,7 @@ class PoolService:
         """
         # Withdraw: send op=2 with limit parameter
         # op=2: process withdraw requests (limit=255 means process all)
-        gas_fee = 50_000_000  # 0.05 TON for gas
+        gas_fee = WITHDRAW_GAS_FEE_NANOTON  # 0.05 TON for gas
         
         # Build payload: op=2 (4 bytes) + limit=255 (1 byte)
         payload_data = bytes([0x00, 0x00, 0x00, 0x02]) + bytes([0xFF])  # op=2, limit=255
@@ -0,0 +1,255 @@
+# backend/ton_api_async.py
+"""
+Asyncio TON API client (aiohttp)
+Async counterpart to TONAPIClient / PoolService for jobs that need to check
+many addresses per tick in one event loop. Request building and response
+parsing are shared with ton_api.py so results are identical.
+
+Usage:
+    async with AsyncTONAPIClient(testnet=False) as client:
+        infos = await client.get_many_address_info(addresses)
+"""
+
+import os
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+from dotenv import load_dotenv
+
+from http_session import MAX_RETRIES, BACKOFF_FACTOR, POOL_MAXSIZE
+from rate_limiter import get_rate_limiter
+from ton_api import (
+    BALANCE_DEADLINE,
+    toncenter_base_url,
+    build_request_headers,
+    parse_api_response,
+    parse_balance_ton,
+    parse_stack_ton,
+    build_run_get_method_params,
+    build_pool_stats,
+    build_user_balance,
+    parse_user_transactions,
+)
+
+load_dotenv()
+
+ASYNC_MAX_CONCURRENCY = int(os.getenv("TON_ASYNC_MAX_CONCURRENCY", "20"))
+ASYNC_TIMEOUT = float(os.getenv("TON_ASYNC_TIMEOUT", "15"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)  # Retried in-client (no urllib3 Retry for aiohttp)
+
+
+class AsyncTONAPIClient:
+    """Async клієнт TonCenter API з обмеженою конкурентністю і спільним пулом з'єднань"""
+
+    def __init__(
+        self,
+        testnet: bool = True,
+        max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+        session: Optional[aiohttp.ClientSession] = None,
+    ):
+        """
+        Ініціалізація клієнта
+
+        Args:
+            testnet: True для testnet, False для mainnet
+            max_concurrency: Максимум одночасних запитів до TonCenter
+            session: Зовнішня aiohttp сесія (інакше створюється при вході в контекст)
+        """
+        self.testnet = testnet
+        self.base_url = toncenter_base_url(testnet)
+        self.api_key = os.getenv("TONCENTER_API_KEY", "")
+        self.max_concurrency = max_concurrency
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.limiter = get_rate_limiter()  # Shared with the sync client
+
+    async def __aenter__(self) -> "AsyncTONAPIClient":
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                limit_per_host=min(self.max_concurrency, max(POOL_MAXSIZE, 1)),
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=ASYNC_TIMEOUT),
+                headers=build_request_headers(self.api_key),
+            )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Закрити сесію (тільки якщо клієнт її створив)"""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+    async def _make_request(self, method: str, params: Dict = None) -> Dict:
+        """
+        Виконати HTTP запит до TON API з retry/backoff на 429/5xx
+
+        Args:
+            method: Назва методу API
+            params: Параметри запиту
+
+        Returns:
+            JSON відповідь від API
+        """
+        if self._session is None:
+            raise RuntimeError("AsyncTONAPIClient must be used inside 'async with'")
+
+        url = f"{self.base_url}/{method}"
+        query = {k: str(v) for k, v in (params or {}).items()}
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                await self.limiter.acquire_async()
+                async with self._semaphore:
+                    async with self._session.get(url, params=query) as response:
+                        if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                            retry_after = response.headers.get("Retry-After")
+                            delay = float(retry_after) if retry_after and retry_after.isdigit() else BACKOFF_FACTOR * (2 ** attempt)
+                            if response.status == 429:
+                                # Limiter already spaces the retry; only back off further on 5xx
+                                self.limiter.on_throttled(delay if retry_after else None)
+                                delay = 0
+                            await response.read()
+                        else:
+                            # Final answer: only a 2xx raises the rate, a last 429 still lowers it
+                            if 200 <= response.status < 300:
+                                self.limiter.on_success()
+                            elif response.status == 429:
+                                retry_after = response.headers.get("Retry-After")
+                                self.limiter.on_throttled(float(retry_after) if retry_after and retry_after.isdigit() else None)
+                            if response.status != 200:
+                                text = await response.text()
+                                print(f"API Response ({response.status}): {text[:200]}")
+                            response.raise_for_status()
+                            return parse_api_response(await response.json(content_type=None))
+            except aiohttp.ClientResponseError as e:
+                # Non-retryable HTTP status (or retries exhausted)
+                print(f"API Request Error: {str(e)}")
+                raise Exception(f"Network error: {str(e)}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= MAX_RETRIES:
+                    print(f"API Request Error: {str(e)}")
+                    raise Exception(f"Network error: {str(e)}")
+                delay = BACKOFF_FACTOR * (2 ** attempt)
+            await asyncio.sleep(delay)
+
+        raise Exception("Network error: retries exhausted")
+
+    async def get_address_info(self, address: str) -> Dict:
+        """Отримати інформацію про адресу (getAddressInformation)"""
+        return await self._make_request("getAddressInformation", {"address": address})
+
+    async def get_address_balance(self, address: str) -> float:
+        """Баланс адреси в TON"""
+        return parse_balance_ton(await self.get_address_info(address))
+
+    async def get_many_address_info(self, addresses: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Отримати інформацію про багато адрес одночасно
+
+        Args:
+            addresses: TON адреси
+
+        Returns:
+            Dict address -> info (або {"error": str} для невдалих запитів)
+        """
+        addresses = list(dict.fromkeys(addresses))
+        results = await asyncio.gather(
+            *(self.get_address_info(a) for a in addresses),
+            return_exceptions=True
+        )
+        return {
+            address: ({"error": str(result)} if isinstance(result, Exception) else result)
+            for address, result in zip(addresses, results)
+        }
+
+    async def get_transactions(self, address: str, limit: int = 10) -> List[Dict]:
+        """Отримати історію транзакцій адреси (getTransactions)"""
+        return await self._make_request("getTransactions", {
+            "address": address,
+            "limit": limit
+        })
+
+    async def run_get_method(self, address: str, method: str, stack: List = None) -> Dict:
+        """Виконати get-метод смарт-контракту (runGetMethod)"""
+        return await self._make_request("runGetMethod", build_run_get_method_params(address, method, stack))
+
+
+class AsyncPoolService:
+    """Async сервіс для роботи з TON Pool контрактом"""
+
+    def __init__(self, pool_address: str, api: AsyncTONAPIClient):
+        """
+        Args:
+            pool_address: Адреса pool контракту
+            api: Відкритий AsyncTONAPIClient (спільний пул з'єднань)
+        """
+        self.pool_address = pool_address
+        self.api = api
+
+    async def get_pool_stats(self) -> Dict:
+        """Статистика пулу (той самий формат, що PoolService.get_pool_stats)"""
+        try:
+            balance = await self.api.get_address_balance(self.pool_address)
+            return build_pool_stats(balance, self.pool_address, self.api.testnet)
+        except Exception as e:
+            return {
+                "error": str(e),
+                "total_staked": 0,
+                "participants_count": 0,
+                "apy": 0
+            }
+
+    async def _get_method_ton(self, method: str, user_address: str) -> float:
+        result = await self.api.run_get_method(
+            self.pool_address,
+            method,
+            [["slice", user_address]]
+        )
+        return parse_stack_ton(result)
+
+    async def get_user_balance(self, user_address: str, deadline: float = None) -> Dict:
+        """
+        Баланс користувача в пулі: чотири запити паралельно з одним deadline
+
+        Returns:
+            Dict у форматі PoolService.get_user_balance (включно з "partial"/"missing")
+        """
+        deadline = BALANCE_DEADLINE if deadline is None else deadline
+        tasks = {
+            "wallet_balance": asyncio.ensure_future(self.api.get_address_balance(user_address)),
+            "staked_amount": asyncio.ensure_future(self._get_method_ton("get_staked", user_address)),
+            "accumulated_rewards": asyncio.ensure_future(self._get_method_ton("get_rewards", user_address)),
+            "pool_balance": asyncio.ensure_future(self.api.get_address_balance(self.pool_address)),
+        }
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+
+        values = {}
+        errors = {}
+        for name, task in tasks.items():
+            if task not in done:
+                errors[name] = f"timeout after {deadline}s"
+            elif task.exception() is not None:
+                errors[name] = str(task.exception())
+            else:
+                values[name] = task.result()
+
+        return build_user_balance(user_address, values, errors, expected=len(tasks))
+
+    async def get_user_transactions(self, user_address: str, limit: int = 10) -> List[Dict]:
+        """Історія транзакцій користувача (той самий формат, що PoolService)"""
+        try:
+            transactions = await self.api.get_transactions(user_address, limit)
+            return parse_user_transactions(transactions, self.pool_address)
+        except Exception:
+            return []
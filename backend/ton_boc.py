@@ -0,0 +1,98 @@
+# backend/ton_boc.py
+"""
+Minimal Bag-of-Cells reader
+Only what the indexer and tx_decoder.py need: decode a serialized BOC
+(as returned by TonCenter in msg_data.body) and read bits from a cell.
+No dependency on tonsdk / pytoniq.
+"""
+
+import base64
+from typing import List, Optional, Tuple
+
+BOC_MAGIC = b"\xb5\xee\x9c\x72"
+
+
+class Cell:
+    """Parsed cell: data bytes, bit length and child indices"""
+
+    __slots__ = ("data", "bits", "refs")
+
+    def __init__(self, data: bytes, bits: int, refs: List[int]):
+        self.data = data
+        self.bits = bits
+        self.refs = refs
+
+    def read_uint(self, offset: int, length: int) -> Optional[int]:
+        """Read an unsigned big-endian integer of `length` bits at `offset`"""
+        if offset + length > self.bits:
+            return None
+        value = int.from_bytes(self.data, "big") >> (len(self.data) * 8 - offset - length)
+        return value & ((1 << length) - 1)
+
+
+def _read_int(buf: bytes, pos: int, size: int) -> Tuple[int, int]:
+    return int.from_bytes(buf[pos:pos + size], "big"), pos + size
+
+
+def parse_boc(boc: bytes) -> Tuple[List[Cell], List[int]]:
+    """
+    Parse a generic BOC (magic b5ee9c72)
+
+    Args:
+        boc: Serialized bag of cells
+
+    Returns:
+        (cells, root indices)
+
+    Raises:
+        ValueError on unsupported or truncated input
+    """
+    if boc[:4] != BOC_MAGIC:
+        raise ValueError("Unsupported BOC magic")
+    flags = boc[4]
+    has_idx = bool(flags & 0x80)
+    size = flags & 0x07
+    off_bytes = boc[5]
+    pos = 6
+    cell_count, pos = _read_int(boc, pos, size)
+    root_count, pos = _read_int(boc, pos, size)
+    _absent, pos = _read_int(boc, pos, size)
+    _total_size, pos = _read_int(boc, pos, off_bytes)
+    roots = []
+    for _ in range(root_count):
+        root, pos = _read_int(boc, pos, size)
+        roots.append(root)
+    if has_idx:
+        pos += cell_count * off_bytes
+
+    cells = []
+    for _ in range(cell_count):
+        if pos + 2 > len(boc):
+            raise ValueError("Truncated BOC")
+        d1, d2 = boc[pos], boc[pos + 1]
+        pos += 2
+        ref_count = d1 & 0x07
+        if d1 & 0x10:  # Stored hashes and depths
+            level = d1 >> 5
+            pos += (bin(level).count("1") + 1) * (32 + 2)
+        data_len = (d2 + 1) // 2
+        data = boc[pos:pos + data_len]
+        pos += data_len
+        bits = data_len * 8
+        if d2 & 1 and data:
+            # Last byte carries a completion tag: strip trailing zeros and the 1 bit
+            last = data[-1]
+            trailing = (last & -last).bit_length()
+            bits -= trailing
+        refs = []
+        for _ in range(ref_count):
+            ref, pos = _read_int(boc, pos, size)
+            refs.append(ref)
+        cells.append(Cell(data, bits, refs))
+    return cells, roots
+
+
+def decode_base64(value: str) -> bytes:
+    """Decode standard or url-safe base64"""
+    return base64.urlsafe_b64decode(value.replace("+", "-").replace("/", "_") + "=" * (-len(value) % 4))
+
@@ -0,0 +1,176 @@
+# backend/ton_cache.py
+"""
+In-process TTL cache for TON API reads
+- LRU eviction with a bounded number of entries
+- Per-method TTLs (balances change faster than get-method results)
+- Stale-while-revalidate: after TTL an entry is still served for a grace
+  period while a single background refresh fetches the new value
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_MAX_ENTRIES = int(os.getenv("TON_CACHE_MAX_ENTRIES", "5000"))
+CACHE_DEFAULT_TTL = float(os.getenv("TON_CACHE_DEFAULT_TTL", "10"))
+CACHE_STALE_TTL = float(os.getenv("TON_CACHE_STALE_TTL", "60"))  # Extra seconds a stale value may be served
+
+# TTL in seconds per TonCenter method / contract get-method
+METHOD_TTLS = {
+    "getAddressInformation": float(os.getenv("TON_CACHE_TTL_ADDRESS", "10")),
+    "get_staked": float(os.getenv("TON_CACHE_TTL_STAKED", "30")),
+    "get_rewards": float(os.getenv("TON_CACHE_TTL_REWARDS", "30")),
+}
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-method TTL and stale-while-revalidate"""
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        default_ttl: float = CACHE_DEFAULT_TTL,
+        stale_ttl: float = CACHE_STALE_TTL,
+        method_ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.method_ttls = dict(method_ttls if method_ttls is not None else METHOD_TTLS)
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "evictions": 0,
+        }
+
+    @staticmethod
+    def make_key(network: str, address: str, method: str, stack: Optional[List] = None) -> Tuple:
+        """
+        Build a cache key
+
+        Args:
+            network: "mainnet" | "testnet"
+            address: TON address
+            method: API method or contract get-method name
+            stack: get-method parameters
+
+        Returns:
+            Hashable key tuple
+        """
+        stack_key = json.dumps(stack, sort_keys=True) if stack else ""
+        return (network, address, method, stack_key)
+
+    def ttl_for(self, method: str) -> float:
+        return self.method_ttls.get(method, self.default_ttl)
+
+    def get_or_load(self, key: Tuple, loader: Callable[[], Any]) -> Any:
+        """
+        Return cached value for key, calling loader on a miss
+
+        Fresh entries are returned directly. Expired entries inside the stale
+        window are returned immediately and refreshed in the background.
+        Loader exceptions propagate and are never cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now < entry.expires_at:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry.value
+                if now < entry.stale_until:
+                    self._entries.move_to_end(key)
+                    self._stats["stale"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(
+                            target=self._refresh, args=(key, loader), daemon=True
+                        ).start()
+                    return entry.value
+            self._stats["misses"] += 1
+
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def _refresh(self, key: Tuple, loader: Callable[[], Any]):
+        """Background revalidation of a stale entry"""
+        try:
+            value = loader()
+            self.set(key, value)
+            with self._lock:
+                self._stats["refreshes"] += 1
+        except Exception as e:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+            print(f"⚠️  Cache refresh failed for {key[2]} {key[1]}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def set(self, key: Tuple, value: Any):
+        """Store value using the TTL of the key's method"""
+        ttl = self.ttl_for(key[2])
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = _Entry(value, now + ttl, now + ttl + self.stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, network: str, address: str):
+        """Drop every cached entry for an address (e.g. after a known on-chain change)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == network and k[1] == address]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit / miss / stale counters and current size"""
+        with self._lock:
+            data = dict(self._stats)
+            data["size"] = len(self._entries)
+        lookups = data["hits"] + data["misses"] + data["stale"]
+        data["max_entries"] = self.max_entries
+        data["hit_ratio"] = round((data["hits"] + data["stale"]) / lookups, 4) if lookups else 0.0
+        return data
+
+
+# Singleton instance
+_ton_cache = None
+_ton_cache_lock = threading.Lock()
+
+def get_ton_cache() -> TTLCache:
+    """Get or create the process-wide TON API cache"""
+    global _ton_cache
+    if _ton_cache is None:
+        with _ton_cache_lock:
+            if _ton_cache is None:
+                _ton_cache = TTLCache()
+    return _ton_cache
@@ -2,147 +2,456 @@
 """
 Background task to monitor transaction status on blockchain
 Polls pending transactions and updates their status
-Sends email notifications for transaction status changes
+Queues email notifications for transaction status changes
+(delivered by the email outbox dispatcher job, see email_queue.py)
 """
 
 import os
+import time
 from datetime import datetime
+from typing import Dict, List
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
+from sqlalchemy import case, exists, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
 from models import db, Transaction, User
-from ton_api import TONAPIClient
-from email_service import get_email_service
+from stat_counters import apply_deltas, status_change_deltas, reconcile_counters, COUNTERS_RECONCILE_HOURS
+from tx_confirmation import get_confirmation_engine
+from event_stream import get_event_broker
+from email_queue import enqueue_email, dispatch_email_outbox, prune_email_outbox, EMAIL_DISPATCH_INTERVAL_SECONDS
+from pool_stats_refresher import get_pool_stats_refresher, refresh_pool_stats, POOL_STATS_REFRESH_SECONDS
+from pool_stats_history import prune_pool_history
+from pool_indexer import index_pool_transactions, INDEXER_INTERVAL_SECONDS
+from staking_rollup import rollup_staking_activity, ROLLUP_INTERVAL_SECONDS
+
+POLL_INTERVAL_SECONDS = 30
+PENDING_BATCH_SIZE = int(os.getenv("MONITOR_BATCH_SIZE", "200"))
+SCHEDULER_THREADS = int(os.getenv("SCHEDULER_THREADS", "8"))
 
 scheduler = None
 _initialized = False
 _app = None  # Store app reference for job context
+_last_tick_stats = {}
 
-def init_scheduler(app):
-    """Initialize the background scheduler"""
+def init_scheduler(app, max_workers: int = SCHEDULER_THREADS):
+    """
+    Initialize the background scheduler
+    
+    Args:
+        app: Flask app (jobs run in its app context)
+        max_workers: Job thread pool size (jobs of different kinds run in parallel)
+    """
     global scheduler, _initialized, _app
     
     if _initialized:
         return
     
     _app = app
-    scheduler = BackgroundScheduler()
+    get_confirmation_engine().set_cursor_writer(True)  # Only the job leader advances the scan cursor
+    get_pool_stats_refresher().set_chain_reader(True)  # Other processes serve the rows it writes
+    scheduler = BackgroundScheduler(
+        executors={"default": ThreadPoolExecutor(max_workers=max_workers)},
+        job_defaults={"coalesce": True}  # A late job runs once, not once per missed interval
+    )
     
     # Add polling job with app context wrapper
     scheduler.add_job(
         func=_poll_with_context,
         trigger="interval",
-        seconds=30,  # Poll every 30 seconds
+        seconds=POLL_INTERVAL_SECONDS,  # Poll every 30 seconds
         id="transaction_poller",
         name="Poll pending transactions",
         replace_existing=True,
         max_instances=1  # Only one instance can run at a time
     )
     
+    # Pool stats snapshot refresher (first run immediately to warm the snapshot)
+    scheduler.add_job(
+        func=_run_with_context,
+        args=[refresh_pool_stats],
+        trigger="interval",
+        seconds=POOL_STATS_REFRESH_SECONDS,
+        id="pool_stats_refresher",
+        name="Refresh pool stats snapshot",
+        replace_existing=True,
+        max_instances=1,
+        next_run_time=datetime.now()
+    )
+    
+    # Pool history retention (raw samples and fine-grained rollups)
+    scheduler.add_job(
+        func=_run_with_context,
+        args=[prune_pool_history],
+        trigger="interval",
+        hours=1,
+        id="pool_history_retention",
+        name="Prune pool stats history",
+        replace_existing=True,
+        max_instances=1
+    )
+    
+    # Pool-address indexer (deposit/withdraw messages, checkpointed)
+    scheduler.add_job(
+        func=_run_with_context,
+        args=[index_pool_transactions],
+        trigger="interval",
+        seconds=INDEXER_INTERVAL_SECONDS,
+        id="pool_indexer",
+        name="Index pool transactions",
+        replace_existing=True,
+        max_instances=1,
+        next_run_time=datetime.now()
+    )
+    
+    # Daily staking rollup (open days + backfill on first run)
+    scheduler.add_job(
+        func=_run_with_context,
+        args=[rollup_staking_activity],
+        trigger="interval",
+        seconds=ROLLUP_INTERVAL_SECONDS,
+        id="staking_rollup",
+        name="Roll up daily staking activity",
+        replace_existing=True,
+        max_instances=1,
+        next_run_time=datetime.now()
+    )
+    
+    # Email outbox dispatcher (queued notifications, retries with backoff)
+    scheduler.add_job(
+        func=_run_with_context,
+        args=[dispatch_email_outbox],
+        trigger="interval",
+        seconds=EMAIL_DISPATCH_INTERVAL_SECONDS,
+        id="email_dispatcher",
+        name="Dispatch queued emails",
+        replace_existing=True,
+        max_instances=1
+    )
+    
+    # Email outbox retention (sent rows; dead letters are kept)
+    scheduler.add_job(
+        func=_run_with_context,
+        args=[prune_email_outbox],
+        trigger="interval",
+        hours=1,
+        id="email_outbox_retention",
+        name="Prune sent emails",
+        replace_existing=True,
+        max_instances=1
+    )
+    
+    # Stat counters reconciliation (rebuild from base tables, fixes any drift)
+    scheduler.add_job(
+        func=_run_with_context,
+        args=[reconcile_counters],
+        trigger="interval",
+        hours=COUNTERS_RECONCILE_HOURS,
+        id="stat_counters_reconcile",
+        name="Reconcile stat counters",
+        replace_existing=True,
+        max_instances=1,
+        next_run_time=datetime.now()  # Also once at start (bootstraps counters after a deploy)
+    )
+    
     scheduler.start()
-    print("✅ Transaction monitor started (polling every 30s)")
+    print(f"✅ Transaction monitor started (polling every 30s, pool stats every {POOL_STATS_REFRESH_SECONDS}s)")
     _initialized = True
 
 def _poll_with_context():
     """Wrapper to run poll_pending_transactions() with Flask app context"""
+    _run_with_context(poll_pending_transactions)
+
+def _run_with_context(func):
+    """Run a scheduler job with Flask app context"""
     global _app
     if _app:
         with _app.app_context():
-            poll_pending_transactions()
+            func()
     else:
-        poll_pending_transactions()
+        func()
 
 def stop_scheduler():
-    """Stop the background scheduler"""
-    global scheduler
+    """
+    Stop the background scheduler (init_scheduler can start it again, e.g. after re-election)
+    
+    Waits for running jobs (monitor tick, indexer, ...) to finish, so the
+    elector releases leadership only after this process stopped writing.
+    """
+    global scheduler, _initialized
     if scheduler and scheduler.running:
-        scheduler.shutdown()
+        scheduler.shutdown(wait=True)
         print("⏹️  Transaction monitor stopped")
+    scheduler = None
+    _initialized = False
+    get_confirmation_engine().set_cursor_writer(False)
+    get_pool_stats_refresher().set_chain_reader(False)
+
+def _notify_status_change(user, tx, new_status: str):
+    """Queue the email for a status change (same DB transaction, see email_queue.py)"""
+    if not user or not user.email:
+        return
+    if new_status == 'confirmed':
+        enqueue_email(
+            "transaction_confirmed",
+            user.email,
+            amount=float(tx.amount) if tx.amount else 0,
+            tx_hash=tx.tx_hash,
+            tx_type=tx.type
+        )
+    elif new_status == 'failed':
+        # Could send failure notification here
+        print(f"  ⚠️  TX {tx.tx_hash[:10]}... failed for user {user.email}")
+
+def _chain_hashes(matches: Dict[int, Dict]) -> Dict[int, str]:
+    """Transaction id -> hash of the pool TX that confirmed it"""
+    return {tx_id: status["tx_hash"] for tx_id, status in matches.items() if status.get("tx_hash")}
+
+def _group_matches(pending: List[Transaction], matches: Dict[int, Dict]) -> Dict[str, List[Transaction]]:
+    """Split matched rows by their new status"""
+    changed = {'confirmed': [], 'failed': []}
+    for tx in pending:
+        new_status = matches.get(tx.id, {}).get("status", "pending")
+        if new_status in changed:
+            changed[new_status].append(tx)
+    return changed
+
+def _apply_status_changes(changed: Dict[str, List[Transaction]], users: Dict, chain_hashes: Dict[int, str] = None):
+    """
+    Bulk-update changed rows (one UPDATE per status), queue emails, commit
+    
+    Only rows still 'pending' are updated, so concurrent resolvers do not
+    overwrite each other. The matched chain TX hash is stored with the
+    status, and rows whose chain TX already confirmed another row are
+    skipped (the UNIQUE chain_tx_hash catches a concurrent claim with an
+    IntegrityError). Bulk UPDATEs bypass ORM events, so stat counters
+    are adjusted here for exactly the rows returned by the UPDATE, and
+    notification emails are queued for those rows, in the same DB
+    transaction. Raises on DB errors (caller rolls back).
+    
+    Returns:
+        Dict new status -> rows actually updated
+    """
+    now = datetime.utcnow()
+    chain_hashes = chain_hashes or {}
+    claimed = aliased(Transaction)
+    applied = {new_status: [] for new_status in changed}
+    for new_status, txs in changed.items():
+        if not txs:
+            continue
+        stmt = update(Transaction).where(Transaction.id.in_([tx.id for tx in txs]), Transaction.status == 'pending')
+        values = {"status": new_status, "updated_at": now}
+        hashes = {tx.id: chain_hashes[tx.id] for tx in txs if chain_hashes.get(tx.id)}
+        if hashes:
+            chain_hash = case(hashes, value=Transaction.id, else_=None)
+            values["chain_tx_hash"] = chain_hash
+            stmt = stmt.where(~exists().where(claimed.chain_tx_hash == chain_hash))
+        updated = db.session.execute(
+            stmt.values(**values).returning(Transaction.id, Transaction.type, Transaction.amount),
+            execution_options={"synchronize_session": False}
+        ).all()
+        apply_deltas(db.session.connection(), status_change_deltas(
+            [(tx_type, amount) for _, tx_type, amount in updated], 'pending', new_status
+        ))
+        updated_ids = {row[0] for row in updated}
+        applied[new_status] = [tx for tx in txs if tx.id in updated_ids]
+        for tx in applied[new_status]:
+            _notify_status_change(users.get(tx.user_id), tx, new_status)
+    db.session.commit()
+    
+    broker = get_event_broker()
+    for new_status, txs in applied.items():
+        for tx in txs:
+            # Keep loaded objects in sync with the bulk UPDATE without marking them dirty
+            set_committed_value(tx, 'status', new_status)
+            set_committed_value(tx, 'updated_at', now)
+            if chain_hashes.get(tx.id):
+                set_committed_value(tx, 'chain_tx_hash', chain_hashes[tx.id])
+            print(f"  ✅ TX {tx.tx_hash[:10]}... status: pending → {new_status}")
+            broker.mark_due(f"tx:{tx.user_id}")  # Push to open SSE streams now
+    return applied
+
+def resolve_pending_transactions(pending: List[Transaction], scan_max_age: float = POLL_INTERVAL_SECONDS) -> Dict[str, List[Transaction]]:
+    """
+    Resolve a set of pending rows on demand (e.g. the batch status endpoint)
+    
+    Uses one pool-address scan (skipped if the index is fresher than
+    scan_max_age) and one user query for the whole set.
+    
+    Returns:
+        Dict new status -> rows that changed
+    """
+    pending = [tx for tx in pending if tx.status == 'pending']
+    if not pending:
+        return {'confirmed': [], 'failed': []}
+    
+    engine = get_confirmation_engine()
+    try:
+        engine.scan_if_stale(scan_max_age)
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️  Pool scan failed, matching against the last index: {str(e)}")
+    
+    user_ids = {tx.user_id for tx in pending if tx.user_id}
+    users = {u.id: u for u in User.query.filter(User.id.in_(user_ids)).all()} if user_ids else {}
+    matches = engine.match(pending, users)
+    changed = _group_matches(pending, matches)
+    if changed['confirmed'] or changed['failed']:
+        try:
+            changed = _apply_status_changes(changed, users, _chain_hashes(matches))
+        except IntegrityError:
+            db.session.rollback()  # Chain TX claimed concurrently by the worker: rows stay pending
+            print("⚠️  Chain TX already claimed by another process, status left pending")
+            return {'confirmed': [], 'failed': []}
+    return changed
 
 def poll_pending_transactions():
     """
     Poll all pending transactions and update their status
     This runs in background every 30 seconds
+    
+    The pool address is scanned once per tick (tx_confirmation.py), then pending
+    rows are paged by primary key (keyset pagination) and matched against the
+    scanned chain transactions in memory. Users are loaded with one IN query per
+    batch and changed rows are applied with one bulk UPDATE per status.
     """
+    global _last_tick_stats
+    stats = {
+        "started_at": datetime.utcnow().isoformat(),
+        "batches": 0,
+        "checked": 0,
+        "confirmed": 0,
+        "failed": 0,
+        "errors": 0,
+        "scanned": 0,
+        "chain_ms": 0.0,
+        "db_ms": 0.0,
+        "duration_ms": 0.0,
+    }
+    tick_started = time.monotonic()
+    
     try:
-        # Query all pending transactions
-        pending_txs = Transaction.query.filter_by(status='pending').all()
-        
-        if not pending_txs:
-            return
-        
-        print(f"🔄 Checking {len(pending_txs)} pending transactions...")
+        engine = get_confirmation_engine()
+        last_id = 0
         
-        api_client = TONAPIClient(testnet=False)  # Use mainnet
-        email_service = get_email_service()
-        updated_count = 0
-        
-        for tx in pending_txs:
-            try:
-                # Check if transaction is confirmed
-                status_data = api_client.check_transaction_status(tx.tx_hash)
-                
-                new_status = status_data.get("status", "unknown")
-                
-                # Update transaction status if changed
-                if new_status in ['confirmed', 'failed']:
-                    old_status = tx.status
-                    tx.update_status(new_status)
-                    db.session.add(tx)
-                    updated_count += 1
-                    print(f"  ✅ TX {tx.tx_hash[:10]}... status: {old_status} → {new_status}")
-                    
-                    # Send email notification
-                    if tx.user_id:
-                        user = User.query.get(tx.user_id)
-                        if user and user.email:
-                            try:
-                                if new_status == 'confirmed':
-                                    email_service.send_transaction_confirmed(
-                                        user.email,
-                                        user.email.split('@')[0],  # Use email prefix as name
-                                        float(tx.amount) if tx.amount else 0,
-                                        tx.tx_hash,
-                                        tx.type
-                                    )
-                                elif new_status == 'failed':
-                                    # Could send failure notification here
-                                    print(f"  ⚠️  TX {tx.tx_hash[:10]}... failed for user {user.email}")
-                            except Exception as e:
-                                print(f"  ❌ Error sending email: {str(e)}")
-                    
-            except Exception as e:
-                print(f"  ❌ Error checking TX {tx.tx_hash[:10]}...: {str(e)}")
-                continue
-        
-        if updated_count > 0:
-            try:
-                db.session.commit()
-                print(f"💾 Updated {updated_count} transactions")
-            except Exception as e:
-                db.session.rollback()
-                print(f"❌ Database error: {str(e)}")
+        while True:
+            t0 = time.monotonic()
+            batch = Transaction.query.filter(
+                Transaction.status == 'pending',
+                Transaction.id > last_id
+            ).order_by(Transaction.id.asc()).limit(PENDING_BATCH_SIZE).all()
+            stats["db_ms"] += (time.monotonic() - t0) * 1000
+            
+            if not batch:
+                break
+            last_id = batch[-1].id
+            stats["batches"] += 1
+            stats["checked"] += len(batch)
+            
+            # One incremental scan of the pool address per tick
+            if stats["batches"] == 1:
+                t0 = time.monotonic()
+                try:
+                    stats["scanned"] = engine.scan()
+                except Exception as e:
+                    db.session.rollback()
+                    stats["errors"] += 1
+                    print(f"⚠️  Pool scan failed, matching against the last index: {str(e)}")
+                stats["chain_ms"] += (time.monotonic() - t0) * 1000
+            
+            # Preload users (wallet fallback for matching + notifications) in one query
+            t0 = time.monotonic()
+            user_ids = {tx.user_id for tx in batch if tx.user_id}
+            users = {u.id: u for u in User.query.filter(User.id.in_(user_ids)).all()} if user_ids else {}
+            stats["db_ms"] += (time.monotonic() - t0) * 1000
+            
+            matches = engine.match(batch, users)
+            changed = _group_matches(batch, matches)
+            
+            if changed['confirmed'] or changed['failed']:
+                t0 = time.monotonic()
+                try:
+                    changed = _apply_status_changes(changed, users, _chain_hashes(matches))
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"❌ Database error: {str(e)}")
+                    stats["errors"] += 1
+                    continue
+                stats["db_ms"] += (time.monotonic() - t0) * 1000
+                for new_status, txs in changed.items():
+                    stats[new_status] += len(txs)
+            
+            if len(batch) < PENDING_BATCH_SIZE:
+                break
         
     except Exception as e:
+        db.session.rollback()
+        stats["errors"] += 1
         print(f"❌ Error in transaction polling: {str(e)}")
+    
+    stats["duration_ms"] = round((time.monotonic() - tick_started) * 1000, 1)
+    stats["chain_ms"] = round(stats["chain_ms"], 1)
+    stats["db_ms"] = round(stats["db_ms"], 1)
+    _last_tick_stats = stats
+    
+    if stats["checked"]:
+        print(
+            f"🔄 Checked {stats['checked']} pending TXs in {stats['batches']} batches: "
+            f"{stats['confirmed']} confirmed, {stats['failed']} failed, {stats['errors']} errors "
+            f"({stats['duration_ms']}ms, chain {stats['chain_ms']}ms, db {stats['db_ms']}ms)"
+        )
+    if stats["duration_ms"] > POLL_INTERVAL_SECONDS * 1000:
+        print(f"⚠️  Poll tick took {stats['duration_ms']}ms, longer than the {POLL_INTERVAL_SECONDS}s interval")
 
-def check_transaction_status_sync(tx_hash: str) -> dict:
+def get_monitor_stats() -> Dict:
+    """Timing stats of the last poll tick"""
+    return dict(_last_tick_stats)
+
+def transaction_status(tx: Transaction) -> dict:
+    """Status dictionary of a DB row (after resolve_pending_transactions)"""
+    confirmed = tx.status == 'confirmed'
+    if tx.status == 'pending':
+        message = "Transaction status will be updated when confirmed"
+    elif confirmed and tx.chain_tx_hash:
+        message = f"Confirmed on-chain ({tx.chain_tx_hash[:10]}...)"
+    else:
+        message = f"Transaction {tx.status}"
+    return {
+        "status": tx.status,
+        "confirmed": confirmed,
+        "confirmations": 1 if confirmed else 0,
+        "chain_tx_hash": tx.chain_tx_hash,
+        "message": message,
+        "tx_hash": tx.tx_hash
+    }
+
+def check_transaction_status_sync(tx_hash: str, user_id=None) -> dict:
     """
     Synchronously check transaction status (for on-demand checks)
     
+    Same source as the monitor tick and the batch endpoint: the pool scan
+    (skipped if fresh) matched against the DB row by resolve_pending_transactions.
+    
     Args:
         tx_hash: Transaction hash to check
+        user_id: Only look at this user's transactions
         
     Returns:
-        Status dictionary
+        Status dictionary ("not_found" if there is no such row)
     """
+    query = Transaction.query.filter_by(tx_hash=tx_hash)
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    tx = query.first()
+    if tx is None:
+        return {"status": "not_found", "confirmed": False, "confirmations": 0, "tx_hash": tx_hash}
     try:
-        api_client = TONAPIClient(testnet=False)
-        return api_client.check_transaction_status(tx_hash)
+        resolve_pending_transactions([tx])
     except Exception as e:
-        return {
-            "status": "unknown",
-            "error": str(e),
-            "tx_hash": tx_hash
-        }
+        db.session.rollback()
+        print(f"Error resolving transaction status: {str(e)}")
+    return transaction_status(tx)
 
 def update_transaction_status(tx_hash: str, new_status: str) -> bool:
     """
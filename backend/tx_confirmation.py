@@ -0,0 +1,295 @@
+# backend/tx_confirmation.py
+"""
+On-chain confirmation engine for pending transactions
+Scans getTransactions on the pool address incrementally from a stored
+cursor (lt/hash), keeps an in-memory index of recently seen pool
+transactions and matches pending DB rows against it in O(1):
+- by transaction / message hash (if the client stored a real hash)
+- by (sender wallet, value in nanoton) for stake (op=1) and withdraw (op=2)
+One tick costs one paginated scan instead of one lookup per pending row.
+A matched chain TX is stored on the row (Transaction.chain_tx_hash, UNIQUE),
+so it can confirm only one row even after a restart or from another
+process; only the scheduler leader persists the scan cursor.
+"""
+
+import os
+import calendar
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from models import db, ChainCursor, Transaction, User
+from ton_api import (
+    TONAPIClient,
+    WITHDRAW_GAS_FEE_NANOTON,
+    ton_to_nanoton,
+    normalize_address,
+    normalize_hash,
+)
+
+load_dotenv()
+
+SCAN_PAGE_SIZE = int(os.getenv("CONFIRMATION_SCAN_PAGE_SIZE", "50"))
+SCAN_MAX_PAGES = int(os.getenv("CONFIRMATION_SCAN_MAX_PAGES", "20"))
+WARMUP_PAGES = int(os.getenv("CONFIRMATION_WARMUP_PAGES", "4"))  # Rebuild the index after a restart
+INDEX_SIZE = int(os.getenv("CONFIRMATION_INDEX_SIZE", "20000"))
+MATCH_SLACK_SECONDS = int(os.getenv("CONFIRMATION_MATCH_SLACK_SECONDS", "600"))  # Chain TX may precede the DB row
+CURSOR_NAME = "pool_confirmations"
+
+
+class ChainTx:
+    """Indexed pool transaction (only the fields needed for matching)"""
+
+    __slots__ = ("hash", "lt", "utime", "source", "value", "in_msg_hash", "consumed")
+
+    def __init__(self, raw: Dict):
+        tx_id = raw.get("transaction_id", {})
+        in_msg = raw.get("in_msg") or {}
+        self.hash = normalize_hash(tx_id.get("hash", ""))
+        self.lt = int(tx_id.get("lt", 0))
+        self.utime = int(raw.get("utime", 0))
+        self.source = normalize_address(in_msg.get("source", ""))
+        self.value = int(in_msg.get("value", 0) or 0)
+        self.in_msg_hash = normalize_hash(in_msg.get("hash", ""))
+        self.consumed = False
+
+    def to_status(self, pool_address: str) -> Dict:
+        """Status dict of the matched chain transaction"""
+        return {
+            "status": "confirmed",
+            "confirmations": 1,
+            "block_time": self.utime,
+            "block_height": None,
+            "lt": self.lt,
+            "fee": None,
+            "amount": self.value,
+            "from": self.source,
+            "to": pool_address,
+            "message": f"Confirmed on-chain (lt {self.lt})",
+            "tx_hash": self.hash,
+        }
+
+
+def expected_value_nanoton(tx: Transaction) -> int:
+    """Value the pool should receive for a DB transaction"""
+    if tx.type == "unstake":
+        return WITHDRAW_GAS_FEE_NANOTON
+    return ton_to_nanoton(tx.amount)  # Same conversion as PoolService.prepare_deposit_transaction
+
+
+class ConfirmationEngine:
+    """Incremental pool-address scanner with an O(1) match index"""
+
+    def __init__(
+        self,
+        api: TONAPIClient,
+        pool_address: str,
+        cursor_name: str = CURSOR_NAME,
+        index_size: int = INDEX_SIZE,
+        persist_cursor: bool = False
+    ):
+        """
+        Args:
+            api: TONAPIClient для мережі пулу
+            pool_address: Адреса pool контракту
+            cursor_name: Ім'я рядка ChainCursor
+            index_size: Скільки останніх транзакцій тримати в індексі
+            persist_cursor: Записувати курсор у БД (лише один процес - лідер планувальника)
+        """
+        self.api = api
+        self.pool_address = pool_address
+        self.cursor_name = cursor_name
+        self.index_size = index_size
+        self.persist_cursor = persist_cursor
+        self._by_hash: "OrderedDict[str, ChainTx]" = OrderedDict()
+        self._by_sender: Dict[tuple, List[ChainTx]] = {}
+        self._cursor_lt: Optional[int] = None
+        self._cursor_hash: Optional[str] = None
+        self._cursor_loaded = False
+        self._warm = False
+        self._scanned_at = 0.0  # monotonic time of the last scan
+        self._lock = threading.Lock()
+        self._stats = {"scans": 0, "scanned": 0, "indexed": 0, "matched": 0, "gaps": 0}
+
+    # --- Cursor -----------------------------------------------------------------
+    def _load_cursor(self):
+        row = db.session.get(ChainCursor, self.cursor_name)
+        if row is not None:
+            self._cursor_lt, self._cursor_hash = row.lt, row.tx_hash
+        self._cursor_loaded = True
+
+    def _save_cursor(self):
+        if not self.persist_cursor:
+            return  # Another process owns the cursor row; keep the position in memory only
+        row = db.session.get(ChainCursor, self.cursor_name)
+        if row is None:
+            row = ChainCursor(name=self.cursor_name, address=self.pool_address)
+            db.session.add(row)
+        row.lt = self._cursor_lt
+        row.tx_hash = self._cursor_hash
+        row.updated_at = datetime.utcnow()
+        db.session.commit()
+
+    def set_cursor_writer(self, enabled: bool):
+        """Make this process the single writer of the cursor row (scheduler leader)"""
+        with self._lock:
+            self.persist_cursor = enabled
+
+    # --- Index ------------------------------------------------------------------
+    def _add(self, raw: Dict) -> Optional[ChainTx]:
+        entry = ChainTx(raw)
+        if not entry.hash or entry.hash in self._by_hash:
+            return None
+        self._by_hash[entry.hash] = entry
+        if entry.in_msg_hash:
+            self._by_hash.setdefault(entry.in_msg_hash, entry)
+        if entry.source:
+            self._by_sender.setdefault((entry.source, entry.value), []).append(entry)
+        self._stats["indexed"] += 1
+
+        while len(self._by_hash) > self.index_size:
+            key, old = self._by_hash.popitem(last=False)
+            if key != old.hash:
+                continue  # in_msg hash alias
+            bucket = self._by_sender.get((old.source, old.value))
+            if bucket and old in bucket:
+                bucket.remove(old)
+                if not bucket:
+                    del self._by_sender[(old.source, old.value)]
+        return entry
+
+    def _mark_claimed(self, entries: List[ChainTx]):
+        """Mark chain TXs that already confirmed a row (any process, before a restart) as consumed"""
+        hashes = [entry.hash for entry in entries]
+        claimed = set()
+        for start in range(0, len(hashes), 500):
+            claimed.update(
+                value for (value,) in db.session.query(Transaction.chain_tx_hash)
+                .filter(Transaction.chain_tx_hash.in_(hashes[start:start + 500])).all()
+            )
+        for entry in entries:
+            if entry.hash in claimed:
+                entry.consumed = True
+
+    def scan(self) -> int:
+        """
+        Fetch pool transactions newer than the cursor and index them
+        (needs app context for the cursor row)
+
+        Returns:
+            Number of new transactions
+        """
+        with self._lock:
+            if not self._cursor_loaded:
+                self._load_cursor()
+
+            # After a restart, re-read a few pages so recently seen TXs are matchable again
+            stop_lt = self._cursor_lt if self._warm else None
+            max_pages = SCAN_MAX_PAGES if self._warm else max(WARMUP_PAGES, 1)
+
+            collected = []
+            lt, tx_hash = None, None
+            reached = False
+            for _ in range(max_pages):
+                page = self.api.get_transactions(self.pool_address, limit=SCAN_PAGE_SIZE, lt=lt, tx_hash=tx_hash)
+                if lt is not None and page:
+                    first_id = page[0].get("transaction_id", {})
+                    if str(first_id.get("lt")) == str(lt) and first_id.get("hash") == tx_hash:
+                        page = page[1:]  # Pagination start is inclusive
+                for raw in page:
+                    raw_lt = int(raw.get("transaction_id", {}).get("lt", 0))
+                    if stop_lt is not None and raw_lt <= stop_lt:
+                        reached = True
+                        break
+                    collected.append(raw)
+                if reached or len(page) < SCAN_PAGE_SIZE - 1 or not page:
+                    reached = True
+                    break
+                last_id = page[-1].get("transaction_id", {})
+                lt, tx_hash = last_id.get("lt"), last_id.get("hash")
+
+            if not reached and self._warm:
+                self._stats["gaps"] += 1
+                print(f"⚠️  Confirmation scan hit {max_pages} pages before the cursor; older TXs skipped")
+
+            # Oldest first so index eviction order follows chain order
+            added = [entry for entry in (self._add(raw) for raw in reversed(collected)) if entry is not None]
+            if added:
+                self._mark_claimed(added)
+
+            self._stats["scans"] += 1
+            self._scanned_at = time.monotonic()
+            self._stats["scanned"] += len(collected)
+            self._warm = True
+
+            if collected:
+                newest = collected[0].get("transaction_id", {})
+                newest_lt = int(newest.get("lt", 0))
+                if self._cursor_lt is None or newest_lt > self._cursor_lt:
+                    self._cursor_lt, self._cursor_hash = newest_lt, newest.get("hash")
+                    self._save_cursor()
+            return len(collected)
+
+    def scan_if_stale(self, max_age: float) -> int:
+        """Scan only if the last scan is older than max_age seconds"""
+        if time.monotonic() - self._scanned_at < max_age:
+            return 0
+        return self.scan()
+
+    def match(self, pending: List[Transaction], users: Dict[int, User] = None) -> Dict[int, Dict]:
+        """
+        Match pending DB rows against indexed chain transactions
+
+        Args:
+            pending: Pending Transaction rows
+            users: Preloaded users by id (wallet_address fallback for old rows)
+
+        Returns:
+            Dict transaction id -> status dict for matched (confirmed) rows
+        """
+        users = users or {}
+        matched = {}
+        with self._lock:
+            for tx in pending:
+                entry = self._by_hash.get(normalize_hash(tx.tx_hash))
+                if entry is None:
+                    user = users.get(tx.user_id)
+                    sender = normalize_address(tx.sender_address or (user.wallet_address if user else ""))
+                    if sender:
+                        created_ts = calendar.timegm(tx.created_at.utctimetuple()) if tx.created_at else 0  # Naive UTC, not host-local
+                        for candidate in self._by_sender.get((sender, expected_value_nanoton(tx)), ()):
+                            if not candidate.consumed and candidate.utime >= created_ts - MATCH_SLACK_SECONDS:
+                                entry = candidate
+                                break
+                if entry is not None and not entry.consumed:
+                    entry.consumed = True
+                    matched[tx.id] = entry.to_status(self.pool_address)
+            self._stats["matched"] += len(matched)
+        return matched
+
+    def stats(self) -> Dict:
+        """Scan/match counters and index size"""
+        with self._lock:
+            data = dict(self._stats)
+            data["index_size"] = len(self._by_hash)
+            data["cursor_lt"] = self._cursor_lt
+        return data
+
+
+# Singleton instance
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_confirmation_engine() -> ConfirmationEngine:
+    """Get or create the confirmation engine for the configured pool"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                pool_address = os.getenv("POOL_CONTRACT_ADDRESS", "EQD-AKzjnXxLk8PFyVJvt9sIQW2_MqmSwi5qPfBZbhKT5bXf")
+                _engine = ConfirmationEngine(TONAPIClient(testnet=False), pool_address)  # Mainnet
+    return _engine
@@ -0,0 +1,145 @@
+# backend/tx_decoder.py
+"""
+Batch decoder for getTransactions pages
+Classifies each transaction by the pool op codes built in PoolService:
+- op=1 deposit (prepare_deposit_transaction)
+- op=2 withdraw with limit (prepare_withdraw_transaction)
+and reads amounts from in_msg / out_msgs. A page is decoded in one pass;
+message bodies are memoized, since pool payloads repeat byte-for-byte.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from ton_api import NANOTON, normalize_address, normalize_hash
+from ton_boc import parse_boc, decode_base64
+
+OP_DEPOSIT = 1
+OP_WITHDRAW = 2
+POOL_OPS = {
+    OP_DEPOSIT: "deposit",
+    OP_WITHDRAW: "withdraw",
+}
+
+BODY_CACHE_SIZE = 4096
+ADDRESS_CACHE_SIZE = 4096
+
+# Pages repeat the same wallet and pool addresses; normalize each once
+_normalize = lru_cache(maxsize=ADDRESS_CACHE_SIZE)(normalize_address)
+
+
+@lru_cache(maxsize=BODY_CACHE_SIZE)
+def decode_body(body: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """
+    Decode a base64 BOC message body
+
+    Returns:
+        (op, query_id, withdraw limit) - None where the body is too short
+    """
+    if not body:
+        return None, None, None
+    try:
+        cells, roots = parse_boc(decode_base64(body))
+        root = cells[roots[0]]
+    except Exception:
+        return None, None, None
+    op = root.read_uint(0, 32)
+    if op == OP_WITHDRAW and root.bits == 40:
+        return op, None, root.read_uint(32, 8)  # op(32) + limit(8), no query_id
+    return op, root.read_uint(32, 64), None
+
+
+def message_op(msg: Optional[Dict]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """(op, query_id, limit) of a TonCenter v2 message (text comments are op=0)"""
+    msg_data = (msg or {}).get("msg_data") or {}
+    if msg_data.get("@type") == "msg.dataText":
+        return 0, None, None
+    return decode_body(msg_data.get("body") or "")
+
+
+def decode_transactions(transactions: List[Dict], pool_address: str = "", only_pool: bool = False) -> List[Dict]:
+    """
+    Decode a page of getTransactions results in one pass
+
+    Works for both sides: a user wallet page (out_msgs to the pool) and the
+    pool's own page (in_msg from users).
+
+    Args:
+        transactions: Raw getTransactions items
+        pool_address: Pool contract address (any format)
+        only_pool: Drop transactions that do not involve the pool
+
+    Returns:
+        List of dicts: hash, lt, timestamp, type, op, amount, fee, counterparty, status
+    """
+    pool = _normalize(pool_address or "")
+    decoded = []
+    append = decoded.append
+
+    for tx in transactions:
+        tx_id = tx.get("transaction_id") or {}
+        in_msg = tx.get("in_msg") or {}
+        out_msgs = tx.get("out_msgs") or ()
+        source = _normalize(in_msg.get("source") or "")
+        account = _normalize((tx.get("address") or {}).get("account_address") or "")
+        on_pool_page = bool(pool) and account == pool
+        tx_type, op, amount, counterparty, limit = "unknown", None, 0, "", None
+        status = "completed"
+        involves_pool = on_pool_page
+
+        if pool and source == pool:
+            # Pool -> wallet: payout, or our own message bounced back
+            involves_pool = True
+            counterparty = source
+            amount = int(in_msg.get("value") or 0)
+            tx_type = "bounce" if in_msg.get("bounced") else "payout"
+            status = "failed" if in_msg.get("bounced") else "completed"
+        elif source:
+            counterparty = source
+            amount = int(in_msg.get("value") or 0)
+            op, _, limit = message_op(in_msg)
+            # Incoming op=1/2 is a pool request only on the pool's own page
+            if op in POOL_OPS and (on_pool_page or not pool):
+                tx_type = POOL_OPS[op]
+            else:
+                tx_type = "transfer_in"
+                op, limit = None, None
+
+        for out_msg in out_msgs:
+            destination = _normalize(out_msg.get("destination") or "")
+            if pool:
+                if destination != pool:
+                    continue
+                involves_pool = True
+            out_op, _, out_limit = message_op(out_msg)
+            if out_op in POOL_OPS:
+                involves_pool = True
+                tx_type, op, limit = POOL_OPS[out_op], out_op, out_limit
+                amount = int(out_msg.get("value") or 0)
+                counterparty = destination
+                break
+        else:
+            if not source and out_msgs:
+                # Wallet-initiated transfer that is not a pool request
+                tx_type = "transfer_out"
+                amount = sum(int(m.get("value") or 0) for m in out_msgs)
+                counterparty = _normalize(out_msgs[0].get("destination") or "")
+
+        if only_pool and pool and not involves_pool:
+            continue
+
+        item = {
+            "hash": normalize_hash(tx_id.get("hash", "")),
+            "lt": int(tx_id.get("lt", 0) or 0),
+            "timestamp": tx.get("utime", 0),
+            "type": tx_type,
+            "op": op,
+            "amount": amount / NANOTON,
+            "fee": int(tx.get("fee") or 0) / NANOTON,
+            "counterparty": counterparty,
+            "status": status,
+        }
+        if limit is not None:
+            item["limit"] = limit
+        append(item)
+    return decoded
@@ -0,0 +1,58 @@
+# backend/worker.py
+"""
+Background worker process for TON Staking Pool
+Runs the scheduler jobs (transaction monitor, pool stats refresher, pool
+indexer, email outbox dispatch, rollups, retention, counters
+reconciliation) outside the web process, so HTTP workers start fast and
+do not share the GIL with jobs.
+Several worker instances may run: only the elected leader runs jobs.
+
+Usage:
+    python worker.py
+Settings: SCHEDULER_THREADS (job thread pool), LEADER_RENEW_SECONDS
+"""
+
+import os
+import signal
+import threading
+from flask import Flask
+from dotenv import load_dotenv
+
+from db_config import configure_database, ensure_schema
+from leader_election import get_leader_elector
+from transaction_monitor import init_scheduler, stop_scheduler, SCHEDULER_THREADS
+
+load_dotenv()
+
+
+def create_worker_app() -> Flask:
+    """Minimal Flask app: DB config only (no routes, CSP, limiter or JWT)"""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", os.getenv("FLASK_SECRET_KEY", "super-secret-key"))
+    configure_database(app)
+    return app
+
+
+def main():
+    app = create_worker_app()
+    ensure_schema(app)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    elector = get_leader_elector("scheduler")
+    elector.start(
+        app,
+        on_elected=lambda: init_scheduler(app, max_workers=SCHEDULER_THREADS),
+        on_demoted=stop_scheduler
+    )
+    print(f"🚀 Worker started ({elector.holder}, {SCHEDULER_THREADS} job threads)")
+
+    stop.wait()
+    print("⏹️  Worker stopping...")
+    elector.resign()  # Releases the lock so another instance takes over right away
+
+
+if __name__ == "__main__":
+    main()
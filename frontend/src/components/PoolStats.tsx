@@ -1,6 +1,7 @@
 "use client";
 
 import { useEffect, useState } from "react";
+import { useEventStream } from "@/lib/useEventStream";
 
 interface PoolStatsData {
   total_staked: number;
@@ -16,18 +17,43 @@ interface PoolStatsProps {
   apiUrl: string;
 }
 
+// Ensure all required fields exist with defaults
+function toPoolStatsData(data: Partial<PoolStatsData>): PoolStatsData {
+  return {
+    total_staked: data.total_staked ?? 0,
+    total_staked_usd: data.total_staked_usd ?? 0,
+    participants_count: data.participants_count ?? 0,
+    apy: data.apy ?? 0,
+    min_stake: data.min_stake ?? 0,
+    status: data.status ?? 'active',
+    testnet: data.testnet ?? false,
+  };
+}
+
 export default function PoolStats({ apiUrl }: PoolStatsProps) {
   const [stats, setStats] = useState<PoolStatsData | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
+  // Push updates (only sent when the stats change)
+  const streaming = useEventStream<Partial<PoolStatsData>>(apiUrl, "pool", "", (data) => {
+    setStats(toPoolStatsData(data));
+    setError(null);
+    setLoading(false);
+  });
+
   useEffect(() => {
     fetchStats();
-    // Оновлюємо кожні 30 секунд
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
+  useEffect(() => {
+    if (streaming) return;
+    // Fallback: оновлюємо кожні 30 секунд, поки немає stream
     const interval = setInterval(fetchStats, 30000);
     return () => clearInterval(interval);
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, []);
+  }, [streaming]);
 
   const fetchStats = async () => {
     try {
@@ -35,18 +61,7 @@ export default function PoolStats({ apiUrl }: PoolStatsProps) {
       if (!response.ok) throw new Error("Failed to fetch pool stats");
       const data = await response.json();
       
-      // Ensure all required fields exist with defaults
-      const validatedData: PoolStatsData = {
-        total_staked: data.total_staked ?? 0,
-        total_staked_usd: data.total_staked_usd ?? 0,
-        participants_count: data.participants_count ?? 0,
-        apy: data.apy ?? 0,
-        min_stake: data.min_stake ?? 0,
-        status: data.status ?? 'active',
-        testnet: data.testnet ?? false,
-      };
-      
-      setStats(validatedData);
+      setStats(toPoolStatsData(data));
       setError(null);
     } catch (err) {
       setError(err instanceof Error ? err.message : "Unknown error");
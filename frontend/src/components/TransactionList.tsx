@@ -1,6 +1,7 @@
 "use client";
 
 import { useState, useEffect, useCallback } from "react";
+import { useEventStream } from "@/lib/useEventStream";
 
 interface Transaction {
   id: number;
@@ -17,6 +18,8 @@ interface TransactionListProps {
   token: string | null;
 }
 
+const PAGE_SIZE = 10;
+
 export default function TransactionList({
   apiUrl,
   token,
@@ -24,8 +27,11 @@ export default function TransactionList({
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
-  const [page, setPage] = useState(1);
+  // Keyset pagination: cursors[i] opens page i + 2 (opaque, from the API)
+  const [cursors, setCursors] = useState<string[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [totalPages, setTotalPages] = useState(1);
+  const page = cursors.length + 1;
   const [sortBy, setSortBy] = useState<"created_at" | "amount" | "type">(
     "created_at"
   );
@@ -45,11 +51,16 @@ export default function TransactionList({
 
     try {
       const params = new URLSearchParams({
-        page: page.toString(),
-        limit: "10",
+        limit: PAGE_SIZE.toString(),
         sort_by: sortBy,
         order: order,
       });
+      const cursor = cursors[cursors.length - 1];
+      if (cursor) {
+        params.append("cursor", cursor);
+      } else {
+        params.append("include_total", "1"); // Count once, on the first page
+      }
 
       if (statusFilter !== "all") {
         params.append("status", statusFilter);
@@ -73,7 +84,10 @@ export default function TransactionList({
 
       const data = await response.json();
       setTransactions(data.transactions || []);
-      setTotalPages(data.pagination?.pages || 1);
+      setNextCursor(data.pagination?.next_cursor ?? null);
+      if (typeof data.pagination?.total === "number") {
+        setTotalPages(Math.max(1, Math.ceil(data.pagination.total / PAGE_SIZE)));
+      }
     } catch (err) {
       setError(err instanceof Error ? err.message : "Unknown error");
     } finally {
@@ -81,34 +95,36 @@ export default function TransactionList({
     }
   };
 
-  // Poll for pending transaction status updates
+  // Poll for pending transaction status updates (one batch request)
   const pollTransactionStatus = useCallback(async () => {
     if (!token) return;
 
+    const pendingHashes = transactions
+      .filter((tx) => tx.status === "pending")
+      .map((tx) => tx.tx_hash);
+    if (pendingHashes.length === 0) return;
+
     try {
-      for (const tx of transactions) {
-        if (tx.status === "pending") {
-          const response = await fetch(
-            `${apiUrl}/api/transaction/${tx.tx_hash}/status`,
-            {
-              method: "GET",
-              headers: {
-                "Content-Type": "application/json",
-                Authorization: `Bearer ${token}`,
-              },
-            }
-          );
-
-          if (response.ok) {
-            const data = await response.json();
-            // Update transaction status locally
-            setTransactions((prev) =>
-              prev.map((t) =>
-                t.tx_hash === tx.tx_hash ? { ...t, status: data.status, updated_at: data.updated_at } : t
-              )
-            );
-          }
-        }
+      const response = await fetch(`${apiUrl}/api/transaction/status`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: `Bearer ${token}`,
+        },
+        body: JSON.stringify({ tx_hashes: pendingHashes }),
+      });
+
+      if (response.ok) {
+        const data: { statuses: Record<string, Transaction["status"]> } = await response.json();
+        // Update transaction statuses locally
+        setTransactions((prev) =>
+          prev.map((t) => {
+            const status = data.statuses[t.tx_hash];
+            return status && status !== t.status
+              ? { ...t, status, updated_at: new Date().toISOString() }
+              : t;
+          })
+        );
       }
     } catch (err) {
       // Silent error for polling - don't interrupt user experience
@@ -119,11 +135,29 @@ export default function TransactionList({
   useEffect(() => {
     fetchTransactions();
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [page, sortBy, order, statusFilter, token]);
+  }, [cursors, sortBy, order, statusFilter, token]);
+
+  // Push updates: statuses of the user's latest transactions, sent on change
+  const streaming = useEventStream<{ transactions: Pick<Transaction, "tx_hash" | "status" | "updated_at">[] }>(
+    apiUrl,
+    "tx",
+    token,
+    (data) => {
+      const updates = new Map(data.transactions.map((t) => [t.tx_hash, t]));
+      setTransactions((prev) =>
+        prev.map((t) => {
+          const update = updates.get(t.tx_hash);
+          return update && update.status !== t.status
+            ? { ...t, status: update.status, updated_at: update.updated_at }
+            : t;
+        })
+      );
+    }
+  );
 
-  // Set up polling interval for pending transactions
+  // Fallback: poll pending transactions while the stream is not connected
   useEffect(() => {
-    if (!token || transactions.length === 0) return;
+    if (!token || streaming || transactions.length === 0) return;
 
     const hasPendingTransactions = transactions.some(
       (tx) => tx.status === "pending"
@@ -137,7 +171,7 @@ export default function TransactionList({
     }, 5000);
 
     return () => clearInterval(pollingInterval);
-  }, [transactions, token, pollTransactionStatus]);
+  }, [transactions, token, streaming, pollTransactionStatus]);
 
   const formatDate = (dateStr: string) => {
     const date = new Date(dateStr);
@@ -197,7 +231,7 @@ export default function TransactionList({
                     | "confirmed"
                     | "failed"
                 );
-                setPage(1);
+                setCursors([]);
               }}
               className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500"
             >
@@ -217,7 +251,7 @@ export default function TransactionList({
               value={sortBy}
               onChange={(e) => {
                 setSortBy(e.target.value as "created_at" | "amount" | "type");
-                setPage(1);
+                setCursors([]);
               }}
               className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500"
             >
@@ -236,7 +270,7 @@ export default function TransactionList({
               value={order}
               onChange={(e) => {
                 setOrder(e.target.value as "asc" | "desc");
-                setPage(1);
+                setCursors([]);
               }}
               className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500"
             >
@@ -355,55 +389,27 @@ export default function TransactionList({
       )}
 
       {/* Pagination */}
-      {!loading && totalPages > 1 && (
+      {!loading && (page > 1 || nextCursor) && (
         <div className="mt-6 flex justify-center items-center gap-4">
           <button
-            onClick={() => setPage(Math.max(1, page - 1))}
+            onClick={() => setCursors((prev) => prev.slice(0, -1))}
             disabled={page === 1}
             className="px-4 py-2 bg-gray-200 text-gray-800 rounded-lg hover:bg-gray-300 disabled:opacity-50 disabled:cursor-not-allowed font-semibold"
           >
             ← Previous
           </button>
 
-          <div className="flex items-center gap-2">
-            {Array.from({ length: Math.min(totalPages, 5) }, (_, i) => {
-              let pageNum;
-              if (totalPages <= 5) {
-                pageNum = i + 1;
-              } else if (page <= 3) {
-                pageNum = i + 1;
-              } else if (page >= totalPages - 2) {
-                pageNum = totalPages - 4 + i;
-              } else {
-                pageNum = page - 2 + i;
-              }
-              return (
-                <button
-                  key={pageNum}
-                  onClick={() => setPage(pageNum)}
-                  className={`px-3 py-2 rounded-lg font-semibold transition-colors ${
-                    page === pageNum
-                      ? "bg-blue-600 text-white"
-                      : "bg-gray-200 text-gray-800 hover:bg-gray-300"
-                  }`}
-                >
-                  {pageNum}
-                </button>
-              );
-            })}
-          </div>
+          <span className="text-gray-600 font-semibold">
+            Page {page} of {Math.max(totalPages, page)}
+          </span>
 
           <button
-            onClick={() => setPage(Math.min(totalPages, page + 1))}
-            disabled={page === totalPages}
+            onClick={() => nextCursor && setCursors((prev) => [...prev, nextCursor])}
+            disabled={!nextCursor}
             className="px-4 py-2 bg-gray-200 text-gray-800 rounded-lg hover:bg-gray-300 disabled:opacity-50 disabled:cursor-not-allowed font-semibold"
           >
             Next →
           </button>
-
-          <span className="ml-2 text-gray-600 font-semibold">
-            Page {page} of {totalPages}
-          </span>
         </div>
       )}
 
@@ -1,6 +1,7 @@
 "use client";
 
 import { useEffect, useState } from "react";
+import { useEventStream } from "@/lib/useEventStream";
 
 interface UserBalanceData {
   user_address: string;
@@ -16,20 +17,45 @@ interface UserBalanceProps {
   userAddress: string;
 }
 
+// Ensure all required fields exist with defaults
+function toBalanceData(data: Partial<UserBalanceData>, userAddress: string): UserBalanceData {
+  return {
+    user_address: data.user_address ?? userAddress,
+    wallet_balance: data.wallet_balance ?? 0,
+    staked_amount: data.staked_amount ?? 0,
+    accumulated_rewards: data.accumulated_rewards ?? 0,
+    jettons_balance: data.jettons_balance ?? 0,
+    share_percentage: data.share_percentage ?? 0,
+  };
+}
+
 export default function UserBalance({ apiUrl, userAddress }: UserBalanceProps) {
   const [balance, setBalance] = useState<UserBalanceData | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
+  // Push updates (only sent when the balance changes)
+  const streaming = useEventStream<Partial<UserBalanceData>>(apiUrl, "balance", userAddress, (data) => {
+    setBalance(toBalanceData(data, userAddress));
+    setError(null);
+    setLoading(false);
+  });
+
   useEffect(() => {
     if (userAddress) {
       fetchBalance();
-      // Оновлюємо кожні 10 секунд
+    }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [userAddress]);
+
+  useEffect(() => {
+    if (userAddress && !streaming) {
+      // Fallback: оновлюємо кожні 10 секунд, поки немає stream
       const interval = setInterval(fetchBalance, 10000);
       return () => clearInterval(interval);
     }
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [userAddress]);
+  }, [userAddress, streaming]);
 
   const fetchBalance = async () => {
     try {
@@ -37,17 +63,7 @@ export default function UserBalance({ apiUrl, userAddress }: UserBalanceProps) {
       if (!response.ok) throw new Error("Failed to fetch balance");
       const data = await response.json();
       
-      // Ensure all required fields exist with defaults
-      const validatedData: UserBalanceData = {
-        user_address: data.user_address ?? userAddress,
-        wallet_balance: data.wallet_balance ?? 0,
-        staked_amount: data.staked_amount ?? 0,
-        accumulated_rewards: data.accumulated_rewards ?? 0,
-        jettons_balance: data.jettons_balance ?? 0,
-        share_percentage: data.share_percentage ?? 0,
-      };
-      
-      setBalance(validatedData);
+      setBalance(toBalanceData(data, userAddress));
       setError(null);
     } catch (err) {
       setError(err instanceof Error ? err.message : "Unknown error");
@@ -0,0 +1,172 @@
+"use client";
+
+import { useEffect, useRef, useState } from "react";
+
+// Shared Server-Sent Events connection to /api/stream.
+// All components on the page share one EventSource; the query string is the
+// union of what they subscribe to (pool stats, one wallet balance, tx statuses).
+// Tx events need a login: the access token is exchanged for a short-lived
+// stream token (POST /api/stream/token) on every connect, so the long-lived
+// token never appears in a URL.
+
+export type StreamEvent = "pool" | "balance" | "tx";
+
+interface StreamSubscription {
+  event: StreamEvent;
+  param: string;
+  handler: (data: unknown) => void;
+  onStatus: (connected: boolean) => void;
+}
+
+const RETRY_AFTER_CLOSE_MS = 60000;
+const RECONNECT_MS = 5000; // Same as the server's SSE retry
+
+const subscriptions = new Set<StreamSubscription>();
+let source: EventSource | null = null;
+let currentKey = "";
+let streamApiUrl = "";
+let connected = false;
+let syncScheduled = false;
+let retryTimer: ReturnType<typeof setTimeout> | null = null;
+
+function setConnected(value: boolean) {
+  connected = value;
+  subscriptions.forEach((sub) => sub.onStatus(value));
+}
+
+function buildUrl(): { url: string; accessToken: string } {
+  let pool = false;
+  let address = "";
+  let accessToken = "";
+  subscriptions.forEach((sub) => {
+    if (sub.event === "pool") pool = true;
+    if (sub.event === "balance") address = sub.param;
+    if (sub.event === "tx") accessToken = sub.param;
+  });
+  if (!pool && !address && !accessToken) return { url: "", accessToken };
+
+  const params = new URLSearchParams({ pool: pool ? "1" : "0" });
+  if (address) params.set("address", address);
+  return { url: `${streamApiUrl}/api/stream?${params.toString()}`, accessToken };
+}
+
+async function fetchStreamToken(accessToken: string): Promise<string> {
+  const res = await fetch(`${streamApiUrl}/api/stream/token`, {
+    method: "POST",
+    headers: { Authorization: `Bearer ${accessToken}` },
+  });
+  if (!res.ok) throw new Error(`Stream token: HTTP ${res.status}`);
+  const data = await res.json();
+  return data.stream_token;
+}
+
+function scheduleReconnect(delay: number) {
+  if (retryTimer) clearTimeout(retryTimer);
+  retryTimer = setTimeout(() => {
+    currentKey = "";
+    void connect();
+  }, delay);
+}
+
+async function connect() {
+  syncScheduled = false;
+  const { url, accessToken } = buildUrl();
+  const key = `${url}|${accessToken}`;
+  if (key === currentKey) return;
+
+  source?.close();
+  source = null;
+  currentKey = key;
+  setConnected(false);
+  if (!url) return;
+
+  let streamUrl = url;
+  if (accessToken) {
+    try {
+      streamUrl += `&token=${encodeURIComponent(await fetchStreamToken(accessToken))}`;
+    } catch {
+      if (currentKey === key) scheduleReconnect(RETRY_AFTER_CLOSE_MS);
+      return;
+    }
+    if (currentKey !== key) return; // Subscriptions changed while fetching
+  }
+
+  let opened = false;
+  const es = new EventSource(streamUrl);
+  (["pool", "balance", "tx"] as StreamEvent[]).forEach((name) => {
+    es.addEventListener(name, (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      subscriptions.forEach((sub) => {
+        if (sub.event === name) sub.handler(data);
+      });
+    });
+  });
+  es.onopen = () => {
+    opened = true;
+    setConnected(true);
+  };
+  es.onerror = () => {
+    if (accessToken && es.readyState !== EventSource.CLOSED) {
+      // The browser would reconnect with the same, soon expired stream token
+      es.close();
+      setConnected(false);
+      scheduleReconnect(opened ? RECONNECT_MS : RETRY_AFTER_CLOSE_MS);
+      return;
+    }
+    // CONNECTING = browser reconnects by itself; CLOSED = server refused (503/401)
+    if (es.readyState !== EventSource.CLOSED) return;
+    setConnected(false);
+    scheduleReconnect(RETRY_AFTER_CLOSE_MS);
+  };
+  source = es;
+}
+
+function scheduleConnect() {
+  if (syncScheduled) return;
+  syncScheduled = true;
+  setTimeout(() => void connect(), 0); // Batch subscriptions made in the same render
+}
+
+/**
+ * Subscribe to a stream event.
+ * Returns true while the stream is connected; callers keep polling otherwise.
+ *
+ * @param apiUrl  Backend base URL
+ * @param event   "pool" | "balance" | "tx"
+ * @param param   Wallet address for "balance", JWT access token for "tx"
+ * @param handler Called with the event payload (only sent when values change)
+ */
+export function useEventStream<T>(
+  apiUrl: string,
+  event: StreamEvent,
+  param: string | null | undefined,
+  handler: (data: T) => void
+): boolean {
+  const [isConnected, setIsConnected] = useState(false);
+  const handlerRef = useRef(handler);
+  handlerRef.current = handler;
+
+  useEffect(() => {
+    if (typeof window === "undefined" || typeof EventSource === "undefined") return;
+    if (event !== "pool" && !param) return;
+
+    streamApiUrl = apiUrl;
+    const sub: StreamSubscription = {
+      event,
+      param: param ?? "",
+      handler: (data) => handlerRef.current(data as T),
+      onStatus: setIsConnected,
+    };
+    subscriptions.add(sub);
+    setIsConnected(connected);
+    scheduleConnect();
+
+    return () => {
+      subscriptions.delete(sub);
+      setIsConnected(false);
+      scheduleConnect();
+    };
+  }, [apiUrl, event, param]);
+
+  return isConnected;
+}
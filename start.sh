@@ -20,8 +20,9 @@ fi
 echo "Starting gunicorn from: $(pwd)"
 exec gunicorn \
   --bind 0.0.0.0:${PORT:-8000} \
-  --workers 1 \
-  --worker-class sync \
+  --workers ${GUNICORN_WORKERS:-2} \
+  --worker-class gthread \
+  --threads ${GUNICORN_THREADS:-32} \
   --timeout 120 \
   --access-logfile - \
   --error-logfile - \